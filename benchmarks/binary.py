@@ -0,0 +1,77 @@
+"""
+Compare the binary document format with JSON on size, encoding speed and
+decoding speed, and measure opening a memory-mapped document lazily.
+
+    python benchmarks/binary.py [blocks]
+"""
+
+import sys
+import tempfile
+import timeit
+import zlib
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from documents import make_doc, schema
+
+from prosemirror import codec
+from prosemirror.model import Node
+from prosemirror.model.binary import map_node
+
+
+def seconds(f: Callable[[], Any]) -> float:
+    number = 3
+    return min(timeit.repeat(f, number=number, repeat=5)) / number
+
+
+def main() -> None:
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    doc = make_doc(blocks)
+    binary = doc.to_binary()
+    assert Node.from_binary(schema, binary).to_json() == doc.to_json()
+    print(f"{blocks} blocks, {doc.content.size} positions")
+    print(f"  {'':<16} {'size':>10} {'zlib':>10} {'encode':>10} {'decode':>10}")
+
+    def row(name: str, data: bytes, encode: float, decode: float) -> None:
+        print(
+            f"  {name:<16} {len(data) / 1024:7.1f} KiB"
+            f" {len(zlib.compress(data)) / 1024:6.1f} KiB"
+            f" {encode * 1000:7.2f} ms {decode * 1000:7.2f} ms"
+        )
+
+    row(
+        "binary",
+        binary,
+        seconds(doc.to_binary),
+        seconds(lambda: Node.from_binary(schema, binary)),
+    )
+    for backend in codec.BACKENDS:
+        try:
+            codec.use_backend(backend)
+        except ImportError:
+            continue
+        data = doc.to_json_bytes()
+        row(
+            f"json ({backend})",
+            data,
+            seconds(doc.to_json_bytes),
+            seconds(lambda data=data: Node.from_json(schema, data)),
+        )
+    codec.use_backend()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "doc.pmb"
+        path.write_bytes(binary)
+        print("lazy (memory-mapped)")
+        lazy = {
+            "open + size": lambda: map_node(schema, path).content.size,
+            "first block": lambda: map_node(schema, path).child(0).text_content,
+            "full traversal": lambda: list(map_node(schema, path).iter_descendants()),
+        }
+        for name, f in lazy.items():
+            print(f"  {name:<16} {seconds(f) * 1000:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Compare validating the content of a wide document with the linear edge
+scan that `ContentMatch.match_type` used to do, with the transition
+tables, and with the transition tables over rope storage after a
+one-block edit (which only rematches the subtrees around the change).
+
+    python benchmarks/content.py [blocks]
+"""
+
+import sys
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+from documents import make_doc, schema
+
+from prosemirror.model import ContentMatch, Fragment
+
+
+def seconds(f: Callable[[], Any]) -> float:
+    number = 10
+    return min(timeit.repeat(f, number=number, repeat=5)) / number
+
+
+def scan_fragment(match: ContentMatch, frag: Fragment) -> ContentMatch | None:
+    cur: ContentMatch | None = match
+    for child in frag.content:
+        if cur is None:
+            break
+        found = None
+        for edge in cur.next:
+            if edge.type.name == child.type.name:
+                found = edge.next
+                break
+        cur = found
+    return cur
+
+
+def main() -> None:
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    doc = make_doc(blocks)
+    match = doc.type.content_match
+    paragraph = schema.node("paragraph", None, [schema.text("edit")])
+    print(f"{blocks} blocks")
+    scan = seconds(lambda: scan_fragment(match, doc.content))
+    print(f"  {'edge scan':<28} {scan * 1000:8.3f} ms")
+    table = seconds(lambda: match.match_fragment(doc.content))
+    print(f"  {'transition table':<28} {table * 1000:8.3f} ms {scan / table:6.1f}x")
+
+    Fragment.rope_threshold = 64
+    roped = make_doc(blocks)
+    match.match_fragment(roped.content)
+    edits = iter(range(10**9))
+
+    def edit_and_check() -> None:
+        index = next(edits) % blocks
+        content = roped.content.replace_child(index, paragraph)
+        match.match_fragment(content)
+
+    edit = seconds(lambda: roped.content.replace_child(blocks // 2, paragraph))
+    rope = seconds(edit_and_check) - edit
+    name = "rope, after a one-block edit"
+    print(f"  {name:<28} {rope * 1000:8.3f} ms {scan / rope:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Representative documents shared by the benchmark scripts.
+"""
+
+import random
+from typing import Any
+
+from prosemirror.model import Node, Schema
+from prosemirror.schema.basic import schema as basic_schema
+from prosemirror.schema.list import add_list_nodes
+from prosemirror.utils import JSONDict
+
+schema: Schema[Any, Any] = Schema({
+    "nodes": add_list_nodes(basic_schema.spec["nodes"], "paragraph block*", "block"),
+    "marks": basic_schema.spec["marks"],
+})
+
+WORDS = [
+    "lorem",
+    "ipsum",
+    "dolor",
+    "sit",
+    "amet",
+    "consectetur",
+    "adipiscing",
+    "elit",
+    "sed",
+    "do",
+    "eiusmod",
+    "tempor",
+]
+
+
+def text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def inline(rng: random.Random) -> list[JSONDict]:
+    content: list[JSONDict] = []
+    for _ in range(rng.randint(1, 6)):
+        node: dict[str, Any] = {"type": "text", "text": text(rng, rng.randint(1, 12))}
+        kind = rng.random()
+        if kind < 0.15:
+            node["marks"] = [{"type": "strong"}]
+        elif kind < 0.25:
+            node["marks"] = [{"type": "em"}, {"type": "strong"}]
+        elif kind < 0.3:
+            href = f"https://example.com/{rng.randint(0, 20)}"
+            node["marks"] = [{"type": "link", "attrs": {"href": href}}]
+        content.append(node)
+    return content
+
+
+def paragraph(rng: random.Random) -> JSONDict:
+    return {"type": "paragraph", "content": inline(rng)}
+
+
+def block(rng: random.Random) -> JSONDict:
+    kind = rng.random()
+    if kind < 0.6:
+        return paragraph(rng)
+    if kind < 0.7:
+        return {
+            "type": "heading",
+            "attrs": {"level": rng.randint(1, 3)},
+            "content": inline(rng),
+        }
+    if kind < 0.85:
+        return {
+            "type": "bullet_list",
+            "content": [
+                {"type": "list_item", "content": [paragraph(rng)]}
+                for _ in range(rng.randint(1, 5))
+            ],
+        }
+    if kind < 0.95:
+        return {"type": "blockquote", "content": [paragraph(rng), paragraph(rng)]}
+    return {
+        "type": "code_block",
+        "content": [{"type": "text", "text": text(rng, 20)}],
+    }
+
+
+def doc_json(blocks: int, seed: int = 1) -> JSONDict:
+    rng = random.Random(seed)
+    return {"type": "doc", "content": [block(rng) for _ in range(blocks)]}
+
+
+def make_doc(blocks: int, seed: int = 1) -> Node:
+    return Node.from_json(schema, doc_json(blocks, seed))
+
+
+def count_nodes(doc: Node) -> int:
+    count = 1
+
+    def iteratee(*args: object) -> None:
+        nonlocal count
+        count += 1
+
+    doc.descendants(iteratee)
+    return count
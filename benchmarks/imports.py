@@ -0,0 +1,49 @@
+"""
+Time importing the package's entry points in fresh interpreters, and
+check which of them load lxml.
+
+    python benchmarks/imports.py [runs]
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    "prosemirror.transform": "import prosemirror.transform",
+    "prosemirror.model": "import prosemirror.model",
+    "model + DOMParser": "from prosemirror.model import DOMParser",
+}
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start, "lxml" in sys.modules)
+"""
+
+
+def run(statement: str) -> tuple[float, bool]:
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT.format(statement=statement)],
+        capture_output=True,
+        check=True,
+        cwd=ROOT,
+        text=True,
+    ).stdout.split()
+    return float(output[0]), output[1] == "True"
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(f"  {'':<24} {'import time':>12} {'lxml':>6}")
+    for name, statement in CASES.items():
+        results = [run(statement) for _ in range(runs)]
+        seconds = min(result[0] for result in results)
+        print(f"  {name:<24} {seconds * 1000:9.1f} ms {results[0][1]!s:>6}")
+
+
+if __name__ == "__main__":
+    main()
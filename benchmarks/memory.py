@@ -0,0 +1,46 @@
+"""
+Measure the memory used by a representative document, per node, and by
+resolved positions into it.
+
+    python benchmarks/memory.py [blocks]
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from documents import count_nodes, doc_json, schema
+
+from prosemirror.model import Node
+
+
+def main() -> None:
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    data = doc_json(blocks)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    doc = Node.from_json(schema, data)
+    gc.collect()
+    doc_bytes = tracemalloc.get_traced_memory()[0] - before
+    # Resolve once up front, so that lazily built position indexes on the
+    # fragments are not counted as part of the resolved positions.
+    sample = range(0, doc.content.size, doc.content.size // 5000)
+    for pos in sample:
+        doc.resolve_no_cache(pos)
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    positions = [doc.resolve_no_cache(pos) for pos in sample]
+    gc.collect()
+    pos_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    nodes = count_nodes(doc)
+    print(f"{blocks} blocks, {nodes} nodes, {doc.content.size} positions")
+    print(
+        f"document:       {doc_bytes / 1024:10.1f} KiB {doc_bytes / nodes:8.1f} B/node"
+    )
+    print(f"resolved pos:   {pos_bytes / len(positions):10.1f} B/position")
+
+
+if __name__ == "__main__":
+    main()
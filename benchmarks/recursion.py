@@ -0,0 +1,206 @@
+"""
+Compare the explicit-stack tree algorithms with the recursive
+implementations they replaced, on a wide and on a deeply nested document.
+
+    python benchmarks/recursion.py [blocks] [depth]
+"""
+
+import copy
+import sys
+import timeit
+from collections.abc import Callable
+from typing import Any, cast
+
+from documents import doc_json, schema
+
+from prosemirror.model import Fragment, Mark, Node
+from prosemirror.model.diff import Diff, find_diff_end, find_diff_start
+from prosemirror.model.node import TextNode
+from prosemirror.transform.mark_step import map_fragment
+from prosemirror.utils import JSONDict
+
+
+def check(node: Node) -> None:
+    if not node.type.valid_content(node.content):
+        msg = f"Invalid content for node {node.type.name}"
+        raise ValueError(msg)
+    marks = Mark.none
+    for mark in node.marks:
+        marks = mark.add_to_set(marks)
+    if not Mark.same_set(marks, node.marks):
+        msg = f"Invalid collection of marks for node {node.type.name}"
+        raise ValueError(msg)
+    for child in node.content.content:
+        check(child)
+
+
+def to_json(node: Node) -> JSONDict:
+    obj: dict[str, Any] = {"type": node.type.name}
+    if node.attrs:
+        obj["attrs"] = copy.deepcopy(node.attrs)
+    if node.content.size:
+        obj["content"] = [to_json(child) for child in node.content.content]
+    if node.marks:
+        obj["marks"] = [mark.to_json() for mark in node.marks]
+    if isinstance(node, TextNode):
+        obj["text"] = node.text
+    return obj
+
+
+def from_json(data: JSONDict) -> Node:
+    marks = None
+    if data.get("marks"):
+        marks = [
+            schema.mark_from_json(cast(JSONDict, item))
+            for item in cast(list[Any], data["marks"])
+        ]
+    if data["type"] == "text":
+        return schema.text(str(data["text"]), marks)
+    content = data.get("content")
+    fragment = (
+        Fragment([from_json(item) for item in cast(list[JSONDict], content)])
+        if content
+        else Fragment.empty
+    )
+    return schema.node_type(str(data["type"])).create(
+        cast(JSONDict, data.get("attrs")), fragment, marks
+    )
+
+
+def diff_start(a: Fragment, b: Fragment, pos: int) -> int | None:
+    i = 0
+    while True:
+        if a.child_count == i or b.child_count == i:
+            return None if a.child_count == b.child_count else pos
+        child_a, child_b = a.child(i), b.child(i)
+        if child_a == child_b:
+            pos += child_a.node_size
+            i += 1
+            continue
+        if not child_a.same_markup(child_b):
+            return pos
+        if child_a.is_text:
+            assert isinstance(child_a, TextNode)
+            assert isinstance(child_b, TextNode)
+            if child_a.text != child_b.text:
+                return pos
+        if child_a.content.size or child_b.content.size:
+            inner = diff_start(child_a.content, child_b.content, pos + 1)
+            if inner:
+                return inner
+        pos += child_a.node_size
+        i += 1
+
+
+def diff_end(a: Fragment, b: Fragment, pos_a: int, pos_b: int) -> Diff | None:
+    i_a, i_b = a.child_count, b.child_count
+    while True:
+        if i_a == 0 or i_b == 0:
+            return None if i_a == i_b else {"a": pos_a, "b": pos_b}
+        i_a -= 1
+        i_b -= 1
+        child_a, child_b = a.child(i_a), b.child(i_b)
+        size = child_a.node_size
+        if child_a == child_b:
+            pos_a -= size
+            pos_b -= size
+            continue
+        if not child_a.same_markup(child_b):
+            return {"a": pos_a, "b": pos_b}
+        if child_a.is_text:
+            assert isinstance(child_a, TextNode)
+            assert isinstance(child_b, TextNode)
+            if child_a.text != child_b.text:
+                return {"a": pos_a, "b": pos_b}
+        if child_a.content.size or child_b.content.size:
+            inner = diff_end(child_a.content, child_b.content, pos_a - 1, pos_b - 1)
+            if inner:
+                return inner
+        pos_a -= size
+        pos_b -= size
+
+
+def map_recursive(
+    fragment: Fragment, f: Callable[[Node, Node, int], Node], parent: Node
+) -> Fragment:
+    mapped = []
+    for i, child in enumerate(fragment.content):
+        if child.content.size:
+            child = child.copy(map_recursive(child.content, f, child))
+        if child.is_inline:
+            child = f(child, parent, i)
+        mapped.append(child)
+    return Fragment.from_array(mapped)
+
+
+def deep_json(depth: int) -> JSONDict:
+    data: JSONDict = {
+        "type": "paragraph",
+        "content": [{"type": "text", "text": "deep"}],
+    }
+    for _ in range(depth):
+        data = {"type": "blockquote", "content": [data]}
+    return {"type": "doc", "content": [data]}
+
+
+def bold(node: Node, parent: Node, index: int) -> Node:
+    return node.mark(schema.marks["strong"].create().add_to_set(node.marks))
+
+
+def measure(
+    name: str, iterative: Callable[[], Any], recursive: Callable[[], Any]
+) -> None:
+    def run(f: Callable[[], Any]) -> str:
+        try:
+            f()
+        except RecursionError:
+            return "RecursionError"
+        number = 3
+        seconds = min(timeit.repeat(f, number=number, repeat=5)) / number
+        return f"{seconds * 1000:9.2f} ms"
+
+    print(f"  {name:<16} {run(iterative):>16} {run(recursive):>16}")
+
+
+def compare(label: str, data: JSONDict) -> None:
+    doc = Node.from_json(schema, data)
+    other = Node.from_json(schema, data)
+    print(f"{label}: {doc.content.size} positions")
+    print(f"  {'':<16} {'explicit stack':>16} {'recursive':>16}")
+    measure("from_json", lambda: Node.from_json(schema, data), lambda: from_json(data))
+    measure("to_json", doc.to_json, lambda: to_json(doc))
+    measure("check", doc.check, lambda: check(doc))
+    measure(
+        "find_diff_start",
+        lambda: find_diff_start(doc.content, other.content, 0),
+        lambda: diff_start(doc.content, other.content, 0),
+    )
+    measure(
+        "find_diff_end",
+        lambda: find_diff_end(
+            doc.content, other.content, doc.content.size, doc.content.size
+        ),
+        lambda: diff_end(
+            doc.content, other.content, doc.content.size, doc.content.size
+        ),
+    )
+    measure(
+        "map_fragment",
+        lambda: map_fragment(doc.content, bold, doc),
+        lambda: map_recursive(doc.content, bold, doc),
+    )
+
+
+def main() -> None:
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    compare(f"wide ({blocks} blocks)", doc_json(blocks))
+    compare(f"deep ({depth} levels)", deep_json(depth))
+    limit = sys.getrecursionlimit()
+    compare(
+        f"deeper than the recursion limit ({limit * 2} levels)", deep_json(limit * 2)
+    )
+
+
+if __name__ == "__main__":
+    main()
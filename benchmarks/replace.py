@@ -0,0 +1,79 @@
+"""
+Time fitting slices that need wrapping and filling into many positions in
+a document (`replace_step`, without applying the steps), on a schema that
+fills its wrapping and fill tables on demand and on one that precomputes
+them, and time a single first paste on a freshly created schema.
+
+    python benchmarks/replace.py [blocks]
+"""
+
+import sys
+import time
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+from documents import doc_json, schema
+
+from prosemirror.model import Node, Schema, Slice
+from prosemirror.transform import replace_step
+
+
+def seconds(f: Callable[[], Any]) -> float:
+    number = 3
+    return min(timeit.repeat(f, number=number, repeat=5)) / number
+
+
+def slices(schema: Schema[Any, Any]) -> list[Slice]:
+    text = schema.text("pasted")
+    paragraph = schema.node("paragraph", None, [text])
+    item = schema.node("list_item", None, [paragraph])
+    return [
+        # Needs a list around it inside a paragraph's parent.
+        Slice(schema.nodes["list_item"].create(None, [paragraph]).content, 0, 0),
+        Slice(schema.node("bullet_list", None, [item]).content, 1, 1),
+        Slice(schema.node("blockquote", None, [paragraph]).content, 0, 0),
+        Slice(schema.node("doc", None, [paragraph, paragraph]).content, 1, 1),
+        Slice(schema.node("paragraph", None, [text]).content, 0, 0),
+    ]
+
+
+def paste(doc: Node, schema: Schema[Any, Any], positions: range) -> None:
+    pasted = slices(schema)
+    for i, pos in enumerate(positions):
+        replace_step(doc, pos, pos, pasted[i % len(pasted)])
+
+
+def main() -> None:
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    data = doc_json(blocks)
+    lazy = Node.from_json(schema, data)
+    eager_schema = Schema(schema.spec).precompute()
+    eager = Node.from_json(eager_schema, data)
+    positions = range(1, lazy.content.size, max(lazy.content.size // 500, 1))
+    print(f"{blocks} blocks, {len(positions)} pastes")
+    for name, doc, doc_schema in [
+        ("on demand", lazy, schema),
+        ("precomputed", eager, eager_schema),
+    ]:
+        elapsed = seconds(lambda doc=doc, s=doc_schema: paste(doc, s, positions))
+        print(f"  {name:<24} {elapsed * 1000:8.2f} ms")
+
+    def first_paste(fresh: Schema[Any, Any]) -> float:
+        doc = Node.from_json(fresh, data)
+        start = time.perf_counter()
+        paste(doc, fresh, range(1, 2))
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    fresh = Schema(schema.spec).precompute()
+    setup = time.perf_counter() - start
+    print(f"  {'precompute':<24} {setup * 1000:8.2f} ms")
+    lazy_first = min(first_paste(Schema(schema.spec)) for _ in range(5))
+    eager_first = first_paste(fresh)
+    print(f"  {'first paste, on demand':<24} {lazy_first * 1000:8.2f} ms")
+    print(f"  {'first paste, precomputed':<24} {eager_first * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Time replacing across blocks and inserting a top-level block in a wide
+document, with its children stored in a list and in a rope.
+
+    python benchmarks/rope.py [blocks]
+"""
+
+import sys
+import timeit
+from collections.abc import Callable
+from itertools import accumulate
+from typing import Any
+
+from documents import schema
+
+from prosemirror.model import Fragment, Node, Slice
+
+
+def seconds(f: Callable[[], Any]) -> float:
+    number = 10
+    return min(timeit.repeat(f, number=number, repeat=5)) / number
+
+
+def make_doc(blocks: int) -> Node:
+    return schema.node(
+        "doc",
+        None,
+        [
+            schema.node("paragraph", None, [schema.text(f"paragraph {i}")])
+            for i in range(blocks)
+        ],
+    )
+
+
+def replace(blocks: int) -> tuple[float, float]:
+    doc = make_doc(blocks)
+    starts = [0, *accumulate(child.node_size for child in doc.content.content)]
+    # From inside one paragraph to inside a paragraph five blocks later.
+    start, end = starts[blocks // 2] + 3, starts[blocks // 2 + 5] + 2
+    delete = seconds(lambda: doc.replace(start, end, Slice.empty))
+    paragraph = schema.node("paragraph", None, [schema.text("new")])
+    inserted = Slice(Fragment.from_(paragraph), 0, 0)
+    pos = starts[blocks // 2]
+    insert = seconds(lambda: doc.replace(pos, pos, inserted))
+    return delete, insert
+
+
+def main() -> None:
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    lists = replace(blocks)
+    Fragment.rope_threshold = 512
+    ropes = replace(blocks)
+    Fragment.rope_threshold = None
+    print(f"{blocks} blocks")
+    print(f"  {'':<20} {'list':>11} {'rope':>11}")
+    for i, name in enumerate(["cross-block delete", "block insert"]):
+        print(f"  {name:<20} {lists[i] * 1000:8.2f} ms {ropes[i] * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Time creating a schema with many node types (and its DOM parser) the
+first time in a process, again with the same content expressions, and
+after loading the compiled content expressions saved by another process.
+
+    python benchmarks/schema.py [node types]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+from prosemirror.model import DOMParser, Schema
+from prosemirror.model import content as content_module
+from prosemirror.schema.basic import schema as basic_schema
+
+
+def make_spec(count: int) -> dict[str, Any]:
+    nodes = dict(basic_schema.spec["nodes"])
+    nodes["doc"] = {"content": "(block | section)+"}
+    # Groups of four types, each referring to the next one.
+    for i in range((count - len(nodes)) // 4 * 4):
+        name = f"node{i}"
+        if i % 4 == 0:
+            spec = {
+                "group": "section",
+                "content": f"heading? (paragraph | node{i + 1}){{1,3}} block*",
+            }
+        elif i % 4 == 1:
+            spec = {
+                "group": "block",
+                "content": f"(paragraph | heading | node{i + 1})+ horizontal_rule?",
+            }
+        elif i % 4 == 2:
+            spec = {"group": "block", "content": "inline*", "marks": "em strong"}
+        else:
+            spec = {"group": "inline", "inline": True, "atom": True}
+        nodes[name] = {**spec, "parseDOM": [{"tag": f"x-{name}"}]}
+    return {"nodes": nodes, "marks": basic_schema.spec["marks"]}
+
+
+def create(spec: dict[str, Any]) -> float:
+    start = time.perf_counter()
+    DOMParser.from_schema(Schema(spec))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 80
+    spec = make_spec(count)
+    if len(sys.argv) > 2:
+        # Child process: report the time with the given compiled cache.
+        content_module.load_compiled_content(sys.argv[2])
+        print(create(spec))
+        return
+    print(f"{len(spec['nodes'])} node types")
+    first = create(spec)
+    print(f"  {'first schema':<24} {first * 1000:8.2f} ms")
+    again = min(create(spec) for _ in range(5))
+    print(f"  {'same expressions again':<24} {again * 1000:8.2f} ms")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "content.json")
+        content_module.dump_compiled_content(path)
+        output = subprocess.run(
+            [sys.executable, __file__, str(count), path],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+    loaded = float(output)
+    print(f"  {'from a saved cache':<24} {loaded * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compare the peak memory and time of exporting a document to a JSON file
+and importing it back, with and without streaming, and of extracting its
+text with and without building the document.
+
+    python benchmarks/stream.py [blocks]
+"""
+
+import gc
+import io
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from documents import make_doc, schema
+
+from prosemirror.model import Node
+from prosemirror.model.stream import dump_json, load_json, text_from_json
+
+
+def measure(f: Callable[[], Any]) -> tuple[float, float]:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    f()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, seconds
+
+
+def main() -> None:
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    doc = make_doc(blocks)
+    data = doc.to_json_bytes()
+    gc.collect()
+    tracemalloc.start()
+    copy = Node.from_json(schema, data)
+    gc.collect()
+    doc_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del copy
+    print(f"{blocks} blocks, {len(data) / 1024:.0f} KiB of JSON")
+    print(f"  one copy of the document: {doc_bytes / 1024:10.0f} KiB")
+    print(f"  {'':<24} {'peak memory':>14} {'time':>10}")
+
+    def row(name: str, f: Callable[[], Any]) -> None:
+        peak, seconds = measure(f)
+        print(f"  {name:<24} {peak / 1024:10.0f} KiB {seconds * 1000:7.0f} ms")
+
+    row("export to_json_bytes", lambda: io.BytesIO().write(doc.to_json_bytes()))
+    row("export dump_json", lambda: dump_json(doc, io.BytesIO(b"")))
+    # The input file is opened outside of the measurement.
+    file = io.BytesIO(data)
+    row("import from_json", lambda: Node.from_json(schema, file.getvalue()))
+    file = io.BytesIO(data)
+    row("import load_json", lambda: load_json(schema, file))
+    row(
+        "text via from_json",
+        lambda: Node.from_json(schema, data).text_between(0, doc.content.size, "\n"),
+    )
+    row("text_from_json", lambda: text_from_json(schema, data, "\n"))
+
+
+if __name__ == "__main__":
+    main()
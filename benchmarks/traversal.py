@@ -0,0 +1,54 @@
+"""
+Time tree traversals that check node type flags for every node.
+
+    python benchmarks/traversal.py [blocks]
+"""
+
+import sys
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+from documents import make_doc
+
+from prosemirror.model import Node
+
+
+def seconds(f: Callable[[], Any]) -> float:
+    number = 5
+    return min(timeit.repeat(f, number=number, repeat=7)) / number
+
+
+def flags(doc: Node) -> int:
+    count = 0
+    for node, _, _, _ in doc.iter_descendants():
+        if node.is_textblock or node.is_atom or (node.is_inline and node.is_leaf):
+            count += 1
+    return count
+
+
+def whitespace(doc: Node) -> int:
+    count = 0
+    for node, _, _, _ in doc.iter_descendants():
+        if node.type.whitespace == "pre":
+            count += 1
+    return count
+
+
+def main() -> None:
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    doc = make_doc(blocks)
+    size = doc.content.size
+    cases: dict[str, Callable[[], Any]] = {
+        "node flags": lambda: flags(doc),
+        "whitespace": lambda: whitespace(doc),
+        "node sizes": lambda: sum(n.node_size for n, _, _, _ in doc.iter_descendants()),
+        "text_between": lambda: doc.text_between(0, size, "\n", "*"),
+    }
+    print(f"{blocks} blocks")
+    for name, f in cases.items():
+        print(f"  {name:<16} {seconds(f) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Compare loading canonical JSON (as written by `Node.to_json`) with and
+without `trusted=True`.
+
+    python benchmarks/trusted.py [blocks...]
+"""
+
+import io
+import sys
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+from documents import make_doc, schema
+
+from prosemirror.model import Node
+from prosemirror.model.stream import load_json
+
+
+def seconds(f: Callable[[], Any]) -> float:
+    number = 3
+    return min(timeit.repeat(f, number=number, repeat=7)) / number
+
+
+def compare(blocks: int) -> None:
+    doc = make_doc(blocks)
+    data = doc.to_json()
+    raw = doc.to_json_bytes()
+    print(f"{blocks} blocks")
+    cases: dict[str, Callable[[bool], Any]] = {
+        "from_json (dict)": lambda trusted: Node.from_json(
+            schema, data, trusted=trusted
+        ),
+        "from_json (bytes)": lambda trusted: Node.from_json(
+            schema, raw, trusted=trusted
+        ),
+        "load_json (stream)": lambda trusted: load_json(
+            schema, io.BytesIO(raw), trusted=trusted
+        ),
+    }
+    for name, load in cases.items():
+        assert load(True).eq(doc)
+        checked = seconds(lambda load=load: load(False))
+        trusted = seconds(lambda load=load: load(True))
+        print(
+            f"  {name:<24} {checked * 1000:7.2f} ms {trusted * 1000:7.2f} ms"
+            f" {checked / trusted:7.2f}x"
+        )
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or [200, 2000]
+    print(f"  {'':<24} {'checked':>10} {'trusted':>10} {'speedup':>8}")
+    for blocks in sizes:
+        compare(blocks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+JSON encoding and decoding for documents, slices and steps.
+
+Uses `orjson` or `msgspec` when one of them is installed, and falls back
+to the standard library's `json` module otherwise. The backend can be
+changed with `use_backend`.
+"""
+
+import importlib
+import json
+from collections.abc import Callable
+from typing import Any, TypeAlias, cast
+
+from prosemirror.utils import JSON
+
+# The serialized forms accepted by `loads` and the `from_json` methods.
+RawJSON: TypeAlias = str | bytes | bytearray | memoryview
+
+# Supported backends, fastest first.
+BACKENDS = ("orjson", "msgspec", "json")
+
+backend: str
+_loads: Callable[[RawJSON], JSON]
+_dumps: Callable[[JSON], bytes]
+
+
+def _json_loads(data: RawJSON) -> JSON:
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)  # type: ignore[no-any-return]
+
+
+def _json_dumps(value: JSON) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def use_backend(name: str | None = None) -> str:
+    """
+    Switch to the named backend (one of `BACKENDS`), or to the fastest
+    installed one when no name is given, and return its name. Raises
+    `ImportError` when the requested backend is not installed.
+    """
+    global backend, _loads, _dumps
+    if name is None:
+        for candidate in BACKENDS:
+            try:
+                return use_backend(candidate)
+            except ImportError:
+                continue
+    if name == "orjson":
+        orjson = importlib.import_module("orjson")
+        _loads, _dumps = orjson.loads, orjson.dumps
+    elif name == "msgspec":
+        msgspec_json = importlib.import_module("msgspec.json")
+        _loads = msgspec_json.Decoder().decode
+        _dumps = msgspec_json.Encoder().encode
+    elif name == "json":
+        _loads, _dumps = _json_loads, _json_dumps
+    else:
+        msg = f"Unknown JSON backend: {name}"
+        raise ValueError(msg)
+    backend = name
+    return name
+
+
+# `isinstance(value, RawJSON)` narrows `JSON` values to `memoryview[JSON]`,
+# so any memoryview is accepted.
+def loads(data: "RawJSON | memoryview[Any]") -> JSON:
+    """
+    Parse JSON from a string or from UTF-8 encoded bytes, a bytearray or
+    a memoryview.
+    """
+    return _loads(cast(RawJSON, data))
+
+
+def dumps(value: JSON) -> bytes:
+    """
+    Serialize a JSON value to compact, UTF-8 encoded bytes.
+    """
+    return _dumps(value)
+
+
+use_backend()
@@ -1,12 +1,36 @@
+import importlib
+from typing import TYPE_CHECKING
+
 from .content import ContentMatch
 from .fragment import Fragment
-from .from_dom import DOMParser
 from .mark import Mark
 from .node import Node
 from .replace import ReplaceError, Slice
 from .resolvedpos import NodeRange, ResolvedPos
 from .schema import MarkType, NodeType, Schema
-from .to_dom import DOMSerializer
+
+if TYPE_CHECKING:
+    from .from_dom import DOMParser, from_html
+    from .to_dom import DOMSerializer
+
+# Loaded on first access, so that code that doesn't deal with HTML doesn't
+# import lxml.
+_lazy = {
+    "DOMParser": "from_dom",
+    "DOMSerializer": "to_dom",
+    "from_html": "from_dom",
+}
+
+
+def __getattr__(name: str) -> object:
+    module = _lazy.get(name)
+    if module is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "ContentMatch",
@@ -22,4 +46,5 @@ __all__ = [
     "ResolvedPos",
     "Schema",
     "Slice",
+    "from_html",
 ]
@@ -0,0 +1,630 @@
+"""
+A compact binary encoding for documents, slices and arbitrary JSON values
+(used for steps).
+
+An encoded buffer starts with `MAGIC` and a kind byte, followed by four
+tables and the body:
+
+- strings: every type name, mark name, attribute key and string value,
+  stored once as UTF-8.
+- attrs: every distinct attribute object, as an encoded value.
+- marks: every distinct mark, as a name and an attrs index.
+- mark sets: every distinct set of marks, as a list of mark indices.
+
+All integers are unsigned LEB128 varints. Indices into the attrs and mark
+set tables start at 1, with 0 meaning "none". In the body, a node is
+stored as `(type << 1 | is_text)`, followed for text nodes by a mark set
+index and a length-prefixed UTF-8 text block, and for other nodes by an
+attrs index, a mark set index and a content block. A content block holds
+the child count and, when there are children, the content size and the
+byte length of the encoded children, so that readers can skip whole
+subtrees without decoding them.
+
+`decode_node(schema, encode_node(node))` produces a node with the same
+JSON form as `node`. With `lazy=True`, or through `map_node`, only the
+tables and the top node are decoded up front, and the children of each
+node are decoded the first time they are accessed. `share_node` and
+`open_shared_node` hand encoded documents to other processes through
+shared memory.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Iterator, Sequence
+from typing import TYPE_CHECKING, Any, TypeAlias, cast
+
+from prosemirror.utils import JSON, Attrs, JSONDict
+
+from .blob import Blob
+from .fragment import Fragment
+from .mark import Mark
+from .node import Node, TextNode
+from .replace import Slice
+
+if TYPE_CHECKING:
+    from multiprocessing.shared_memory import SharedMemory
+
+    from .schema import NodeType, Schema
+
+Buffer: TypeAlias = bytes | bytearray | memoryview
+
+MAGIC = b"PMB\x01"
+KIND_NODE = 0
+KIND_SLICE = 1
+KIND_VALUE = 2
+
+# Value tags.
+NULL = 0
+FALSE = 1
+TRUE = 2
+INT = 3
+FLOAT = 4
+STRING = 5
+LIST = 6
+DICT = 7
+
+double = struct.Struct("<d")
+
+
+def write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data: Buffer, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+class Encoder:
+    """
+    Collects the tables while the body of a buffer is being written.
+    """
+
+    def __init__(self) -> None:
+        self.strings: list[str] = []
+        self.string_index: dict[str, int] = {}
+        self.attrs: list[bytes] = []
+        self.attrs_index: dict[Any, int] = {}
+        self.marks: list[tuple[int, int]] = []
+        self.mark_index: dict[int, int] = {}
+        self.mark_sets: list[tuple[int, ...]] = []
+        self.mark_set_index: dict[tuple[int, ...], int] = {}
+        # Keeps the objects whose ids are used as keys alive.
+        self.seen: list[object] = []
+
+    def string(self, value: str) -> int:
+        index = self.string_index.get(value)
+        if index is None:
+            index = self.string_index[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def value(self, out: bytearray, value: JSON) -> None:
+        if value is None:
+            out.append(NULL)
+        elif value is True:
+            out.append(TRUE)
+        elif value is False:
+            out.append(FALSE)
+        elif isinstance(value, str):
+            out.append(STRING)
+            write_varint(out, self.string(value))
+        elif isinstance(value, int):
+            out.append(INT)
+            write_varint(out, value << 1 if value >= 0 else (~value << 1) | 1)
+        elif isinstance(value, float):
+            out.append(FLOAT)
+            out += double.pack(value)
+        elif isinstance(value, dict):
+            out.append(DICT)
+            write_varint(out, len(value))
+            for key, item in value.items():
+                write_varint(out, self.string(key))
+                self.value(out, item)
+        elif isinstance(value, list | tuple):
+            out.append(LIST)
+            write_varint(out, len(value))
+            for item in value:
+                self.value(out, item)
+        elif isinstance(value, Blob):
+            self.value(out, value.value)
+        else:
+            msg = f"Cannot encode {value!r}"
+            raise TypeError(msg)
+
+    def attrs_ref(self, attrs: Attrs) -> int:
+        if not attrs:
+            return 0
+        index = self.attrs_index.get(id(attrs))
+        if index is None:
+            out = bytearray()
+            self.value(out, attrs)
+            encoded = bytes(out)
+            index = self.attrs_index.get(encoded)
+            if index is None:
+                self.attrs.append(encoded)
+                index = self.attrs_index[encoded] = len(self.attrs)
+            self.attrs_index[id(attrs)] = index
+            self.seen.append(attrs)
+        return index
+
+    def mark_set_ref(self, marks: Sequence[Mark]) -> int:
+        if not marks:
+            return 0
+        refs = []
+        for mark in marks:
+            index = self.mark_index.get(id(mark))
+            if index is None:
+                entry = (self.string(mark.type.name), self.attrs_ref(mark.attrs))
+                self.marks.append(entry)
+                index = self.mark_index[id(mark)] = len(self.marks) - 1
+                self.seen.append(mark)
+            refs.append(index)
+        key = tuple(refs)
+        index = self.mark_set_index.get(key)
+        if index is None:
+            self.mark_sets.append(key)
+            index = self.mark_set_index[key] = len(self.mark_sets)
+        return index
+
+    def node(self, out: bytearray, node: Node) -> None:
+        # Children are written to a buffer of their own, which is appended
+        # to the parent's buffer once its length is known. The stack holds
+        # the buffers and remaining children of the enclosing nodes.
+        stack: list[tuple[bytearray, Iterator[Node]]] = []
+        nodes: Iterator[Node] = iter((node,))
+        while True:
+            child = next(nodes, None)
+            if child is None:
+                if not stack:
+                    return
+                children = out
+                out, nodes = stack.pop()
+                write_varint(out, len(children))
+                out += children
+                continue
+            type_ref = self.string(child.type.name) << 1
+            if child.is_text:
+                write_varint(out, type_ref | 1)
+                write_varint(out, self.mark_set_ref(child.marks))
+                text = cast(TextNode, child).text.encode("utf-8", "surrogatepass")
+                write_varint(out, len(text))
+                out += text
+                continue
+            write_varint(out, type_ref)
+            write_varint(out, self.attrs_ref(child.attrs))
+            write_varint(out, self.mark_set_ref(child.marks))
+            content = child.content
+            write_varint(out, content.child_count)
+            if content.child_count:
+                write_varint(out, content.size)
+                stack.append((out, nodes))
+                out, nodes = bytearray(), iter(content.content)
+
+    def content(self, out: bytearray, fragment: Fragment) -> None:
+        write_varint(out, fragment.child_count)
+        if not fragment.child_count:
+            return
+        write_varint(out, fragment.size)
+        children = bytearray()
+        for child in fragment.content:
+            self.node(children, child)
+        write_varint(out, len(children))
+        out += children
+
+    def finish(self, kind: int, body: bytearray) -> bytes:
+        out = bytearray(MAGIC)
+        out.append(kind)
+        # Encoding the tables can't add strings, since they were all
+        # registered when the entries were created.
+        write_varint(out, len(self.strings))
+        for string in self.strings:
+            encoded = string.encode("utf-8", "surrogatepass")
+            write_varint(out, len(encoded))
+            out += encoded
+        write_varint(out, len(self.attrs))
+        for attrs in self.attrs:
+            out += attrs
+        write_varint(out, len(self.marks))
+        for name, attrs_ref in self.marks:
+            write_varint(out, name)
+            write_varint(out, attrs_ref)
+        write_varint(out, len(self.mark_sets))
+        for mark_set in self.mark_sets:
+            write_varint(out, len(mark_set))
+            for mark in mark_set:
+                write_varint(out, mark)
+        out += body
+        return bytes(out)
+
+
+class Decoder:
+    """
+    Reads the tables of an encoded buffer, and decodes values, marks and
+    nodes from its body.
+    """
+
+    def __init__(self, schema: "Schema[Any, Any]", data: Buffer, kind: int) -> None:
+        self.schema = schema
+        self.data = data
+        # An object that must stay alive for `data` to remain valid.
+        self.owner: object = None
+        if bytes(data[:4]) != MAGIC:
+            msg = "Invalid input for binary decoding"
+            raise ValueError(msg)
+        if data[4] != kind:
+            msg = f"Expected encoded data of kind {kind}, got {data[4]}"
+            raise ValueError(msg)
+        pos = 5
+        count, pos = read_varint(data, pos)
+        strings = []
+        for _ in range(count):
+            length, pos = read_varint(data, pos)
+            strings.append(str(data[pos : pos + length], "utf-8", "surrogatepass"))
+            pos += length
+        self.strings = strings
+        count, pos = read_varint(data, pos)
+        attrs: list[JSONDict | None] = [None]
+        for _ in range(count):
+            value, pos = self.value(pos)
+            attrs.append(cast(JSONDict, value))
+        self.attrs = attrs
+        count, pos = read_varint(data, pos)
+        marks = []
+        for _ in range(count):
+            name, pos = read_varint(data, pos)
+            attrs_ref, pos = read_varint(data, pos)
+            marks.append(schema.mark(strings[name], attrs[attrs_ref]))
+        count, pos = read_varint(data, pos)
+        mark_sets = [Mark.none]
+        for _ in range(count):
+            length, pos = read_varint(data, pos)
+            mark_set = []
+            for _ in range(length):
+                mark, pos = read_varint(data, pos)
+                mark_set.append(marks[mark])
+            mark_sets.append(Mark.set_from(mark_set))
+        self.mark_sets = mark_sets
+        self.body = pos
+        # Node types and computed attributes per (type, attrs) reference.
+        self.types: dict[int, NodeType] = {}
+        self.node_attrs: dict[tuple[int, int], Attrs] = {}
+
+    def value(self, pos: int) -> tuple[JSON, int]:
+        data = self.data
+        tag = data[pos]
+        pos += 1
+        if tag == STRING:
+            index, pos = read_varint(data, pos)
+            return self.strings[index], pos
+        if tag == INT:
+            value, pos = read_varint(data, pos)
+            return (~(value >> 1) if value & 1 else value >> 1), pos
+        if tag == NULL:
+            return None, pos
+        if tag == TRUE:
+            return True, pos
+        if tag == FALSE:
+            return False, pos
+        if tag == FLOAT:
+            return double.unpack_from(data, pos)[0], pos + 8
+        if tag == DICT:
+            count, pos = read_varint(data, pos)
+            result: dict[str, JSON] = {}
+            for _ in range(count):
+                key, pos = read_varint(data, pos)
+                result[self.strings[key]], pos = self.value(pos)
+            return result, pos
+        if tag == LIST:
+            count, pos = read_varint(data, pos)
+            items: list[JSON] = []
+            for _ in range(count):
+                item, pos = self.value(pos)
+                items.append(item)
+            return items, pos
+        msg = f"Invalid value tag {tag}"
+        raise ValueError(msg)
+
+    def node_type(self, type_ref: int) -> "NodeType":
+        type = self.types.get(type_ref)
+        if type is None:
+            type = self.types[type_ref] = self.schema.node_type(
+                self.strings[type_ref],
+            )
+        return type
+
+    def computed_attrs(self, type_ref: int, attrs_ref: int) -> Attrs:
+        key = (type_ref, attrs_ref)
+        attrs = self.node_attrs.get(key)
+        if attrs is None:
+            attrs = self.node_attrs[key] = self.node_type(type_ref).compute_attrs(
+                self.attrs[attrs_ref],
+            )
+        return attrs
+
+    def node(self, pos: int) -> tuple[Node, int]:
+        """
+        Decode the node that starts at `pos`, returning it and the
+        position after it.
+        """
+        # Frames of nodes whose content is being decoded: type and attrs
+        # reference, mark set reference, child count, content size, and
+        # the children decoded so far. The bottom frame collects the
+        # result.
+        result: list[Node] = []
+        frames: list[tuple[int, int, int, int, int, list[Node]]] = [
+            (0, 0, 0, 1, 0, result),
+        ]
+        data = self.data
+        text_type = None
+        while True:
+            type_ref, attrs_ref, marks_ref, count, size, built = frames[-1]
+            if len(built) == count:
+                frames.pop()
+                if not frames:
+                    return result[0], pos
+                frames[-1][5].append(
+                    Node(
+                        self.node_type(type_ref),
+                        self.computed_attrs(type_ref, attrs_ref),
+                        Fragment(built, size),
+                        self.mark_sets[marks_ref],
+                    ),
+                )
+                continue
+            header, pos = read_varint(data, pos)
+            if header & 1:
+                if text_type is None:
+                    text_type = self.node_type(header >> 1)
+                marks_ref, pos = read_varint(data, pos)
+                length, pos = read_varint(data, pos)
+                text = str(data[pos : pos + length], "utf-8", "surrogatepass")
+                pos += length
+                built.append(
+                    TextNode(
+                        text_type,
+                        cast(Attrs, text_type.default_attrs),
+                        text,
+                        self.mark_sets[marks_ref],
+                    ),
+                )
+                continue
+            type_ref = header >> 1
+            attrs_ref, pos = read_varint(data, pos)
+            marks_ref, pos = read_varint(data, pos)
+            count, pos = read_varint(data, pos)
+            if not count:
+                built.append(
+                    Node(
+                        self.node_type(type_ref),
+                        self.computed_attrs(type_ref, attrs_ref),
+                        Fragment.empty,
+                        self.mark_sets[marks_ref],
+                    ),
+                )
+                continue
+            size, pos = read_varint(data, pos)
+            _, pos = read_varint(data, pos)
+            frames.append((type_ref, attrs_ref, marks_ref, count, size, []))
+
+    def lazy_node(self, pos: int) -> tuple[Node, int]:
+        """
+        Decode the node that starts at `pos` without decoding its
+        descendants, returning it and the position after it.
+        """
+        data = self.data
+        header, pos = read_varint(data, pos)
+        if header & 1:
+            text_type = self.node_type(header >> 1)
+            marks_ref, pos = read_varint(data, pos)
+            length, pos = read_varint(data, pos)
+            text = str(data[pos : pos + length], "utf-8", "surrogatepass")
+            return TextNode(
+                text_type,
+                cast(Attrs, text_type.default_attrs),
+                text,
+                self.mark_sets[marks_ref],
+            ), pos + length
+        type_ref = header >> 1
+        attrs_ref, pos = read_varint(data, pos)
+        marks_ref, pos = read_varint(data, pos)
+        count, pos = read_varint(data, pos)
+        content = Fragment.empty
+        if count:
+            size, pos = read_varint(data, pos)
+            length, pos = read_varint(data, pos)
+            content = LazyFragment(self, pos, count, size)
+            pos += length
+        return Node(
+            self.node_type(type_ref),
+            self.computed_attrs(type_ref, attrs_ref),
+            content,
+            self.mark_sets[marks_ref],
+        ), pos
+
+    def content(self, pos: int) -> tuple[Fragment, int]:
+        count, pos = read_varint(self.data, pos)
+        if not count:
+            return Fragment.empty, pos
+        size, pos = read_varint(self.data, pos)
+        _, pos = read_varint(self.data, pos)
+        children = []
+        for _ in range(count):
+            child, pos = self.node(pos)
+            children.append(child)
+        return Fragment(children, size), pos
+
+
+class LazyFragment(Fragment):
+    """
+    A fragment whose children are decoded from an encoded buffer the first
+    time they are accessed. Its size and child count are available without
+    decoding anything. Children that have content are themselves lazy, so
+    reading a node only decodes the path leading to it.
+    """
+
+    __slots__ = ("_count", "_decoder", "_pos")
+
+    def __init__(self, decoder: Decoder, pos: int, count: int, size: int) -> None:
+        self._decoder: Decoder | None = decoder
+        self._pos = pos
+        self._count = count
+        self.size = size
+        self._offsets = None
+        self._digest = None
+
+    def _materialize(self) -> None:
+        decoder = self._decoder
+        assert decoder is not None
+        children = []
+        pos = self._pos
+        for _ in range(self._count):
+            child, pos = decoder.lazy_node(pos)
+            children.append(child)
+        self.content = Fragment(children, self.size).content
+        self._decoder = None
+
+    @property
+    def child_count(self) -> int:
+        return self._count
+
+    @property
+    def materialized(self) -> bool:
+        """
+        Whether the children of this fragment have been decoded.
+        """
+        return self._decoder is None
+
+
+def encode_node(node: Node) -> bytes:
+    encoder = Encoder()
+    body = bytearray()
+    encoder.node(body, node)
+    return encoder.finish(KIND_NODE, body)
+
+
+def decode_node(schema: "Schema[Any, Any]", data: Buffer, lazy: bool = False) -> Node:
+    """
+    Decode an encoded node. When `lazy` is true, the content of each node
+    is a `LazyFragment`, and `data` must stay unchanged for as long as the
+    node is in use.
+    """
+    decoder = Decoder(schema, data, KIND_NODE)
+    if lazy:
+        return decoder.lazy_node(decoder.body)[0]
+    return decoder.node(decoder.body)[0]
+
+
+def map_node(schema: "Schema[Any, Any]", path: str | os.PathLike[str]) -> Node:
+    """
+    Lazily decode the node stored in the file at `path`. The file is
+    memory-mapped, so opening it only reads its tables and top node, and
+    the rest is paged in as children are accessed.
+    """
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return decode_node(schema, memoryview(mapped), lazy=True)
+
+
+def share_node(node: Node, name: str | None = None) -> "SharedMemory":
+    """
+    Encode a node into a new shared memory block, which other processes
+    can open by its name with `open_shared_node`. The caller owns the
+    block: it should close it when done, and unlink it once no process
+    needs it anymore.
+    """
+    from multiprocessing.shared_memory import SharedMemory
+
+    data = encode_node(node)
+    shared = SharedMemory(name, create=True, size=len(data))
+    assert shared.buf is not None
+    shared.buf[: len(data)] = data
+    return shared
+
+
+def open_shared_node(schema: "Schema[Any, Any]", name: str) -> Node:
+    """
+    Lazily decode the node published with `share_node` under `name`. The
+    encoded data is read in place, without copying or parsing it up
+    front, and the block stays attached until every part of the node has
+    been decoded or the node is discarded. The block must not be changed
+    or unlinked while the node is in use.
+    """
+    from multiprocessing.shared_memory import SharedMemory
+
+    # The publishing process manages the block's lifetime.
+    if sys.version_info >= (3, 13):
+        shared = SharedMemory(name, track=False)
+    elif os.name == "posix":
+        # Attaching with `SharedMemory` registers the block with this
+        # process's resource tracker, which unlinks it when the process
+        # exits. Unregistering it again would also drop the publisher's
+        # registration when both share a tracker, so map it directly.
+        import _posixshmem  # type: ignore[import-not-found]
+
+        fd = _posixshmem.shm_open("/" + name, os.O_RDONLY, mode=0o600)
+        try:
+            mapped = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        return decode_node(schema, memoryview(mapped), lazy=True)
+    else:
+        shared = SharedMemory(name)
+    assert shared.buf is not None
+    decoder = Decoder(schema, shared.buf, KIND_NODE)
+    decoder.owner = shared
+    return decoder.lazy_node(decoder.body)[0]
+
+
+def encode_fragment(fragment: Fragment) -> bytes:
+    return encode_slice(Slice(fragment, 0, 0))
+
+
+def decode_fragment(schema: "Schema[Any, Any]", data: Buffer) -> Fragment:
+    return decode_slice(schema, data).content
+
+
+def encode_slice(slice: Slice) -> bytes:
+    encoder = Encoder()
+    body = bytearray()
+    write_varint(body, slice.open_start)
+    write_varint(body, slice.open_end)
+    encoder.content(body, slice.content)
+    return encoder.finish(KIND_SLICE, body)
+
+
+def decode_slice(schema: "Schema[Any, Any]", data: Buffer) -> Slice:
+    decoder = Decoder(schema, data, KIND_SLICE)
+    open_start, pos = read_varint(data, decoder.body)
+    open_end, pos = read_varint(data, pos)
+    content, _ = decoder.content(pos)
+    if not content.size:
+        return Slice.empty
+    return Slice(content, open_start, open_end)
+
+
+def encode_value(value: JSON) -> bytes:
+    """
+    Encode an arbitrary JSON value, with its strings (including object
+    keys) stored once in the string table.
+    """
+    encoder = Encoder()
+    body = bytearray()
+    encoder.value(body, value)
+    return encoder.finish(KIND_VALUE, body)
+
+
+def decode_value(schema: "Schema[Any, Any]", data: Buffer) -> JSON:
+    decoder = Decoder(schema, data, KIND_VALUE)
+    return decoder.value(decoder.body)[0]
@@ -0,0 +1,134 @@
+"""
+Out-of-line storage for large attribute values.
+
+Attributes declared with `"blob": True` in their spec hold `Blob` objects
+instead of plain values. A schema keeps a single blob per distinct value
+(see `Schema.blob`), so all nodes, marks, slices and steps carrying the
+same value share it, and blobs compare by digest instead of by content.
+
+In JSON, a blob is written as its value. Inside `externalize_blobs`, it is
+written as a reference, `{"$blob": digest}`, and its value is collected
+into a store instead, so that it can be saved once. References are
+resolved when nodes and marks are created, from the blobs the schema
+already holds or from the store passed to `inline_blobs`.
+
+Callbacks that read attributes, such as `toDOM` and `leafText`, get the
+`Blob` and can use its `value`. `DOMSerializer` writes blobs returned as
+attribute values in a DOM spec as their value.
+"""
+
+from collections.abc import Generator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from hashlib import blake2b
+from typing import Any
+
+from prosemirror.utils import JSON, Attrs, JSONDict, freeze
+
+from .comparedeep import canonical
+
+# The store that blob values are moved to while serializing, and the one
+# that references are resolved from while loading.
+_externalized: ContextVar[dict[str, JSON] | None] = ContextVar(
+    "externalized", default=None
+)
+_inlined: ContextVar[Mapping[str, JSON] | None] = ContextVar("inlined", default=None)
+
+
+class Blob:
+    """
+    An immutable attribute value identified by a digest of its content.
+    """
+
+    __slots__ = ("__weakref__", "digest", "value")
+
+    def __init__(self, value: JSON) -> None:
+        self.value = freeze(value)
+        self.digest = blake2b(canonical(value).encode(), digest_size=16).hexdigest()
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, Blob):
+            return self.digest == other.digest
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __repr__(self) -> str:
+        # Also used by `canonical`, so node digests don't hash the value.
+        return f"Blob({self.digest})"
+
+    def __copy__(self) -> "Blob":
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "Blob":
+        return self
+
+    def to_json(self) -> JSON:
+        store = _externalized.get()
+        if store is None:
+            return self.value
+        store[self.digest] = self.value
+        return {"$blob": self.digest}
+
+
+def blob_ref(value: JSON) -> str | None:
+    """
+    The digest referenced by `value`, if it is a blob reference.
+    """
+    if isinstance(value, dict) and len(value) == 1:
+        digest = value.get("$blob")
+        if isinstance(digest, str):
+            return digest
+    return None
+
+
+def find_blob(digest: str) -> JSON:
+    store = _inlined.get()
+    if store is None or digest not in store:
+        msg = f"Unknown blob {digest}"
+        raise ValueError(msg)
+    return store[digest]
+
+
+def blob_json(value: JSON) -> JSON:
+    """
+    The JSON form of an attribute value that may be a blob.
+    """
+    return value.to_json() if isinstance(value, Blob) else value
+
+
+def attrs_json(attrs: Attrs) -> JSONDict:
+    """
+    The JSON form of an attribute object holding blobs.
+    """
+    return {name: blob_json(value) for name, value in attrs.items()}
+
+
+@contextmanager
+def externalize_blobs() -> Generator[dict[str, JSON], None, None]:
+    """
+    Write blobs as references in the JSON produced inside the block, and
+    collect their values, by digest, into the yielded store.
+    """
+    store: dict[str, JSON] = {}
+    token = _externalized.set(store)
+    try:
+        yield store
+    finally:
+        _externalized.reset(token)
+
+
+@contextmanager
+def inline_blobs(store: Mapping[str, JSON]) -> Generator[None, None, None]:
+    """
+    Resolve blob references in the nodes and marks created inside the
+    block from `store`, as collected by `externalize_blobs`.
+    """
+    token = _inlined.set(store)
+    try:
+        yield
+    finally:
+        _inlined.reset(token)
@@ -1,5 +1,35 @@
+import json
+
 from prosemirror.utils import JSON
 
 
 def compare_deep(a: JSON, b: JSON) -> bool:
-    return a == b
+    return a is b or a == b
+
+
+def canonical(value: object) -> str:
+    """
+    Encode a JSON-like value as a string, sorting object keys, such that
+    values that compare equal (like `1`, `1.0` and `True`) get the same
+    encoding.
+    """
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        return json.dumps(value)
+    if isinstance(value, bool | int):
+        return str(int(value))
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    if isinstance(value, dict):
+        items = sorted(
+            ((str(key), item) for key, item in value.items()), key=lambda i: i[0]
+        )
+        return (
+            "{"
+            + ",".join(f"{json.dumps(key)}:{canonical(item)}" for key, item in items)
+            + "}"
+        )
+    if isinstance(value, list | tuple):
+        return "[" + ",".join(canonical(item) for item in value) + "]"
+    return repr(value)
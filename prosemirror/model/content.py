@@ -1,8 +1,11 @@
+import os
 import re
 from dataclasses import dataclass
 from functools import cmp_to_key, reduce
+from hashlib import blake2b
 from typing import (
     TYPE_CHECKING,
+    Any,
     ClassVar,
     Literal,
     NamedTuple,
@@ -12,7 +15,11 @@ from typing import (
     cast,
 )
 
+from prosemirror.codec import dumps, loads
+from prosemirror.utils import JSON
+
 from .fragment import Fragment
+from .rope import Rope
 
 if TYPE_CHECKING:
     from .node import Node
@@ -25,10 +32,9 @@ class MatchEdge:
     next: "ContentMatch"
 
 
-@dataclass
-class WrapCacheEntry:
-    target: "NodeType"
-    computed: list["NodeType"] | None
+class FillPath(NamedTuple):
+    match: "ContentMatch"
+    types: tuple["NodeType", ...]
 
 
 class Active(TypedDict):
@@ -48,12 +54,24 @@ class ContentMatch:
     empty: ClassVar["ContentMatch"]
     valid_end: bool
     next: list[MatchEdge]
-    wrap_cache: list[WrapCacheEntry]
+    # The states reached from this one by each node type in `next`.
+    transitions: dict["NodeType", "ContentMatch"]
+    wrap_cache: dict["NodeType", list["NodeType"] | None]
+    # The candidates `fill_before` tries, by the type of the first node
+    # after the fill (`None` when there is none), filled in on demand or
+    # by `Schema.precompute`.
+    fill_cache: dict[Optional["NodeType"], list[FillPath]]
 
     def __init__(self, valid_end: bool) -> None:
         self.valid_end = valid_end
         self.next = []
-        self.wrap_cache = []
+        self.transitions = {}
+        self.wrap_cache = {}
+        self.fill_cache = {}
+
+    def add_edge(self, type: "NodeType", next: "ContentMatch") -> None:
+        self.next.append(MatchEdge(type, next))
+        self.transitions.setdefault(type, next)
 
     @classmethod
     def parse(cls, string: str, node_types: dict[str, "NodeType"]) -> "ContentMatch":
@@ -63,14 +81,43 @@ class ContentMatch:
         expr = parse_expr(stream)
         if stream.next() is not None:
             stream.err("Unexpected trailing text")
-        match = dfa(nfa(expr))
+        match = minimize(dfa(nfa(expr)))
         check_for_dead_ends(match, stream)
         return match
 
+    def to_table(self) -> "ContentTable":
+        """
+        A JSON-serializable form of this state and the states reachable
+        from it, which refers to node types by name.
+        """
+        states = self.states()
+        index = {state: i for i, state in enumerate(states)}
+        return [
+            (
+                state.valid_end,
+                [(edge.type.name, index[edge.next]) for edge in state.next],
+            )
+            for state in states
+        ]
+
+    @classmethod
+    def from_table(
+        cls, table: "ContentTable", node_types: dict[str, "NodeType"]
+    ) -> "ContentMatch":
+        states = [cls(valid_end) for valid_end, _ in table]
+        for state, (_, edges) in zip(states, table, strict=True):
+            for name, next in edges:
+                state.add_edge(node_types[name], states[next])
+        return states[0]
+
     def match_type(self, type: "NodeType") -> Optional["ContentMatch"]:
-        for next in self.next:
-            if next.type.name == type.name:
-                return next.next
+        next = self.transitions.get(type)
+        if next is not None:
+            return next
+        # Types from another instance of the schema match by name.
+        for edge in self.next:
+            if edge.type.name == type.name:
+                return edge.next
         return None
 
     def match_fragment(
@@ -79,13 +126,57 @@ class ContentMatch:
         start: int = 0,
         end: int | None = None,
     ) -> Optional["ContentMatch"]:
+        content = frag.content
         if end is None:
-            end = frag.child_count
-        cur: ContentMatch | None = self
-        i = start
-        while cur and i < end:
-            cur = cur.match_type(frag.child(i).type)
-            i += 1
+            end = len(content)
+        if isinstance(content, Rope):
+            return self.match_rope(content, start, end)
+        cur = self
+        for i in range(start, end):
+            type = content[i].type
+            next = cur.transitions.get(type) or cur.match_type(type)
+            if next is None:
+                return None
+            cur = next
+        return cur
+
+    def match_rope(self, rope: Rope, start: int, end: int) -> Optional["ContentMatch"]:
+        """
+        Match the nodes from `start` to `end` in `rope`. The states reached
+        over whole subtrees are remembered on the subtrees, which are
+        shared between versions of a document, so matching the content of
+        an edited document only goes through the nodes around the change.
+        """
+        if start == 0 and end >= rope.length:
+            matches = rope.matches
+            if matches is None:
+                matches = rope.matches = {}
+            elif self in matches:
+                return matches[self]
+            result = self._match_rope(rope, 0, rope.length)
+            matches[self] = result
+            return result
+        return self._match_rope(rope, start, end)
+
+    def _match_rope(self, rope: Rope, start: int, end: int) -> Optional["ContentMatch"]:
+        cur = self
+        next: ContentMatch | None
+        if not rope.height:
+            for node in cast(tuple["Node", ...], rope.items)[start:end]:
+                next = cur.match_type(node.type)
+                if next is None:
+                    return None
+                cur = next
+            return cur
+        offset = 0
+        for child in cast(tuple[Rope, ...], rope.items):
+            child_end = offset + child.length
+            if child_end > start and offset < end:
+                next = cur.match_rope(child, max(start - offset, 0), end - offset)
+                if next is None:
+                    return None
+                cur = next
+            offset = child_end
         return cur
 
     @property
@@ -101,11 +192,7 @@ class ContentMatch:
         return None
 
     def compatible(self, other: "ContentMatch") -> bool:
-        for i in self.next:
-            for j in other.next:
-                if i.type.name == j.type.name:
-                    return True
-        return False
+        return any(other.match_type(edge.type) for edge in self.next)
 
     def fill_before(
         self,
@@ -113,34 +200,64 @@ class ContentMatch:
         to_end: bool = False,
         start_index: int = 0,
     ) -> Fragment | None:
-        seen: list[ContentMatch] = [self]
+        first = after.maybe_child(start_index)
+        if not first and not to_end:
+            return Fragment.empty
+        for match, types in self.fill_paths(first.type if first else None):
+            if first:
+                finished = match.match_fragment(after, start_index)
+                if not finished or (to_end and not finished.valid_end):
+                    continue
+            if not types:
+                return Fragment.empty
+            return Fragment.from_([cast("Node", tp.create_and_fill()) for tp in types])
+        return None
 
-        def search(match: ContentMatch, types: list["NodeType"]) -> Fragment | None:
-            nonlocal seen
-            finished = match.match_fragment(after, start_index)
-            if finished and (not to_end or finished.valid_end):
-                return Fragment.from_([
-                    cast("Node", tp.create_and_fill()) for tp in types
-                ])
-            for i in match.next:
-                type = i.type
-                next = i.next
+    def fill_paths(self, first: Optional["NodeType"]) -> list[FillPath]:
+        """
+        The states that `fill_before` can reach from this one by inserting
+        generatable nodes, with the types of those nodes, in the order it
+        tries them. Only includes states that accept `first`, or, when it
+        is `None`, that end the content.
+        """
+        if not self.next:
+            # Not cached, since the empty match is shared between schemas.
+            return [FillPath(self, ())] if first is None and self.valid_end else []
+        paths = self.fill_cache.get(first)
+        if paths is None:
+            if first is None:
+                paths = [path for path in self.fill_order() if path.match.valid_end]
+            else:
+                paths = [
+                    path for path in self.fill_order() if path.match.match_type(first)
+                ]
+            self.fill_cache[first] = paths
+        return paths
+
+    def fill_order(self) -> list[FillPath]:
+        seen: set[ContentMatch] = {self}
+        order: list[FillPath] = []
+
+        def search(match: ContentMatch, types: tuple["NodeType", ...]) -> None:
+            order.append(FillPath(match, types))
+            for edge in match.next:
+                type = edge.type
+                next = edge.next
                 if not (type.is_text or type.has_required_attrs()) and next not in seen:
-                    seen.append(next)
-                    found = search(next, [*types, type])
-                    if found:
-                        return found
-            return None
+                    seen.add(next)
+                    search(next, (*types, type))
 
-        return search(self, [])
+        search(self, ())
+        return order
 
     def find_wrapping(self, target: "NodeType") -> list["NodeType"] | None:
-        for entry in self.wrap_cache:
-            if entry.target.name == target.name:
-                return entry.computed
-        computed = self.compute_wrapping(target)
-        self.wrap_cache.append(WrapCacheEntry(target, computed))
-        return computed
+        if not self.next:
+            return None
+        try:
+            return self.wrap_cache[target]
+        except KeyError:
+            computed = self.wrap_cache[target] = self.compute_wrapping(target)
+            return computed
 
     def compute_wrapping(self, target: "NodeType") -> list["NodeType"] | None:
         seen = {}
@@ -171,6 +288,19 @@ class ContentMatch:
                     seen[type.name] = True
         return None
 
+    def states(self) -> list["ContentMatch"]:
+        """
+        All states reachable from this one, including itself.
+        """
+        seen: list[ContentMatch] = [self]
+        i = 0
+        while i < len(seen):
+            for edge in seen[i].next:
+                if edge.next not in seen:
+                    seen.append(edge.next)
+            i += 1
+        return seen
+
     @property
     def edge_count(self) -> int:
         return len(self.next)
@@ -469,6 +599,88 @@ def nfa(
     return nfa_
 
 
+# A content match and the states reachable from it (see `to_table`).
+ContentTable = list[tuple[bool, list[tuple[str, int]]]]
+
+# Compiled content expressions by `content_key`, shared by all schemas in
+# the process. `None` stands for the empty match.
+compiled_content: dict[str, ContentTable | None] = {}
+
+# The format of the files written by `dump_compiled_content`. Bump it when
+# the layout of `ContentTable` or the compiled automata change, so that
+# files saved by other versions of the library are ignored.
+COMPILED_CONTENT_VERSION = 1
+
+
+def node_types_key(node_types: dict[str, "NodeType"]) -> str:
+    """
+    A digest of the properties of `node_types` that compiling a content
+    expression depends on.
+    """
+    layout: list[JSON] = [
+        [
+            name,
+            cast(JSON, type.groups),
+            type.is_inline,
+            type.is_text or type.has_required_attrs(),
+        ]
+        for name, type in node_types.items()
+    ]
+    return blake2b(dumps(layout), digest_size=16).hexdigest()
+
+
+def content_key(string: str, types_key: str) -> str:
+    return blake2b(f"{types_key} {string}".encode(), digest_size=16).hexdigest()
+
+
+def compile_content(
+    string: str, node_types: dict[str, "NodeType"], types_key: str
+) -> ContentMatch:
+    """
+    Parse a content expression, or build it from the compiled form left
+    by an earlier schema with the same expression and equivalent node
+    types (as identified by `types_key`, see `node_types_key`).
+    """
+    key = content_key(string, types_key)
+    try:
+        table = compiled_content[key]
+    except KeyError:
+        match = ContentMatch.parse(string, node_types)
+        compiled_content[key] = (
+            None if match is ContentMatch.empty else match.to_table()
+        )
+        return match
+    if table is None:
+        return ContentMatch.empty
+    return ContentMatch.from_table(table, node_types)
+
+
+def dump_compiled_content(path: str | os.PathLike[str]) -> None:
+    """
+    Save the content expressions compiled in this process to a file, so
+    that other processes can load them with `load_compiled_content`
+    instead of compiling them again.
+    """
+    data = {"version": COMPILED_CONTENT_VERSION, "tables": compiled_content}
+    with open(path, "wb") as file:
+        file.write(dumps(cast(Any, data)))
+
+
+def load_compiled_content(path: str | os.PathLike[str]) -> None:
+    """
+    Load content expressions saved by `dump_compiled_content`. Schemas
+    created afterwards use them for the expressions and node types they
+    were compiled for, and compile the others as usual. Files saved by a
+    version of the library with a different format are ignored.
+    """
+    with open(path, "rb") as file:
+        data = loads(file.read())
+    if not isinstance(data, dict) or data.get("version") != COMPILED_CONTENT_VERSION:
+        return
+    for key, table in cast(dict[str, Any], data["tables"]).items():
+        compiled_content.setdefault(key, table)
+
+
 def cmp(a: int, b: int) -> int:
     return b - a
 
@@ -501,6 +713,7 @@ class DFAState(NamedTuple):
 
 def dfa(nfa: list[list[Edge]]) -> ContentMatch:
     labeled = {}
+    null_sets: dict[int, list[int]] = {}
 
     def explore(states: list[int]) -> ContentMatch:
         nonlocal labeled
@@ -514,7 +727,11 @@ def dfa(nfa: list[list[Edge]]) -> ContentMatch:
                 for t in out:
                     if t[0] == term:
                         set = t[1]
-                for n in null_from(nfa, cast(int, to)):
+                to = cast(int, to)
+                null_set = null_sets.get(to)
+                if null_set is None:
+                    null_set = null_sets[to] = null_from(nfa, to)
+                for n in null_set:
                     if set is None:
                         set = []
                         out.append(DFAState(term, set))
@@ -526,14 +743,51 @@ def dfa(nfa: list[list[Edge]]) -> ContentMatch:
             out[i][1].sort(key=cmp_to_key(cmp))
             states = out[i][1]
             find_by_key = ",".join(str(s) for s in states)
-            state.next.append(
-                MatchEdge(out[i][0], labeled.get(find_by_key) or explore(states)),
-            )
+            state.add_edge(out[i][0], labeled.get(find_by_key) or explore(states))
         return state
 
     return explore(null_from(nfa, 0))
 
 
+def minimize(match: ContentMatch) -> ContentMatch:
+    """
+    Merge the states of a DFA that can't be told apart: those that end
+    validly in the same cases and have edges for the same node types, in
+    the same order, to states that can't be told apart either.
+    """
+    states = match.states()
+    index = {state: i for i, state in enumerate(states)}
+    signatures: list[Any] = [
+        (state.valid_end, tuple(edge.type for edge in state.next)) for state in states
+    ]
+    count = 0
+    while True:
+        blocks: dict[Any, int] = {}
+        block_of = [blocks.setdefault(sig, len(blocks)) for sig in signatures]
+        if len(blocks) == count:
+            break
+        count = len(blocks)
+        signatures = [
+            (block_of[i], tuple(block_of[index[edge.next]] for edge in state.next))
+            for i, state in enumerate(states)
+        ]
+    if count == len(states):
+        return match
+    merged: list[ContentMatch | None] = [None] * count
+    for state, block in zip(states, block_of, strict=True):
+        if merged[block] is None:
+            merged[block] = ContentMatch(state.valid_end)
+    for state, block in zip(states, block_of, strict=True):
+        target = cast(ContentMatch, merged[block])
+        if target.next:
+            continue
+        for edge in state.next:
+            target.add_edge(
+                edge.type, cast(ContentMatch, merged[block_of[index[edge.next]]])
+            )
+    return cast(ContentMatch, merged[0])
+
+
 def check_for_dead_ends(match: ContentMatch, stream: TokenStream) -> None:
     work = [match]
     i = 0
@@ -1,7 +1,5 @@
 from typing import TYPE_CHECKING, TypedDict
 
-from prosemirror.utils import text_length
-
 from . import node as pm_node
 
 if TYPE_CHECKING:
@@ -14,13 +12,25 @@ class Diff(TypedDict):
 
 
 def find_diff_start(a: "Fragment", b: "Fragment", pos: int) -> int | None:
+    # Fragments to resume comparing after a descent into equal parents.
+    stack: list[tuple[Fragment, Fragment, int, int]] = []
     i = 0
     while True:
         if a.child_count == i or b.child_count == i:
-            return None if a.child_count == b.child_count else pos
+            if a.child_count != b.child_count:
+                return pos
+            if not stack:
+                return None
+            a, b, i, pos = stack.pop()
+            continue
         child_a, child_b = a.child(i), b.child(i)
-        if child_a == child_b:
+        # Children are known to be equal when they are the same node, or
+        # when both already have a cached digest and the digests match.
+        if child_a is child_b or (
+            child_a._digest is not None and child_a._digest == child_b._digest
+        ):
             pos += child_a.node_size
+            i += 1
             continue
         if not child_a.same_markup(child_b):
             return pos
@@ -29,9 +39,9 @@ def find_diff_start(a: "Fragment", b: "Fragment", pos: int) -> int | None:
             assert isinstance(child_b, pm_node.TextNode)
             if child_a.text != child_b.text:
                 if child_b.text.startswith(child_a.text):
-                    return pos + text_length(child_a.text)
+                    return pos + child_a.node_size
                 if child_a.text.startswith(child_b.text):
-                    return pos + text_length(child_b.text)
+                    return pos + child_b.node_size
                 next_index = next(
                     (
                         index_a
@@ -47,26 +57,31 @@ def find_diff_start(a: "Fragment", b: "Fragment", pos: int) -> int | None:
                 if next_index is not None:
                     return pos + next_index
         if child_a.content.size or child_b.content.size:
-            inner = find_diff_start(child_a.content, child_b.content, pos + 1)
-            if inner:
-                return inner
+            stack.append((a, b, i + 1, pos + child_a.node_size))
+            a, b, i, pos = child_a.content, child_b.content, 0, pos + 1
+            continue
         pos += child_a.node_size
         i += 1
 
 
 def find_diff_end(a: "Fragment", b: "Fragment", pos_a: int, pos_b: int) -> Diff | None:
+    stack: list[tuple[Fragment, Fragment, int, int, int, int]] = []
     i_a, i_b = a.child_count, b.child_count
     while True:
         if i_a == 0 or i_b == 0:
-            if i_a == i_b:
-                return None
-            else:
+            if i_a != i_b:
                 return {"a": pos_a, "b": pos_b}
+            if not stack:
+                return None
+            a, b, i_a, i_b, pos_a, pos_b = stack.pop()
+            continue
         i_a -= 1
         i_b -= 1
         child_a, child_b = a.child(i_a), b.child(i_b)
         size = child_a.node_size
-        if child_a == child_b:
+        if child_a is child_b or (
+            child_a._digest is not None and child_a._digest == child_b._digest
+        ):
             pos_a -= size
             pos_b -= size
             continue
@@ -78,14 +93,12 @@ def find_diff_end(a: "Fragment", b: "Fragment", pos_a: int, pos_b: int) -> Diff
             assert isinstance(child_a, pm_node.TextNode)
             assert isinstance(child_b, pm_node.TextNode)
             if child_a.text != child_b.text:
-                same, min_size = (
-                    0,
-                    min(text_length(child_a.text), text_length(child_b.text)),
-                )
+                size_a, size_b = child_a.node_size, child_b.node_size
+                same, min_size = 0, min(size_a, size_b)
                 while (
                     same < min_size
-                    and child_a.text[text_length(child_a.text) - same - 1]
-                    == child_b.text[text_length(child_b.text) - same - 1]
+                    and child_a.text[size_a - same - 1]
+                    == child_b.text[size_b - same - 1]
                 ):
                     same += 1
                     pos_a -= 1
@@ -93,14 +106,12 @@ def find_diff_end(a: "Fragment", b: "Fragment", pos_a: int, pos_b: int) -> Diff
                 return {"a": pos_a, "b": pos_b}
 
         if child_a.content.size or child_b.content.size:
-            inner = find_diff_end(
-                child_a.content,
-                child_b.content,
-                pos_a - 1,
-                pos_b - 1,
-            )
-            if inner:
-                return inner
+            stack.append((a, b, i_a, i_b, pos_a - size, pos_b - size))
+            a, b = child_a.content, child_b.content
+            i_a, i_b = a.child_count, b.child_count
+            pos_a -= 1
+            pos_b -= 1
+            continue
 
         pos_a -= size
         pos_b -= size
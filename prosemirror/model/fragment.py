@@ -1,4 +1,7 @@
-from collections.abc import Callable, Iterable, Sequence
+from bisect import bisect_right
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from hashlib import blake2b
+from itertools import accumulate
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -8,7 +11,10 @@ from typing import (
     cast,
 )
 
-from prosemirror.utils import JSON, JSONDict, JSONList, text_length
+from prosemirror.codec import RawJSON, loads
+from prosemirror.utils import JSON, JSONDict, JSONList
+
+from .rope import Rope
 
 if TYPE_CHECKING:
     from prosemirror.model.schema import Schema
@@ -22,13 +28,63 @@ def ret_index(index: int, offset: int) -> dict[str, int]:
 
 
 class Fragment:
+    __slots__ = ("_digest", "_offsets", "content", "size")
+
     empty: ClassVar["Fragment"]
-    content: list["Node"]
+    # Fragments with at least this many children store them in a `Rope`
+    # instead of a list, which makes replacing, inserting and
+    # concatenating children logarithmic instead of linear. Disabled
+    # (`None`) by default.
+    rope_threshold: ClassVar[int | None] = None
+    content: Sequence["Node"]
     size: int
 
-    def __init__(self, content: list["Node"], size: int | None = None) -> None:
+    def __init__(self, content: Sequence["Node"], size: int | None = None) -> None:
+        threshold = Fragment.rope_threshold
+        if isinstance(content, Rope):
+            if threshold is not None and len(content) < threshold:
+                content = tuple(content)
+        elif threshold is not None and len(content) >= threshold:
+            content = Rope.from_nodes(content)
+        elif not isinstance(content, tuple):
+            content = tuple(content)
         self.content = content
-        self.size = size if size is not None else sum(c.node_size for c in content)
+        if size is None:
+            if isinstance(content, Rope):
+                size = content.size
+            else:
+                size = sum(c.node_size for c in content)
+        self.size = size
+        self._offsets: list[int] | None = None
+        self._digest: bytes | None = None
+
+    def __getattr__(self, name: str) -> object:
+        # Only reached for unset slots. Fragments that decode their
+        # children on demand (see `binary.LazyFragment`) leave `content`
+        # unset until `_materialize` fills it in.
+        if name == "content":
+            self._materialize()
+            return self.content
+        msg = f"{type(self).__name__!r} object has no attribute {name!r}"
+        raise AttributeError(msg)
+
+    def _materialize(self) -> None:
+        msg = "Fragment content is not set"
+        raise AttributeError(msg)
+
+    def __copy__(self) -> "Fragment":
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "Fragment":
+        return self
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        if not self.content:
+            return (getattr, (Fragment, "empty"))
+        from .binary import decode_fragment, encode_fragment
+
+        schema = self.content[0].type.schema
+        return (decode_fragment, (schema, encode_fragment(self)))
 
     def nodes_between(
         self,
@@ -38,25 +94,26 @@ class Fragment:
         node_start: int = 0,
         parent: Optional["Node"] = None,
     ) -> None:
-        i = 0
-        pos = 0
-        while pos < to:
-            child = self.content[i]
-            end = pos + child.node_size
-            if (
-                end > from_
-                and f(child, node_start + pos, parent, i) is not False
-                and getattr(child.content, "size", None)
-            ):
-                start = pos + 1
-                child.nodes_between(
-                    max(0, from_ - start),
-                    min(child.content.size, to - start),
-                    f,
-                    node_start + start,
-                )
-            pos = end
-            i += 1
+        walker = NodeWalker(self, from_, to, node_start, parent)
+        for node, pos, node_parent, index in walker:
+            if f(node, pos, node_parent, index) is False:
+                walker.skip_children()
+
+    def iter_between(
+        self,
+        from_: int,
+        to: int,
+        node_start: int = 0,
+        parent: Optional["Node"] = None,
+    ) -> "NodeWalker":
+        """
+        Iterate over the nodes between the given positions, yielding
+        `(node, pos, parent, index)` tuples in the same order in which
+        `nodes_between` calls its callback. Stopping the iteration stops
+        the traversal, and calling `skip_children` on the returned
+        walker prevents it from descending into the last yielded node.
+        """
+        return NodeWalker(self, from_, to, node_start, parent)
 
     def descendants(
         self,
@@ -64,6 +121,9 @@ class Fragment:
     ) -> None:
         self.nodes_between(0, self.size, f)
 
+    def iter_descendants(self) -> "NodeWalker":
+        return NodeWalker(self, 0, self.size)
+
     def text_between(
         self,
         from_: int,
@@ -73,30 +133,21 @@ class Fragment:
     ) -> str:
         text = []
         separated = True
-
-        def iteratee(
-            node: "Node",
-            pos: int,
-            _parent: Optional["Node"],
-            _to: int,
-        ) -> None:
-            nonlocal text
-            nonlocal separated
-            if node.is_text:
+        for node, pos, _, _ in NodeWalker(self, from_, to):
+            type = node.type
+            if type.is_text:
                 text_node = cast("TextNode", node)
                 text.append(text_node.text[max(from_, pos) - pos : to - pos])
                 separated = not block_separator
-            elif node.is_leaf:
+            elif type.is_leaf:
                 if leaf_text:
                     text.append(leaf_text(node) if callable(leaf_text) else leaf_text)
-                elif (node_leaf_text := node.type.spec.get("leafText")) is not None:
+                elif (node_leaf_text := type.spec.get("leafText")) is not None:
                     text.append(node_leaf_text(node))
                 separated = not block_separator
-            elif not separated and node.is_block:
+            elif not separated and type.is_block:
                 text.append(block_separator)
                 separated = True
-
-        self.nodes_between(from_, to, iteratee, 0)
         return "".join(text)
 
     def append(self, other: "Fragment") -> "Fragment":
@@ -104,21 +155,26 @@ class Fragment:
             return self
         if not self.size:
             return other
-        last, first, content, i = (
-            self.last_child,
-            other.first_child,
-            self.content.copy(),
-            0,
-        )
+        last, first, content = self.last_child, other.first_child, self.content
         assert last is not None
         assert first is not None
+        if isinstance(content, Rope) or isinstance(other.content, Rope):
+            start = Rope.from_nodes(content)
+            end = Rope.from_nodes(other.content)
+            if pm_node.is_text(last) and last.same_markup(first):
+                assert isinstance(first, pm_node.TextNode)
+                start = start.set(-1, last.with_text(last.text + first.text))
+                end = end.slice(1, len(end))
+            return Fragment(Rope.join(start, end), self.size + other.size)
         if pm_node.is_text(last) and last.same_markup(first):
             assert isinstance(first, pm_node.TextNode)
-            content[len(content) - 1] = last.with_text(last.text + first.text)
-            i = 1
-        while i < len(other.content):
-            content.append(other.content[i])
-            i += 1
+            content = (
+                *content[:-1],
+                last.with_text(last.text + first.text),
+                *other.content[1:],
+            )
+        else:
+            content = (*content, *other.content)
         return Fragment(content, self.size + other.size)
 
     def cut(self, from_: int, to: int | None = None) -> "Fragment":
@@ -130,7 +186,11 @@ class Fragment:
         size = 0
         if to <= from_:
             return Fragment(result, size)
+        if isinstance(self.content, Rope):
+            return self.cut_rope(from_, to)
         i, pos = 0, 0
+        if from_ > 0 and from_ < self.size:
+            i, pos = self.child_at(from_)
         while pos < to:
             child = self.content[i]
             end = pos + child.node_size
@@ -139,7 +199,7 @@ class Fragment:
                     if pm_node.is_text(child):
                         child = child.cut(
                             max(0, from_ - pos),
-                            min(text_length(child.text), to - pos),
+                            min(child.node_size, to - pos),
                         )
                     else:
                         child = child.cut(
@@ -152,6 +212,24 @@ class Fragment:
             i += 1
         return Fragment(result, size)
 
+    def cut_rope(self, from_: int, to: int) -> "Fragment":
+        content = cast(Rope, self.content)
+        first, first_start = content.find(from_)
+        last, last_start = content.find(to - 1)
+        head = cut_child(content[first], first_start, from_, to)
+        if first == last:
+            return Fragment([head], head.node_size)
+        first_end = first_start + content[first].node_size
+        tail = cut_child(content[last], last_start, from_, to)
+        rope = Rope.join(
+            Rope.join(Rope.leaf((head,)), content.slice(first + 1, last)),
+            Rope.leaf((tail,)),
+        )
+        return Fragment(
+            rope,
+            head.node_size + last_start - first_end + tail.node_size,
+        )
+
     def cut_by_index(self, from_: int, to: int | None = None) -> "Fragment":
         if from_ == to:
             return Fragment.empty
@@ -163,20 +241,31 @@ class Fragment:
         current = self.content[index]
         if current == node:
             return self
-        copy = self.content.copy()
         size = self.size + node.node_size - current.node_size
-        copy[index] = node
-        return Fragment(copy, size)
+        if isinstance(self.content, Rope):
+            return Fragment(self.content.set(index, node), size)
+        return Fragment((*self.content[:index], node, *self.content[index + 1 :]), size)
 
     def add_to_start(self, node: "Node") -> "Fragment":
-        return Fragment([node, *self.content], self.size + node.node_size)
+        if isinstance(self.content, Rope):
+            return Fragment(self.content.insert(0, node), self.size + node.node_size)
+        return Fragment((node, *self.content), self.size + node.node_size)
 
     def add_to_end(self, node: "Node") -> "Fragment":
-        return Fragment([*self.content, node], self.size + node.node_size)
+        if isinstance(self.content, Rope):
+            content = self.content.insert(len(self.content), node)
+            return Fragment(content, self.size + node.node_size)
+        return Fragment((*self.content, node), self.size + node.node_size)
 
     def eq(self, other: "Fragment") -> bool:
         if len(self.content) != len(other.content):
             return False
+        if (
+            self._digest is not None
+            and other._digest is not None
+            and self._digest != other._digest
+        ):
+            return False
         return all(a.eq(b) for (a, b) in zip(self.content, other.content, strict=True))
 
     @property
@@ -201,13 +290,10 @@ class Fragment:
             return None
 
     def for_each(self, f: Callable[["Node", int, int], Any]) -> None:
-        i = 0
         p = 0
-        while i < len(self.content):
-            child = self.content[i]
+        for i, child in enumerate(self.content):
             f(child, p, i)
             p += child.node_size
-            i += 1
 
     def find_diff_start(self, other: "Fragment", pos: int = 0) -> int | None:
         from .diff import find_diff_start
@@ -228,25 +314,79 @@ class Fragment:
             other_pos = other.size
         return find_diff_end(self, other, pos, other_pos)
 
-    def find_index(self, pos: int, round: int = -1) -> dict[str, int]:
+    @property
+    def digest(self) -> bytes:
+        """
+        A structural digest of the fragment, combining the
+        [digests](#model.Node.digest) of its children. Computed on first
+        use and cached.
+        """
+        digest = self._digest
+        if digest is None:
+            h = blake2b(digest_size=16)
+            for child in self.content:
+                h.update(child.digest)
+            digest = self._digest = h.digest()
+        return digest
+
+    @property
+    def structural_hash(self) -> int:
+        return int.from_bytes(self.digest[:8], "little", signed=True)
+
+    @property
+    def fingerprint(self) -> str:
+        return self.digest.hex()
+
+    def child_offsets(self) -> list[int]:
+        """
+        The start position of every child, followed by the size of the
+        fragment. Computed on first use and cached, since fragments are
+        immutable.
+        """
+        offsets = self._offsets
+        if offsets is None:
+            offsets = [0, *accumulate(child.node_size for child in self.content)]
+            self._offsets = offsets
+        return offsets
+
+    def child_offset(self, index: int) -> int:
+        if isinstance(self.content, Rope):
+            return self.content.offset_of(index)
+        return self.child_offsets()[index]
+
+    def child_at(self, pos: int) -> tuple[int, int]:
+        """
+        The index and start position of the child that covers `pos`, which
+        must lie inside the fragment (`0 <= pos < size`).
+        """
+        if isinstance(self.content, Rope):
+            return self.content.find(pos)
+        offsets = self.child_offsets()
+        i = bisect_right(offsets, pos) - 1
+        return i, offsets[i]
+
+    def locate(self, pos: int, round: int = -1) -> tuple[int, int]:
+        """
+        Like `find_index`, but returns an `(index, offset)` tuple. Uses a
+        binary search over the cached child offsets, so it runs in
+        logarithmic time in the number of children.
+        """
         if pos == 0:
-            return ret_index(0, pos)
+            return 0, pos
         if pos == self.size:
-            return ret_index(len(self.content), pos)
+            return len(self.content), pos
         if pos > self.size or pos < 0:
             msg = f"Position {pos} outside of fragment ({self})"
             raise ValueError(msg)
-        i = 0
-        cur_pos = 0
-        while True:
-            cur = self.child(i)
-            end = cur_pos + cur.node_size
-            if end >= pos:
-                if end == pos or round > 0:
-                    return ret_index(i + 1, end)
-                return ret_index(i, cur_pos)
-            i += 1
-            cur_pos = end
+        i, start = self.child_at(pos)
+        if start == pos:
+            return i, start
+        if round > 0:
+            return i + 1, start + self.content[i].node_size
+        return i, start
+
+    def find_index(self, pos: int, round: int = -1) -> dict[str, int]:
+        return ret_index(*self.locate(pos, round))
 
     def to_json(self) -> JSONList | None:
         if self.content:
@@ -254,19 +394,27 @@ class Fragment:
         return None
 
     @classmethod
-    def from_json(cls, schema: "Schema[Any, Any]", value: JSON) -> "Fragment":
+    def from_json(
+        cls,
+        schema: "Schema[Any, Any]",
+        value: JSON | RawJSON,
+        trusted: bool = False,
+    ) -> "Fragment":
         if not value:
             return cls.empty
 
-        if isinstance(value, str):
-            import json
-
-            value = json.loads(value)
+        if isinstance(value, RawJSON):
+            value = loads(value)
 
         if not isinstance(value, list):
             msg = "Invalid input for Fragment.from_json"
             raise ValueError(msg)
 
+        if trusted:
+            return cls([
+                pm_node.node_from_trusted_json(schema, cast(JSONDict, item))
+                for item in value
+            ])
         return cls([schema.node_from_json(cast(JSONDict, item)) for item in value])
 
     @classmethod
@@ -314,6 +462,102 @@ class Fragment:
         return f"<{self.__class__.__name__} {self.__str__()}>"
 
 
+class NodeWalker:
+    """
+    Iterator returned by [`iter_between`](#model.Fragment.iter_between).
+    Walks the tree with an explicit stack, so it does not recurse, and
+    can be abandoned at any point.
+    """
+
+    __slots__ = ("_iter", "_skip")
+
+    def __init__(
+        self,
+        fragment: Fragment,
+        from_: int,
+        to: int,
+        node_start: int = 0,
+        parent: Optional["Node"] = None,
+    ) -> None:
+        self._skip = False
+        self._iter = self._walk(fragment, from_, to, node_start, parent)
+
+    def skip_children(self) -> None:
+        """
+        Don't descend into the node that was yielded last.
+        """
+        self._skip = True
+
+    def __iter__(self) -> Iterator[tuple["Node", int, Optional["Node"], int]]:
+        return self._iter
+
+    def __next__(self) -> tuple["Node", int, Optional["Node"], int]:
+        return next(self._iter)
+
+    def _walk(
+        self,
+        fragment: Fragment,
+        from_: int,
+        to: int,
+        node_start: int,
+        parent: Optional["Node"],
+    ) -> Iterator[tuple["Node", int, Optional["Node"], int]]:
+        stack: list[tuple[Sequence[Node], int, int, int, Node | None, int, int]] = []
+        content = fragment.content
+        i = pos = 0
+        if from_ > 0 and from_ < fragment.size:
+            i, pos = fragment.child_at(from_)
+        while True:
+            if pos < to:
+                child = content[i]
+                end = pos + child.node_size
+                if end > from_:
+                    self._skip = False
+                    yield child, node_start + pos, parent, i
+                    inner = child.content
+                    if not self._skip and inner.size:
+                        stack.append((
+                            content,
+                            from_,
+                            to,
+                            node_start,
+                            parent,
+                            i + 1,
+                            end,
+                        ))
+                        start = pos + 1
+                        from_ = max(0, from_ - start)
+                        to = min(inner.size, to - start)
+                        node_start += start
+                        parent = child
+                        content = inner.content
+                        i = pos = 0
+                        if from_ > 0 and from_ < inner.size:
+                            i, pos = inner.child_at(from_)
+                        continue
+                pos = end
+                i += 1
+            elif stack:
+                content, from_, to, node_start, parent, i, pos = stack.pop()
+            else:
+                return
+
+
+def cut_child(child: "Node", pos: int, from_: int, to: int) -> "Node":
+    end = pos + child.node_size
+    if pos < from_ or end > to:
+        if pm_node.is_text(child):
+            return child.cut(
+                max(0, from_ - pos),
+                min(child.node_size, to - pos),
+            )
+        return child.cut(
+            max(0, from_ - pos - 1),
+            min(child.content.size, to - pos - 1),
+        )
+    return child
+
+
 Fragment.empty = Fragment([], 0)
 
 from . import node as pm_node  # noqa: E402
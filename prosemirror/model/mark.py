@@ -1,19 +1,32 @@
 import copy
 from typing import TYPE_CHECKING, Any, Final, Union, cast
 
-from prosemirror.utils import Attrs, JSONDict
+from prosemirror.utils import Attrs, FrozenDict, JSONDict
+
+from .blob import attrs_json
 
 if TYPE_CHECKING:
     from .schema import MarkType, Schema
 
 
 class Mark:
+    __slots__ = ("__weakref__", "attrs", "type")
+
     none: Final[list["Mark"]] = []
 
     def __init__(self, type: "MarkType", attrs: Attrs) -> None:
         self.type = type
         self.attrs = attrs
 
+    def __copy__(self) -> "Mark":
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "Mark":
+        return self
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (self.type.create_trusted, (self.attrs,))
+
     def add_to_set(self, set: list["Mark"]) -> list["Mark"]:
         copy: list[Mark] | None = None
         placed = False
@@ -47,18 +60,26 @@ class Mark:
         return any(item.eq(self) for item in set)
 
     def eq(self, other: "Mark") -> bool:
-        if self == other:
+        if self is other:
             return True
-        return self.type.name == other.type.name and self.attrs == other.attrs
+        return (self.type is other.type or self.type.name == other.type.name) and (
+            self.attrs is other.attrs or self.attrs == other.attrs
+        )
 
     def to_json(self) -> JSONDict:
-        return {"type": self.type.name, "attrs": copy.deepcopy(self.attrs)}
+        attrs = self.attrs
+        if self.type.blob_attrs:
+            attrs = attrs_json(attrs)
+        elif not isinstance(attrs, FrozenDict):
+            attrs = copy.deepcopy(attrs)
+        return {"type": self.type.name, "attrs": attrs}
 
     @classmethod
     def from_json(
         cls,
         schema: "Schema[Any, Any]",
         json_data: JSONDict,
+        trusted: bool = False,
     ) -> "Mark":
         if not json_data:
             msg = "Invalid input for Mark.fromJSON"
@@ -68,7 +89,10 @@ class Mark:
         if not type:
             msg = f"There is no mark type {name} in this schema"
             raise ValueError(msg)
-        return type.create(cast(JSONDict | None, json_data.get("attrs")))
+        attrs = cast(JSONDict | None, json_data.get("attrs"))
+        if trusted:
+            return type.create_trusted(attrs)
+        return type.create(attrs)
 
     @classmethod
     def same_set(cls, a: list["Mark"], b: list["Mark"]) -> bool:
@@ -78,6 +102,17 @@ class Mark:
             return False
         return all(item_a.eq(item_b) for (item_a, item_b) in zip(a, b, strict=True))
 
+    @classmethod
+    def set_mask(cls, marks: list["Mark"]) -> int:
+        """
+        An integer with the [bit](#model.MarkType.bit) of every mark type
+        in the set. Two sets with different masks can never be equal.
+        """
+        mask = 0
+        for mark in marks:
+            mask |= mark.type.bit
+        return mask
+
     @classmethod
     def set_from(cls, marks: Union[list["Mark"], "Mark", None]) -> list["Mark"]:
         if not marks:
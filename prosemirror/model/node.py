@@ -1,14 +1,26 @@
 import copy
 from collections.abc import Callable
+from hashlib import blake2b
 from typing import TYPE_CHECKING, Any, Optional, TypedDict, TypeGuard, Union, cast
 
-from prosemirror.utils import Attrs, JSONDict, text_length
-
-from .comparedeep import compare_deep
-from .fragment import Fragment
+from prosemirror.codec import RawJSON, dumps, loads
+from prosemirror.utils import (
+    JSON,
+    Attrs,
+    FrozenDict,
+    JSONDict,
+    JSONList,
+    surrogate_offsets,
+    text_length,
+    utf16_to_index,
+)
+
+from .blob import attrs_json
+from .comparedeep import canonical, compare_deep
+from .fragment import Fragment, NodeWalker
 from .mark import Mark
 from .replace import Slice, replace
-from .resolvedpos import ResolvedPos
+from .resolvedpos import CacheEntry, ResolvedPos
 
 if TYPE_CHECKING:
     from .content import ContentMatch
@@ -25,6 +37,21 @@ class ChildInfo(TypedDict):
 
 
 class Node:
+    __slots__ = (
+        "__weakref__",
+        "_digest",
+        "attrs",
+        "content",
+        "mark_mask",
+        "marks",
+        "resolve_cache",
+        "type",
+    )
+
+    # The [mask](#model.Mark.set_mask) of this node's marks.
+    mark_mask: int
+    resolve_cache: list[CacheEntry] | None
+
     def __init__(
         self,
         type: "NodeType",
@@ -36,10 +63,26 @@ class Node:
         self.attrs = attrs
         self.content = content or Fragment.empty
         self.marks = marks or Mark.none
+        self.mark_mask = Mark.set_mask(marks) if marks else 0
+        self.resolve_cache = None
+        self._digest: bytes | None = None
+
+    # Nodes are immutable, so copies can share them.
+    def __copy__(self) -> "Node":
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "Node":
+        return self
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Pickle as the binary encoding, with a registered schema.
+        from .binary import decode_node, encode_node
+
+        return (decode_node, (self.type.schema, encode_node(self)))
 
     @property
     def node_size(self) -> int:
-        return 1 if self.is_leaf else 2 + self.content.size
+        return 1 if self.type.is_leaf else 2 + self.content.size
 
     @property
     def child_count(self) -> int:
@@ -63,12 +106,23 @@ class Node:
     ) -> None:
         self.content.nodes_between(from_, to, f, start_pos, self)
 
+    def iter_between(
+        self,
+        from_: int,
+        to: int,
+        start_pos: int = 0,
+    ) -> NodeWalker:
+        return self.content.iter_between(from_, to, start_pos, self)
+
     def descendants(
         self,
         f: Callable[["Node", int, Optional["Node"], int], bool | None],
     ) -> None:
         self.nodes_between(0, self.content.size, f)
 
+    def iter_descendants(self) -> NodeWalker:
+        return self.iter_between(0, self.content.size)
+
     @property
     def text_content(self) -> str:
         if (
@@ -96,11 +150,59 @@ class Node:
         return self.content.last_child
 
     def eq(self, other: "Node") -> bool:
-        return self == other or (
-            self.same_markup(other) and self.content.eq(other.content)
-        )
+        if self is other:
+            return True
+        if (
+            self._digest is not None
+            and other._digest is not None
+            and self._digest != other._digest
+        ):
+            return False
+        return self.same_markup(other) and self.content.eq(other.content)
+
+    def markup_key(self) -> str:
+        return canonical([
+            self.type.name,
+            self.attrs,
+            [[mark.type.name, mark.attrs] for mark in self.marks],
+        ])
+
+    @property
+    def digest(self) -> bytes:
+        """
+        A 16-byte structural (Merkle) digest of this node, covering its
+        type, attributes, marks and content. Nodes that are
+        [equal](#model.Node.eq) have the same digest. Computed on first
+        use and cached, so unchanged subtrees shared between document
+        versions are only hashed once.
+        """
+        digest = self._digest
+        if digest is None:
+            h = blake2b(self.markup_key().encode(), digest_size=16)
+            h.update(self.content.digest)
+            digest = self._digest = h.digest()
+        return digest
+
+    @property
+    def structural_hash(self) -> int:
+        """
+        An integer hash of the node's structure, derived from `digest`.
+        Unlike `hash(node)`, which is based on identity, it is equal for
+        equal nodes.
+        """
+        return int.from_bytes(self.digest[:8], "little", signed=True)
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        The hex form of `digest`. Stable across processes and versions of
+        the library, so it can be stored alongside persisted documents.
+        """
+        return self.digest.hex()
 
     def same_markup(self, other: "Node") -> bool:
+        if self.mark_mask != other.mark_mask and self.type.schema is other.type.schema:
+            return False
         return self.has_markup(other.type, other.attrs, other.marks)
 
     def has_markup(
@@ -109,8 +211,13 @@ class Node:
         attrs: Optional["Attrs"] = None,
         marks: list[Mark] | None = None,
     ) -> bool:
+        if attrs and type.blob_attrs:
+            from .schema import store_blobs
+
+            # Blob attributes only compare equal to blobs.
+            attrs = store_blobs(type, dict(attrs))
         return (
-            self.type.name == type.name
+            (self.type is type or self.type.name == type.name)
             and (compare_deep(self.attrs, attrs or type.default_attrs or empty_attrs))
             and (Mark.same_set(self.marks, marks or Mark.none))
         )
@@ -154,8 +261,7 @@ class Node:
     def node_at(self, pos: int) -> Optional["Node"]:
         node = self
         while True:
-            index_info = node.content.find_index(pos)
-            index, offset = index_info["index"], index_info["offset"]
+            index, offset = node.content.locate(pos)
             next_node = node.maybe_child(index)
             if not next_node:
                 return None
@@ -165,8 +271,7 @@ class Node:
             pos -= offset + 1
 
     def child_after(self, pos: int) -> ChildInfo:
-        index_info = self.content.find_index(pos)
-        index, offset = index_info["index"], index_info["offset"]
+        index, offset = self.content.locate(pos)
         return {
             "node": self.content.maybe_child(index),
             "index": index,
@@ -176,8 +281,7 @@ class Node:
     def child_before(self, pos: int) -> ChildInfo:
         if pos == 0:
             return {"node": None, "index": 0, "offset": 0}
-        index_info = self.content.find_index(pos)
-        index, offset = index_info["index"], index_info["offset"]
+        index, offset = self.content.locate(pos)
         if offset < pos:
             return {"node": self.content.child(index), "index": index, "offset": offset}
         node = self.content.child(index - 1)
@@ -195,22 +299,11 @@ class Node:
         to: int,
         type: Union["Mark", "MarkType"],
     ) -> bool:
-        found = False
         if to > from_:
-
-            def iteratee(
-                node: "Node",
-                pos: int,
-                parent: Optional["Node"],
-                index: int,
-            ) -> bool:
-                nonlocal found
+            for node, _, _, _ in self.iter_between(from_, to):
                 if type.is_in_set(node.marks):
-                    found = True
-                return not found
-
-            self.nodes_between(from_, to, iteratee)
-        return found
+                    return True
+        return False
 
     @property
     def is_block(self) -> bool:
@@ -276,7 +369,7 @@ class Node:
         if not two or not two.valid_end:
             return False
         for i in range(start, end):
-            if not self.type.allows_marks(replacement.child(i).marks):
+            if not self.type.allows_node_marks(replacement.child(i)):
                 return False
         return True
 
@@ -302,73 +395,143 @@ class Node:
             return self.type.compatible_content(other.type)
 
     def check(self) -> None:
-        if not self.type.valid_content(self.content):
-            msg = f"Invalid content for node {self.type.name}: {str(self.content)[:50]}"
-            raise ValueError(msg)
-        copy = Mark.none
-        for mark in self.marks:
-            copy = mark.add_to_set(copy)
-        if not Mark.same_set(copy, self.marks):
-            msg = (
-                f"Invalid collection of marks for node {self.type.name}:"
-                f" {[m.type.name for m in self.marks]!r}"
-            )
-            raise ValueError(msg)
-
-        def iteratee(node: "Node", offset: int, index: int) -> None:
-            node.check()
-
-        return self.content.for_each(iteratee)
+        stack: list[Node] = [self]
+        while stack:
+            node = stack.pop()
+            if not node.type.valid_content(node.content):
+                msg = (
+                    f"Invalid content for node {node.type.name}:"
+                    f" {str(node.content)[:50]}"
+                )
+                raise ValueError(msg)
+            copy = Mark.none
+            for mark in node.marks:
+                copy = mark.add_to_set(copy)
+            if not Mark.same_set(copy, node.marks):
+                msg = (
+                    f"Invalid collection of marks for node {node.type.name}:"
+                    f" {[m.type.name for m in node.marks]!r}"
+                )
+                raise ValueError(msg)
+            children = node.content.content
+            if children:
+                stack.extend(reversed(children))
 
     def to_json(self) -> JSONDict:
-        obj: JSONDict = {"type": self.type.name}
-        if self.attrs:
-            obj = {
-                **obj,
-                "attrs": copy.deepcopy(self.attrs),
-            }
-        if getattr(self.content, "size", None):
-            obj = {
-                **obj,
-                "content": self.content.to_json(),
-            }
-        if len(self.marks):
-            obj = {
-                **obj,
-                "marks": [n.to_json() for n in self.marks],
-            }
+        pending: list[tuple[Fragment, list[JSON]]] = []
+        obj = node_json(self, pending)
+        while pending:
+            fragment, content = pending.pop()
+            content.extend([node_json(child, pending) for child in fragment.content])
         return obj
 
-    @classmethod
-    def from_json(cls, schema: "Schema[Any, Any]", json_data: JSONDict | str) -> "Node":
-        if isinstance(json_data, str):
-            import json
+    def to_json_bytes(self) -> bytes:
+        """
+        Serialize the node to UTF-8 encoded JSON, using the fastest
+        available [backend](#codec).
+        """
+        return dumps(self.to_json())
 
-            json_data = cast(JSONDict, json.loads(json_data))
+    def to_binary(self) -> bytes:
+        """
+        Encode the node in the compact [binary format](#model.binary).
+        """
+        from .binary import encode_node
 
-        if not json_data:
-            msg = "Invalid input for Node.from_json"
-            raise ValueError(msg)
-        marks = None
-        if json_data.get("marks"):
-            if not isinstance(json_data["marks"], list):
-                msg = "Invalid mark data for Node.fromJSON"
+        return encode_node(self)
+
+    @classmethod
+    def from_binary(
+        cls,
+        schema: "Schema[Any, Any]",
+        data: bytes | bytearray | memoryview,
+        lazy: bool = False,
+    ) -> "Node":
+        """
+        Decode a node from the [binary format](#model.binary). With
+        `lazy`, children are only decoded when they are first accessed.
+        """
+        from .binary import decode_node
+
+        return decode_node(schema, data, lazy)
+
+    @classmethod
+    def from_json(
+        cls,
+        schema: "Schema[Any, Any]",
+        json_data: JSONDict | RawJSON,
+        trusted: bool = False,
+    ) -> "Node":
+        """
+        Deserialize a node from its JSON representation. Pass `trusted` for
+        input produced by `to_json` from valid nodes of the same schema:
+        attributes are then used as given instead of being computed, and
+        mark sets are not sorted.
+        """
+        if isinstance(json_data, RawJSON):
+            json_data = cast(JSONDict, loads(json_data))
+        if trusted:
+            return node_from_trusted_json(schema, json_data)
+
+        # Nodes whose content is being built, with their marks, their
+        # content and the children built so far. Keeping them on a stack
+        # instead of recursing lets deeply nested input load. The bottom
+        # frame collects the result.
+        result: list[Node] = []
+        frames: list[tuple[JSONDict, list[Mark] | None, JSONList, list[Node]]] = [
+            ({}, None, [json_data], result),
+        ]
+        while True:
+            data, marks, content, built = frames[-1]
+            if len(built) == len(content):
+                frames.pop()
+                if not frames:
+                    return result[0]
+                frames[-1][3].append(
+                    schema.node_type(str(data["type"])).create(
+                        cast("Attrs", data.get("attrs")),
+                        Fragment(built),
+                        marks,
+                    ),
+                )
+                continue
+            data = cast(JSONDict, content[len(built)])
+            if not data:
+                msg = "Invalid input for Node.from_json"
                 raise ValueError(msg)
-            marks = [
-                schema.mark_from_json(cast(JSONDict, item))
-                for item in json_data["marks"]
-            ]
-        if json_data["type"] == "text":
-            return schema.text(str(json_data["text"]), marks)
-        content = Fragment.from_json(schema, json_data.get("content"))
-        return schema.node_type(str(json_data["type"])).create(
-            cast("Attrs", json_data.get("attrs")),
-            content,
-            marks,
-        )
+            marks = None
+            if data.get("marks"):
+                if not isinstance(data["marks"], list):
+                    msg = "Invalid mark data for Node.fromJSON"
+                    raise ValueError(msg)
+                marks = [
+                    schema.mark_from_json(cast(JSONDict, item))
+                    for item in data["marks"]
+                ]
+            if data["type"] == "text":
+                built.append(schema.text(str(data["text"]), marks))
+                continue
+            children = data.get("content")
+            if isinstance(children, RawJSON):
+                children = loads(children)
+            if not children:
+                built.append(
+                    schema.node_type(str(data["type"])).create(
+                        cast("Attrs", data.get("attrs")),
+                        Fragment.empty,
+                        marks,
+                    ),
+                )
+                continue
+            if not isinstance(children, list):
+                msg = "Invalid input for Fragment.from_json"
+                raise ValueError(msg)
+            frames.append((data, marks, children, []))
 
 
 class TextNode(Node):
+    __slots__ = ("_size", "_surrogates", "text")
+
     def __init__(
         self,
         type: "NodeType",
@@ -381,6 +544,8 @@ class TextNode(Node):
             msg = "Empty text nodes are not allowed"
             raise ValueError(msg)
         self.text = content
+        self._size: int | None = None
+        self._surrogates: tuple[int, ...] | None = None
 
     def __str__(self) -> str:
         import json
@@ -405,14 +570,32 @@ class TextNode(Node):
 
     @property
     def node_size(self) -> int:
-        return text_length(self.text)
+        size = self._size
+        if size is None:
+            size = self._size = text_length(self.text)
+        return size
+
+    def text_index(self, offset: int) -> int:
+        """
+        Convert a UTF-16 offset into this node's text into an index into
+        `text`. The two only differ when the text contains characters
+        outside the Basic Multilingual Plane, whose offsets are computed
+        once and cached.
+        """
+        if self.node_size == len(self.text):
+            return offset
+        surrogates = self._surrogates
+        if surrogates is None:
+            surrogates = self._surrogates = surrogate_offsets(self.text)
+        return utf16_to_index(surrogates, offset)
 
     def mark(self, marks: list[Mark]) -> "TextNode":
-        return (
-            self
-            if marks == self.marks
-            else TextNode(self.type, self.attrs, self.text, marks)
-        )
+        if marks == self.marks:
+            return self
+        node = TextNode(self.type, self.attrs, self.text, marks)
+        node._size = self._size
+        node._surrogates = self._surrogates
+        return node
 
     def with_text(self, text: str) -> "TextNode":
         if text == self.text:
@@ -420,22 +603,104 @@ class TextNode(Node):
         return TextNode(self.type, self.attrs, text, self.marks)
 
     def cut(self, from_: int = 0, to: int | None = None) -> "TextNode":
+        size = self.node_size
         if to is None:
-            to = text_length(self.text)
-        if from_ == 0 and to == text_length(self.text):
+            to = size
+        if from_ == 0 and to == size:
             return self
-        substring = self.text.encode("utf-16-le")[2 * from_ : 2 * to].decode(
-            "utf-16-le",
-        )
-        return self.with_text(substring)
+        return self.with_text(self.text[self.text_index(from_) : self.text_index(to)])
 
     def eq(self, other: Node) -> bool:
+        if (
+            self._digest is not None
+            and other._digest is not None
+            and self._digest != other._digest
+        ):
+            return False
         return self.same_markup(other) and self.text == getattr(other, "text", None)
 
-    def to_json(
-        self,
-    ) -> JSONDict:
-        return {**super().to_json(), "text": self.text}
+    @property
+    def digest(self) -> bytes:
+        digest = self._digest
+        if digest is None:
+            h = blake2b(self.markup_key().encode(), digest_size=16)
+            h.update(b"\0" + self.text.encode("utf-8", "surrogatepass"))
+            digest = self._digest = h.digest()
+        return digest
+
+
+def node_json(node: Node, pending: list[tuple[Fragment, list[JSON]]]) -> JSONDict:
+    """
+    Serialize a node without its children. When it has content, the
+    returned object gets an empty content list, which is registered in
+    `pending` together with the fragment to fill it from.
+    """
+    obj: dict[str, JSON] = {"type": node.type.name}
+    attrs = node.attrs
+    if attrs:
+        if node.type.blob_attrs:
+            obj["attrs"] = attrs_json(attrs)
+        else:
+            # Frozen attributes can be shared with the output.
+            obj["attrs"] = (
+                attrs if isinstance(attrs, FrozenDict) else copy.deepcopy(attrs)
+            )
+    if node.content.size:
+        content: list[JSON] = []
+        obj["content"] = content
+        pending.append((node.content, content))
+    if node.marks:
+        obj["marks"] = [mark.to_json() for mark in node.marks]
+    if node.is_text:
+        obj["text"] = node.text  # type: ignore[attr-defined]
+    return obj
+
+
+def node_from_trusted_json(schema: "Schema[Any, Any]", json_data: JSONDict) -> Node:
+    """
+    Build a node from canonical JSON, as produced by `Node.to_json`,
+    creating nodes and marks with the trusted constructors.
+    """
+    text_type = schema.nodes["text"]
+    text_attrs = cast("Attrs", text_type.default_attrs)
+    # Same frames as in `Node.from_json`, plus the content size of each
+    # frame, so that fragments don't have to sum their children's sizes.
+    result: list[Node] = []
+    frames: list[tuple[Any, list[Mark], Any, list[Node]]] = [
+        (None, Mark.none, [json_data], result),
+    ]
+    sizes = [0]
+    while True:
+        data, marks, content, built = frames[-1]
+        if len(built) == len(content):
+            frames.pop()
+            if not frames:
+                return result[0]
+            size = sizes.pop()
+            sizes[-1] += size + 2
+            frames[-1][3].append(
+                schema.node_type(data["type"]).create_trusted(
+                    data.get("attrs"), Fragment(built, size), marks
+                ),
+            )
+            continue
+        data = content[len(built)]
+        marks = Mark.none
+        mark_data = data.get("marks")
+        if mark_data:
+            marks = [Mark.from_json(schema, item, True) for item in mark_data]
+        name = data["type"]
+        children = data.get("content")
+        if children:
+            frames.append((data, marks, children, []))
+            sizes.append(0)
+            continue
+        if name == "text":
+            node: Node = TextNode(text_type, text_attrs, data["text"], marks)
+        else:
+            node = schema.node_type(name).create_trusted(data.get("attrs"), None, marks)
+        sizes[-1] += node.node_size
+        built.append(node)
 
 
 def wrap_marks(marks: list[Mark], str: str) -> str:
@@ -1,8 +1,10 @@
 from typing import TYPE_CHECKING, Any, ClassVar, Optional, cast
 
+from prosemirror.codec import RawJSON, dumps, loads
 from prosemirror.utils import JSONDict
 
 from .fragment import Fragment
+from .rope import Rope
 
 if TYPE_CHECKING:
     from .node import Node, TextNode
@@ -15,11 +17,9 @@ class ReplaceError(ValueError):
 
 
 def remove_range(content: Fragment, from_: int, to: int) -> Fragment:
-    from_index_info = content.find_index(from_)
-    index, offset = from_index_info["index"], from_index_info["offset"]
+    index, offset = content.locate(from_)
     child = content.maybe_child(index)
-    to_index_info = content.find_index(to)
-    index_to, offset_to = to_index_info["index"], to_index_info["offset"]
+    index_to, offset_to = content.locate(to)
     if offset == from_ or cast("Node", child).is_text:
         if offset_to != to and not content.child(index_to).is_text:
             msg = "removing non-flat range"
@@ -41,8 +41,7 @@ def insert_into(
     insert: Fragment,
     parent: Optional["Node"],
 ) -> Fragment | None:
-    a = content.find_index(dist)
-    index, offset = a["index"], a["offset"]
+    index, offset = content.locate(dist)
     child = content.maybe_child(index)
     if offset == dist or cast("Node", child).is_text:
         if parent and not parent.can_replace(index, index, insert):
@@ -63,6 +62,22 @@ class Slice:
         self.open_start = open_start
         self.open_end = open_end
 
+    def __copy__(self) -> "Slice":
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "Slice":
+        return self
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        if self is Slice.empty:
+            return (getattr, (Slice, "empty"))
+        if not self.content.size:
+            return (Slice, (self.content, self.open_start, self.open_end))
+        from .binary import decode_slice, encode_slice
+
+        schema = self.content.content[0].type.schema
+        return (decode_slice, (schema, encode_slice(self)))
+
     @property
     def size(self) -> int:
         return self.content.size - self.open_start - self.open_end
@@ -106,12 +121,33 @@ class Slice:
             }
         return json
 
+    def to_json_bytes(self) -> bytes:
+        return dumps(self.to_json())
+
+    def to_binary(self) -> bytes:
+        from .binary import encode_slice
+
+        return encode_slice(self)
+
+    @classmethod
+    def from_binary(
+        cls,
+        schema: "Schema[Any, Any]",
+        data: bytes | bytearray | memoryview,
+    ) -> "Slice":
+        from .binary import decode_slice
+
+        return decode_slice(schema, data)
+
     @classmethod
     def from_json(
         cls,
         schema: "Schema[Any, Any]",
-        json_data: JSONDict | None,
+        json_data: JSONDict | RawJSON | None,
+        trusted: bool = False,
     ) -> "Slice":
+        if isinstance(json_data, RawJSON):
+            json_data = cast(JSONDict | None, loads(json_data))
         if not json_data:
             return cls.empty
         open_start = json_data.get("openStart", 0) or 0
@@ -120,7 +156,7 @@ class Slice:
             msg = "invalid input for Slice.from_json"
             raise ValueError(msg)
         return cls(
-            Fragment.from_json(schema, json_data.get("content")),
+            Fragment.from_json(schema, json_data.get("content"), trusted),
             open_start,
             open_end,
         )
@@ -198,19 +234,28 @@ def joinable(before: "ResolvedPos", after: "ResolvedPos", depth: int) -> "Node":
     return node
 
 
-def add_node(child: "Node", target: list["Node"]) -> None:
+def add_node(child: "Node", target: list["Node | Rope"]) -> None:
     last = len(target) - 1
-    if last >= 0 and pm_node.is_text(child) and child.same_markup(target[last]):
-        target[last] = child.with_text(cast("TextNode", target[last]).text + child.text)
-    else:
-        target.append(child)
+    if last >= 0 and pm_node.is_text(child):
+        prev = target[last]
+        if isinstance(prev, Rope):
+            before = prev[len(prev) - 1]
+            if child.same_markup(before):
+                target[last] = prev.slice(0, len(prev) - 1)
+                text = cast("TextNode", before).text + child.text
+                target.append(child.with_text(text))
+                return
+        elif child.same_markup(prev):
+            target[last] = child.with_text(cast("TextNode", prev).text + child.text)
+            return
+    target.append(child)
 
 
 def add_range(
     start: Optional["ResolvedPos"],
     end: Optional["ResolvedPos"],
     depth: int,
-    target: list["Node"],
+    target: list["Node | Rope"],
 ) -> None:
     node = cast("ResolvedPos", end or start).node(depth)
     start_index = 0
@@ -222,14 +267,36 @@ def add_range(
         elif start.text_offset:
             add_node(cast("Node", start.node_after), target)
             start_index += 1
-    i = start_index
-    while i < end_index:
-        add_node(node.child(i), target)
-        i += 1
+    if start_index < end_index:
+        children = node.content.content[start_index:end_index]
+        if isinstance(children, Rope):
+            # Keep the run as a slice of the rope instead of indexing it
+            # child by child; only its first child can join with the
+            # preceding text.
+            add_node(children[0], target)
+            if len(children) > 1:
+                target.append(children.slice(1, len(children)))
+        else:
+            for child in children:
+                add_node(child, target)
     if end and end.depth == depth and end.text_offset:
         add_node(cast("Node", end.node_before), target)
 
 
+def joined(content: list["Node | Rope"]) -> Fragment:
+    if not any(isinstance(item, Rope) for item in content):
+        return Fragment(cast("list[Node]", content))
+    rope = Rope.empty
+    nodes: list[Node] = []
+    for item in content:
+        if isinstance(item, Rope):
+            rope = Rope.join(Rope.join(rope, Rope.from_nodes(nodes)), item)
+            nodes = []
+        else:
+            nodes.append(item)
+    return Fragment(Rope.join(rope, Rope.from_nodes(nodes)))
+
+
 def close(node: "Node", content: Fragment) -> "Node":
     if not node.type.valid_content(content):
         msg = f"Invalid content for node {node.type.name}"
@@ -246,7 +313,7 @@ def replace_three_way(
 ) -> Fragment:
     open_start = joinable(from_, start, depth + 1) if from_.depth > depth else None
     open_end = joinable(end, to, depth + 1) if to.depth > depth else None
-    content: list[Node] = []
+    content: list[Node | Rope] = []
     add_range(None, from_, depth, content)
     if open_start and open_end and start.index(depth) == end.index(depth):
         check_join(open_start, open_end)
@@ -264,17 +331,17 @@ def replace_three_way(
         if open_end:
             add_node(close(open_end, replace_two_way(end, to, depth + 1)), content)
     add_range(to, None, depth, content)
-    return Fragment(content)
+    return joined(content)
 
 
 def replace_two_way(from_: "ResolvedPos", to: "ResolvedPos", depth: int) -> Fragment:
-    content: list[Node] = []
+    content: list[Node | Rope] = []
     add_range(None, from_, depth, content)
     if from_.depth > depth:
         type = joinable(from_, to, depth + 1)
         add_node(close(type, replace_two_way(from_, to, depth + 1)), content)
     add_range(to, None, depth, content)
-    return Fragment(content)
+    return joined(content)
 
 
 def prepare_slice_for_replace(
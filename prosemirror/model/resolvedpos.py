@@ -1,5 +1,6 @@
-from collections.abc import Callable
-from typing import TYPE_CHECKING, Optional, Union, cast
+import weakref
+from collections.abc import Callable, Sequence
+from typing import TYPE_CHECKING, ClassVar, NamedTuple, Optional, TypeAlias, Union, cast
 
 from .mark import Mark
 
@@ -7,16 +8,38 @@ if TYPE_CHECKING:
     from .node import Node
 
 
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+
+
+# A cached resolution in `Node.resolve_cache`: the position, its path
+# below the document, its parent offset and a weak reference to the last
+# `ResolvedPos` built from it.
+CacheEntry: TypeAlias = (
+    "tuple[int, tuple[Node | int, ...], int, weakref.ref[ResolvedPos]]"
+)
+
+
 class ResolvedPos:
+    __slots__ = ("__weakref__", "depth", "parent_offset", "path", "pos")
+
+    cache_size: ClassVar[int] = 12
+    cache_hits: ClassVar[int] = 0
+    cache_misses: ClassVar[int] = 0
+
     def __init__(
         self,
         pos: int,
-        path: list[Union["Node", int]],
+        path: Sequence[Union["Node", int]],
         parent_offset: int,
     ) -> None:
         self.pos = pos
-        self.path = path
-        self.depth = int(len(path) / 3 - 1)
+        # Three entries per level, from the document down: the node, the
+        # index into it and the start position of that child.
+        self.path = tuple(path)
+        self.depth = len(path) // 3 - 1
         self.parent_offset = parent_offset
 
     def resolve_depth(self, val: int | None = None) -> int:
@@ -99,9 +122,7 @@ class ResolvedPos:
         depth = self.resolve_depth(depth)
         node = cast("Node", self.path[depth * 3])
         pos = 0 if depth == 0 else cast(int, self.path[depth * 3 - 1]) + 1
-        for i in range(index):
-            pos += node.child(i).node_size
-        return pos
+        return pos + node.content.child_offset(index)
 
     def marks(self) -> list["Mark"]:
         parent = self.parent
@@ -193,8 +214,7 @@ class ResolvedPos:
         parent_offset = pos
         node = doc
         while True:
-            index_info = node.content.find_index(parent_offset)
-            index, offset = index_info["index"], index_info["offset"]
+            index, offset = node.content.locate(parent_offset)
             rem = parent_offset - offset
             path.extend([node, index, start + offset])
             if not rem:
@@ -208,8 +228,49 @@ class ResolvedPos:
 
     @classmethod
     def resolve_cached(cls, doc: "Node", pos: int) -> "ResolvedPos":
-        # no cache for now
-        return cls.resolve(doc, pos)
+        # The cache lives on the document itself. Its entries only hold the
+        # path below the document and a weak reference to the resolved
+        # position, so the document isn't kept alive by a reference cycle
+        # through them, and a position that was dropped is rebuilt from its
+        # path instead of being resolved again.
+        elts = doc.resolve_cache
+        if elts is None:
+            elts = doc.resolve_cache = []
+        for i in range(len(elts) - 1, -1, -1):
+            elt = elts[i]
+            if elt[0] == pos:
+                ResolvedPos.cache_hits += 1
+                if i != len(elts) - 1:
+                    del elts[i]
+                    elts.append(elt)
+                result = elt[3]()
+                if result is None:
+                    result = cls(pos, (doc, *elt[1]), elt[2])
+                    elts[-1] = (pos, elt[1], elt[2], weakref.ref(result))
+                return result
+        ResolvedPos.cache_misses += 1
+        result = cls.resolve(doc, pos)
+        entry = (pos, result.path[1:], result.parent_offset, weakref.ref(result))
+        elts.append(entry)
+        if len(elts) > cls.cache_size:
+            del elts[: len(elts) - cls.cache_size]
+        return result
+
+    @classmethod
+    def cache_info(cls) -> CacheInfo:
+        """
+        Statistics for the cache used by `resolve_cached`, in the style of
+        `functools.lru_cache`. `maxsize` is the number of positions kept per
+        document.
+        """
+        return CacheInfo(
+            ResolvedPos.cache_hits, ResolvedPos.cache_misses, cls.cache_size
+        )
+
+    @classmethod
+    def reset_cache_info(cls) -> None:
+        ResolvedPos.cache_hits = 0
+        ResolvedPos.cache_misses = 0
 
 
 class NodeRange:
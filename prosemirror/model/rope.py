@@ -0,0 +1,248 @@
+from bisect import bisect_right
+from collections.abc import Iterator, Sequence
+from itertools import accumulate, chain
+from typing import TYPE_CHECKING, ClassVar, Optional, Union, cast, overload
+
+if TYPE_CHECKING:
+    from .content import ContentMatch
+    from .node import Node
+
+
+class Rope(Sequence["Node"]):
+    """
+    A persistent, balanced tree (a B-tree keyed by index) of nodes, used
+    as the child storage of very large fragments.
+
+    Ropes are immutable. Replacing, inserting, slicing and concatenating
+    create new ropes that share all untouched subtrees with the original,
+    so they take time and memory logarithmic in the number of children.
+    Every tree node keeps the running child counts and content sizes of
+    its children, which makes index and position lookups logarithmic as
+    well.
+    """
+
+    __slots__ = ("counts", "height", "items", "length", "matches", "size", "sizes")
+
+    max_leaf: ClassVar[int] = 64
+    max_branch: ClassVar[int] = 32
+    empty: ClassVar["Rope"]
+
+    height: int
+    items: tuple[Union["Node", "Rope"], ...]
+    counts: tuple[int, ...]
+    sizes: tuple[int, ...]
+    length: int
+    size: int
+    # The content match states reached by matching the whole rope from
+    # a given state, filled in by `ContentMatch.match_fragment`.
+    matches: dict["ContentMatch", Optional["ContentMatch"]] | None
+
+    def __init__(
+        self,
+        height: int,
+        items: tuple[Union["Node", "Rope"], ...],
+        counts: tuple[int, ...],
+        sizes: tuple[int, ...],
+        length: int,
+    ) -> None:
+        self.height = height
+        self.items = items
+        # Running totals of the number of nodes (only for branches, leaves
+        # index their nodes directly) and of the content size of the items.
+        self.counts = counts
+        self.sizes = sizes
+        self.length = length
+        self.size = sizes[-1] if sizes else 0
+        self.matches = None
+
+    @classmethod
+    def leaf(cls, nodes: tuple["Node", ...]) -> "Rope":
+        return cls(
+            0,
+            nodes,
+            (),
+            tuple(accumulate(node.node_size for node in nodes)),
+            len(nodes),
+        )
+
+    @classmethod
+    def branch(cls, children: tuple["Rope", ...]) -> "Rope":
+        counts = tuple(accumulate(child.length for child in children))
+        return cls(
+            children[0].height + 1,
+            children,
+            counts,
+            tuple(accumulate(child.size for child in children)),
+            counts[-1],
+        )
+
+    @classmethod
+    def from_nodes(cls, nodes: Sequence["Node"]) -> "Rope":
+        if isinstance(nodes, Rope):
+            return nodes
+        if not nodes:
+            return cls.empty
+        step = cls.max_leaf
+        level = [
+            cls.leaf(tuple(nodes[i : i + step])) for i in range(0, len(nodes), step)
+        ]
+        step = cls.max_branch
+        while len(level) > 1:
+            level = [
+                cls.branch(tuple(level[i : i + step]))
+                for i in range(0, len(level), step)
+            ]
+        return level[0]
+
+    @classmethod
+    def join(cls, a: "Rope", b: "Rope") -> "Rope":
+        if not a.length:
+            return b
+        if not b.length:
+            return a
+        if a.height == b.height:
+            if a.height == 0:
+                if a.length + b.length <= cls.max_leaf:
+                    return cls.leaf(cast(tuple["Node", ...], a.items + b.items))
+            elif len(a.items) + len(b.items) <= cls.max_branch:
+                return cls.branch(cast(tuple[Rope, ...], a.items + b.items))
+            return cls.branch((a, b))
+        if a.height > b.height:
+            items = cast(tuple[Rope, ...], a.items)
+            last = cls.join(items[-1], b)
+            if last.height < a.height:
+                return cls.branch((*items[:-1], last))
+            return cls._balance((*items[:-1], *cast(tuple[Rope, ...], last.items)))
+        items = cast(tuple[Rope, ...], b.items)
+        first = cls.join(a, items[0])
+        if first.height < b.height:
+            return cls.branch((first, *items[1:]))
+        return cls._balance((*cast(tuple[Rope, ...], first.items), *items[1:]))
+
+    @classmethod
+    def _balance(cls, children: tuple["Rope", ...]) -> "Rope":
+        if len(children) <= cls.max_branch:
+            return cls.branch(children)
+        half = len(children) // 2
+        return cls.branch((cls.branch(children[:half]), cls.branch(children[half:])))
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator["Node"]:
+        if self.height == 0:
+            return iter(cast(tuple["Node", ...], self.items))
+        return chain.from_iterable(cast(tuple[Rope, ...], self.items))
+
+    @overload
+    def __getitem__(self, index: int) -> "Node": ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "Rope": ...
+
+    def __getitem__(self, index: int | slice) -> Union["Node", "Rope"]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            if step != 1:
+                msg = "Ropes can only be sliced with a step of 1"
+                raise ValueError(msg)
+            return self.slice(start, stop)
+        if index < 0:
+            index += self.length
+        if index < 0 or index >= self.length:
+            msg = "Rope index out of range"
+            raise IndexError(msg)
+        rope = self
+        while rope.height:
+            i = bisect_right(rope.counts, index)
+            if i:
+                index -= rope.counts[i - 1]
+            rope = cast(Rope, rope.items[i])
+        return cast("Node", rope.items[index])
+
+    def find(self, pos: int) -> tuple[int, int]:
+        """
+        Find the child that covers `pos`, which must be smaller than the
+        size of the rope, and return its index and start position.
+        """
+        rope = self
+        index = start = 0
+        while True:
+            i = bisect_right(rope.sizes, pos - start)
+            if i:
+                start += rope.sizes[i - 1]
+            if not rope.height:
+                return index + i, start
+            if i:
+                index += rope.counts[i - 1]
+            rope = cast(Rope, rope.items[i])
+
+    def offset_of(self, index: int) -> int:
+        """
+        The start position of the child at `index`. Passing the number of
+        children returns the size of the rope.
+        """
+        if index >= self.length:
+            return self.size
+        rope = self
+        start = 0
+        while rope.height:
+            i = bisect_right(rope.counts, index)
+            if i:
+                index -= rope.counts[i - 1]
+                start += rope.sizes[i - 1]
+            rope = cast(Rope, rope.items[i])
+        return start + rope.sizes[index - 1] if index else start
+
+    def set(self, index: int, node: "Node") -> "Rope":
+        if index < 0:
+            index += self.length
+        if index < 0 or index >= self.length:
+            msg = "Rope index out of range"
+            raise IndexError(msg)
+        if not self.height:
+            nodes = cast(tuple["Node", ...], self.items)
+            return Rope.leaf((*nodes[:index], node, *nodes[index + 1 :]))
+        i = bisect_right(self.counts, index)
+        if i:
+            index -= self.counts[i - 1]
+        children = cast(tuple[Rope, ...], self.items)
+        child = children[i].set(index, node)
+        return Rope.branch((*children[:i], child, *children[i + 1 :]))
+
+    def slice(self, start: int, end: int) -> "Rope":
+        start = max(start, 0)
+        end = min(end, self.length)
+        if start >= end:
+            return Rope.empty
+        if start == 0 and end == self.length:
+            return self
+        if not self.height:
+            return Rope.leaf(cast(tuple["Node", ...], self.items[start:end]))
+        children = cast(tuple[Rope, ...], self.items)
+        first = bisect_right(self.counts, start)
+        last = bisect_right(self.counts, end - 1)
+        first_start = self.counts[first - 1] if first else 0
+        last_start = self.counts[last - 1] if last else 0
+        if first == last:
+            return children[first].slice(start - first_start, end - first_start)
+        result = children[first].slice(start - first_start, end - first_start)
+        if last > first + 1:
+            result = Rope.join(result, Rope.branch(children[first + 1 : last]))
+        return Rope.join(result, children[last].slice(0, end - last_start))
+
+    def insert(self, index: int, node: "Node") -> "Rope":
+        single = Rope.leaf((node,))
+        if index == 0:
+            return Rope.join(single, self)
+        if index >= self.length:
+            return Rope.join(self, single)
+        return Rope.join(
+            Rope.join(self.slice(0, index), single), self.slice(index, self.length)
+        )
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} length={self.length} size={self.size}>"
+
+
+Rope.empty = Rope(0, (), (), (), 0)
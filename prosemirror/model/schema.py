@@ -1,6 +1,7 @@
-from collections.abc import Callable
+from collections.abc import Callable, Hashable, Iterable
 from typing import (
     Any,
+    ClassVar,
     Generic,
     Literal,
     Optional,
@@ -8,14 +9,16 @@ from typing import (
     TypeVar,
     cast,
 )
+from weakref import WeakValueDictionary
 
 from typing_extensions import NotRequired, TypedDict
 
-from prosemirror.model.content import ContentMatch
+from prosemirror.model.blob import Blob, blob_ref, find_blob
+from prosemirror.model.content import ContentMatch, compile_content, node_types_key
 from prosemirror.model.fragment import Fragment
 from prosemirror.model.mark import Mark
 from prosemirror.model.node import Node, TextNode
-from prosemirror.utils import JSON, Attrs, JSONDict
+from prosemirror.utils import JSON, Attrs, FrozenDict, JSONDict, freeze
 
 
 def default_attrs(attrs: "Attributes") -> Attrs | None:
@@ -43,6 +46,33 @@ def compute_attrs(attrs: "Attributes", value: Attrs | None) -> Attrs:
     return built
 
 
+def store_blobs(type: "NodeType | MarkType", attrs: dict[str, Any]) -> dict[str, Any]:
+    """
+    Replace the values of the blob attributes of `type` in `attrs` with
+    the schema's blobs for them.
+    """
+    for name in type.blob_attrs:
+        value = attrs.get(name)
+        if value is not None:
+            attrs[name] = type.schema.blob(value)
+    return attrs
+
+
+def attrs_key(value: JSON) -> Hashable:
+    """
+    A hashable key that is equal for two attribute values exactly when the
+    values are equal and of the same type (so `1`, `1.0` and `True` don't
+    collapse into one). Raises `TypeError` for unhashable values that are
+    not plain JSON containers.
+    """
+    if isinstance(value, dict):
+        return (dict, tuple((k, attrs_key(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return (list, tuple(attrs_key(v) for v in value))
+    hash(value)
+    return (value.__class__, value)
+
+
 def init_attrs(attrs: Optional["AttributeSpecs"]) -> "Attributes":
     result = {}
     if attrs:
@@ -67,20 +97,44 @@ class NodeType:
 
     inline_content: bool
 
+    # Flags computed when the schema is compiled, since they are checked
+    # for every node in most traversals.
+    is_block: bool
+    is_text: bool
+    is_inline: bool
+    is_textblock: bool
+    is_leaf: bool
+    is_atom: bool
+    whitespace: Literal["pre", "normal"]
+
     mark_set: list["MarkType"] | None
 
+    # Bitmask of the mark types allowed in this node's content (see
+    # `MarkType.bit`). All bits are set when any mark is allowed.
+    allowed_mark_mask: int
+
     def __init__(self, name: str, schema: "Schema[Any, Any]", spec: "NodeSpec") -> None:
         self.name = name
         self.schema = schema
         self.spec = spec
         self.groups = spec["group"].split(" ") if "group" in spec else []
         self.attrs = init_attrs(spec.get("attrs"))
-        self.default_attrs = default_attrs(self.attrs)
+        self.blob_attrs = [name for name, attr in self.attrs.items() if attr.blob]
+        defaults = default_attrs(self.attrs)
+        self.default_attrs = schema.intern_attrs(defaults) if defaults else defaults
         self._content_match: ContentMatch | None = None
         self.mark_set = None
+        self.allowed_mark_mask = -1
         self.inline_content = False
         self.is_block = not (spec.get("inline") or name == "text")
         self.is_text = name == "text"
+        self.is_inline = not self.is_block
+        self.is_textblock = False
+        self.is_leaf = False
+        self.is_atom = bool(spec.get("atom"))
+        self.whitespace = spec.get("whitespace") or (
+            "pre" if spec.get("code") else "normal"
+        )
 
     @property
     def content_match(self) -> ContentMatch:
@@ -90,28 +144,10 @@ class NodeType:
     @content_match.setter
     def content_match(self, value: ContentMatch) -> None:
         self._content_match = value
-
-    @property
-    def is_inline(self) -> bool:
-        return not self.is_block
-
-    @property
-    def is_textblock(self) -> bool:
-        return self.is_block and self.inline_content
-
-    @property
-    def is_leaf(self) -> bool:
-        return self.content_match == ContentMatch.empty
-
-    @property
-    def is_atom(self) -> bool:
-        return self.is_leaf or bool(self.spec.get("atom"))
-
-    @property
-    def whitespace(self) -> Literal["pre", "normal"]:
-        return self.spec.get("whitespace") or (
-            "pre" if self.spec.get("code") else "normal"
-        )
+        self.inline_content = value.inline_content
+        self.is_textblock = self.is_block and self.inline_content
+        self.is_leaf = value is ContentMatch.empty
+        self.is_atom = self.is_leaf or bool(self.spec.get("atom"))
 
     def has_required_attrs(self) -> bool:
         return any(self.attrs[n].is_required for n in self.attrs)
@@ -119,10 +155,16 @@ class NodeType:
     def compatible_content(self, other: "NodeType") -> bool:
         return self == other or (self.content_match.compatible(other.content_match))
 
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (self.schema.node_type, (self.name,))
+
     def compute_attrs(self, attrs: Attrs | None) -> Attrs:
         if attrs is None and self.default_attrs is not None:
             return self.default_attrs
-        return compute_attrs(self.attrs, attrs)
+        built = compute_attrs(self.attrs, attrs)
+        if self.blob_attrs:
+            store_blobs(self, cast(dict[str, Any], built))
+        return self.schema.intern_attrs(built)
 
     def create(
         self,
@@ -140,6 +182,27 @@ class NodeType:
             Mark.set_from(marks),
         )
 
+    def create_trusted(
+        self,
+        attrs: Attrs | None = None,
+        content: Fragment | None = None,
+        marks: list[Mark] | None = None,
+    ) -> Node:
+        """
+        Like `create`, but without sorting the marks, and without computing
+        the attributes when `attrs` holds exactly the attributes of this
+        type. `marks` must be a valid, sorted mark set, as in the output of
+        `Node.to_json`.
+        """
+        if self.is_text:
+            msg = "NodeType.create cannot construct text nodes"
+            raise ValueError(msg)
+        if not attrs or self.blob_attrs or attrs.keys() != self.attrs.keys():
+            attrs = self.compute_attrs(attrs)
+        elif not isinstance(attrs, FrozenDict):
+            attrs = self.schema.intern_attrs(attrs)
+        return Node(self, attrs, content, marks or Mark.none)
+
     def create_checked(
         self,
         attrs: Attrs | None = None,
@@ -176,12 +239,19 @@ class NodeType:
         result = self.content_match.match_fragment(content)
         if not result or not result.valid_end:
             return False
-        for i in range(content.child_count):
-            if not self.allows_marks(content.child(i).marks):
+        disallowed = ~self.allowed_mark_mask
+        for child in content.content:
+            # Mark masks are only comparable within a schema.
+            if child.type.schema is not self.schema:
+                if not self.allows_marks(child.marks):
+                    return False
+            elif child.mark_mask & disallowed:
                 return False
         return True
 
     def allows_mark_type(self, mark_type: "MarkType") -> bool:
+        if mark_type.schema is self.schema:
+            return bool(self.allowed_mark_mask & mark_type.bit)
         return self.mark_set is None or mark_type in self.mark_set
 
     def allows_marks(self, marks: list[Mark]) -> bool:
@@ -189,6 +259,21 @@ class NodeType:
             return True
         return all(self.allows_mark_type(mark.type) for mark in marks)
 
+    def allows_mark_mask(self, mask: int) -> bool:
+        """
+        Whether all mark types in the given [mask](#model.Mark.set_mask)
+        are allowed in this node.
+        """
+        return not mask & ~self.allowed_mark_mask
+
+    def allows_node_marks(self, node: Node) -> bool:
+        """
+        Whether all marks of `node` are allowed in this node.
+        """
+        if node.type.schema is self.schema:
+            return self.allows_mark_mask(node.mark_mask)
+        return self.allows_marks(node.marks)
+
     def allowed_marks(self, marks: list[Mark]) -> list[Mark]:
         if self.mark_set is None:
             return marks
@@ -243,6 +328,7 @@ class Attribute:
     def __init__(self, options: "AttributeSpec") -> None:
         self.has_default = "default" in options
         self.default = options.get("default")
+        self.blob = bool(options.get("blob"))
 
     @property
     def is_required(self) -> bool:
@@ -252,6 +338,11 @@ class Attribute:
 class MarkType:
     excluded: list["MarkType"]
     instance: Mark | None
+    # The bit that represents this mark type in mark set masks, derived
+    # from its rank.
+    bit: int
+    # The bits of the mark types excluded by this one.
+    excluded_mask: int
 
     def __init__(
         self,
@@ -264,12 +355,18 @@ class MarkType:
         self.schema = schema
         self.spec = spec
         self.attrs = init_attrs(spec.get("attrs"))
+        self.blob_attrs = [name for name, attr in self.attrs.items() if attr.blob]
         self.rank = rank
+        self.bit = 1 << rank
         self.excluded = None  # type: ignore[assignment]
+        self.excluded_mask = 0
         defaults = default_attrs(self.attrs)
         self.instance = None
-        if defaults:
-            self.instance = Mark(self, defaults)
+        if defaults is not None:
+            self.instance = schema.intern_mark(self, defaults)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (self.schema.mark_type, (self.name,))
 
     def create(
         self,
@@ -277,7 +374,22 @@ class MarkType:
     ) -> Mark:
         if not attrs and self.instance:
             return self.instance
-        return Mark(self, compute_attrs(self.attrs, attrs))
+        built = compute_attrs(self.attrs, attrs)
+        if self.blob_attrs:
+            store_blobs(self, cast(dict[str, Any], built))
+        return self.schema.intern_mark(self, built)
+
+    def create_trusted(self, attrs: Attrs | None = None) -> Mark:
+        """
+        Like `create`, but without computing the attributes when `attrs`
+        holds exactly the attributes of this type.
+        """
+        if not attrs and self.instance:
+            return self.instance
+        attrs = attrs or {}
+        if self.blob_attrs or attrs.keys() != self.attrs.keys():
+            return self.create(attrs)
+        return self.schema.intern_mark(self, attrs)
 
     @classmethod
     def compile(
@@ -297,6 +409,8 @@ class MarkType:
         return next((item for item in set if item.type == self), None)
 
     def excludes(self, other: "MarkType") -> bool:
+        if other.schema is self.schema:
+            return bool(self.excluded_mask & other.bit)
         return any(other.name == e.name for e in self.excluded)
 
 
@@ -369,9 +483,15 @@ class MarkSpec(TypedDict, total=False):
 
 class AttributeSpec(TypedDict, total=False):
     default: JSON
+    # Store the attribute's values as [blobs](#model.blob).
+    blob: bool
 
 
 class Schema(Generic[Nodes, Marks]):
+    # Schemas by the name they were [registered](#model.Schema.register)
+    # under.
+    registry: ClassVar[dict[str, "Schema[Any, Any]"]] = {}
+
     spec: SchemaSpec[Nodes, Marks]
 
     nodes: dict[Nodes, "NodeType"]
@@ -380,9 +500,20 @@ class Schema(Generic[Nodes, Marks]):
 
     def __init__(self, spec: SchemaSpec[Nodes, Marks]) -> None:
         self.spec = spec
+        self.name: str | None = None
+        # Canonical attribute dicts and marks, so that equal values created
+        # through this schema share one object. The pools only hold weak
+        # references and shrink again when the values are no longer used.
+        self.interned_attrs: WeakValueDictionary[Hashable, FrozenDict] = (
+            WeakValueDictionary()
+        )
+        self.interned_marks: WeakValueDictionary[Hashable, Mark] = WeakValueDictionary()
+        # Blobs by digest, shared in the same way.
+        self.blobs: WeakValueDictionary[str, Blob] = WeakValueDictionary()
         self.nodes = NodeType.compile(self.spec["nodes"], self)
         self.marks = MarkType.compile(self.spec.get("marks", {}), self)
         content_expr_cache = {}
+        types_key = node_types_key(cast(dict[str, "NodeType"], self.nodes))
         for prop in self.nodes:
             if prop in self.marks:
                 msg = f"{prop} can not be both a node and a mark"
@@ -391,13 +522,13 @@ class Schema(Generic[Nodes, Marks]):
             content_expr = type.spec.get("content", "")
             mark_expr = type.spec.get("marks")
             if content_expr not in content_expr_cache:
-                content_expr_cache[content_expr] = ContentMatch.parse(
+                content_expr_cache[content_expr] = compile_content(
                     content_expr,
                     cast(dict[str, "NodeType"], self.nodes),
+                    types_key,
                 )
 
             type.content_match = content_expr_cache[content_expr]
-            type.inline_content = type.content_match.inline_content
             if mark_expr == "_":
                 type.mark_set = None
             elif mark_expr:
@@ -406,6 +537,8 @@ class Schema(Generic[Nodes, Marks]):
                 type.mark_set = []
             else:
                 type.mark_set = None
+            if type.mark_set is not None:
+                type.allowed_mark_mask = mark_mask(type.mark_set)
         for mark in self.marks.values():
             excl = mark.spec.get("excludes")
             mark.excluded = (
@@ -413,11 +546,64 @@ class Schema(Generic[Nodes, Marks]):
                 if excl is None
                 else ([] if excl == "" else (gather_marks(self, excl.split(" "))))
             )
+            mark.excluded_mask = mark_mask(mark.excluded)
 
         self.top_node_type = self.nodes[cast(Nodes, self.spec.get("topNode") or "doc")]
         self.cached: dict[str, Any] = {}
         self.cached["wrappings"] = {}
 
+    def register(self, name: str) -> "Schema[Nodes, Marks]":
+        """
+        Register the schema under `name` and return it. Registered schemas
+        pickle as their name, and so do the nodes, marks, slices and steps
+        that use them, with only their own data: unpickling looks the
+        schema up by name, so the process that loads them must register an
+        equivalent schema under the same name (for example by importing
+        the module that defines it).
+        """
+        registered = Schema.registry.get(name)
+        if registered is not None and registered is not self:
+            msg = f"Another schema is already registered as {name}"
+            raise ValueError(msg)
+        self.name = name
+        Schema.registry[name] = self
+        return self
+
+    @classmethod
+    def registered(cls, name: str) -> "Schema[Any, Any]":
+        found = Schema.registry.get(name)
+        if found is None:
+            msg = f"No schema is registered as {name}"
+            raise ValueError(msg)
+        return found
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        if self.name is None:
+            msg = "Only registered schemas can be pickled (see Schema.register)"
+            raise TypeError(msg)
+        return (Schema.registered, (self.name,))
+
+    def precompute(self) -> "Schema[Nodes, Marks]":
+        """
+        Fill in the wrapping and fill tables of every content match state
+        in the schema for every node type, which are otherwise computed
+        the first time they are needed, and return the schema. Makes the
+        first calls to `find_wrapping` and `fill_before` as fast as the
+        later ones, at the cost of a slower schema setup.
+        """
+        types = list(self.nodes.values())
+        seen = set()
+        for node_type in types:
+            for state in node_type.content_match.states():
+                if state in seen:
+                    continue
+                seen.add(state)
+                state.fill_paths(None)
+                for type in types:
+                    state.fill_paths(type)
+                    state.find_wrapping(type)
+        return self
+
     def node(
         self,
         type: str | NodeType,
@@ -444,6 +630,13 @@ class Schema(Generic[Nodes, Marks]):
             Mark.set_from(marks),
         )
 
+    def text_trusted(self, text: str, marks: list[Mark] | None = None) -> TextNode:
+        """
+        Like `text`, but `marks` must already be a valid, sorted mark set.
+        """
+        type = self.nodes[cast(Nodes, "text")]
+        return TextNode(type, cast(Attrs, type.default_attrs), text, marks or Mark.none)
+
     def mark(
         self,
         type: str | MarkType,
@@ -453,6 +646,55 @@ class Schema(Generic[Nodes, Marks]):
             type = self.marks[cast(Marks, type)]
         return type.create(attrs)
 
+    def intern_attrs(self, attrs: Attrs) -> Attrs:
+        """
+        Return the canonical, [frozen](#utils.FrozenDict) object for an
+        attribute dict equal to `attrs`. Attributes containing values that
+        can't be hashed are frozen but not interned.
+        """
+        try:
+            key = attrs_key(attrs)
+            interned = self.interned_attrs.get(key)
+        except TypeError:
+            return freeze(attrs)  # type: ignore[return-value]
+        if interned is None:
+            interned = cast(FrozenDict, freeze(attrs))
+            self.interned_attrs[key] = interned
+        return interned
+
+    def blob(self, value: JSON | Blob) -> Blob:
+        """
+        Return the canonical [blob](#model.blob.Blob) for a value, a blob,
+        or a blob reference (see `externalize_blobs`).
+        """
+        if not isinstance(value, Blob):
+            digest = blob_ref(value)
+            if digest is not None:
+                found = self.blobs.get(digest)
+                if found is not None:
+                    return found
+                value = find_blob(digest)
+            value = Blob(value)
+        found = self.blobs.get(value.digest)
+        if found is None:
+            found = self.blobs[value.digest] = value
+        return found
+
+    def intern_mark(self, type: "MarkType", attrs: Attrs) -> Mark:
+        """
+        Return the canonical mark of the given type with attributes equal
+        to `attrs`.
+        """
+        try:
+            key = (type.name, attrs_key(attrs))
+            mark = self.interned_marks.get(key)
+        except TypeError:
+            return Mark(type, attrs)
+        if mark is None:
+            mark = Mark(type, self.intern_attrs(attrs))
+            self.interned_marks[key] = mark
+        return mark
+
     def node_from_json(self, json_data: JSONDict) -> Node | TextNode:
         return Node.from_json(self, json_data)
 
@@ -469,6 +711,13 @@ class Schema(Generic[Nodes, Marks]):
             raise ValueError(msg)
         return found
 
+    def mark_type(self, name: str) -> MarkType:
+        found = self.marks.get(cast(Marks, name))
+        if not found:
+            msg = f"Unknown mark type: {name}"
+            raise ValueError(msg)
+        return found
+
 
 def gather_marks(schema: Schema[Any, Any], marks: list[str]) -> list[MarkType]:
     found = []
@@ -489,3 +738,10 @@ def gather_marks(schema: Schema[Any, Any], marks: list[str]) -> list[MarkType]:
             msg = f"unknow mark type: '{mark}'"
             raise SyntaxError(msg)
     return found
+
+
+def mark_mask(types: Iterable[MarkType]) -> int:
+    mask = 0
+    for type in types:
+        mask |= type.bit
+    return mask
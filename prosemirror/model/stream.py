@@ -0,0 +1,356 @@
+"""
+Incremental JSON reading and writing for large documents.
+
+`iter_json` and `dump_json` produce the same bytes as `Node.to_json_bytes`,
+in chunks, without building the intermediate object tree. `load_json` builds
+a node from a file or from an iterable of chunks without holding the parsed
+JSON tree, so only the source text that has not been consumed yet and the
+nodes built so far are kept in memory. `iter_text` and `text_from_json`
+extract the text of a serialized node without building it at all.
+"""
+
+import codecs
+import json
+import re
+from collections.abc import Callable, Iterable, Iterator
+from typing import IO, TYPE_CHECKING, Any, Protocol, cast
+
+from prosemirror.codec import RawJSON, dumps, loads
+from prosemirror.utils import JSON, Attrs, JSONDict
+
+from .blob import attrs_json
+from .fragment import Fragment
+from .mark import Mark
+from .node import Node
+
+if TYPE_CHECKING:
+    from .schema import Schema
+
+
+class Readable(Protocol):
+    def read(self, size: int, /) -> bytes | str: ...
+
+
+Source = Readable | Iterable[bytes] | Iterable[str]
+
+CHUNK_SIZE = 1 << 16
+
+_whitespace = re.compile(r"[ \t\n\r]*")
+# What may follow the part of a number that has been read so far.
+_number_rest = re.compile(r"[0-9.eE+-]*\Z")
+_decoder = json.JSONDecoder()
+
+
+def iter_json(node: Node, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Serialize a node to JSON, yielding UTF-8 encoded chunks of about
+    `chunk_size` bytes. The concatenated chunks equal
+    `node.to_json_bytes()`.
+    """
+    out = bytearray()
+    # Nodes still to be written, and the closing parts of the nodes being
+    # written, in reverse order.
+    stack: list[Node | bytes] = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, bytes):
+            out += item
+        else:
+            out += b'{"type":'
+            out += dumps(item.type.name)
+            if item.attrs:
+                out += b',"attrs":'
+                attrs = item.attrs
+                if item.type.blob_attrs:
+                    attrs = attrs_json(attrs)
+                out += dumps(cast(JSON, attrs))
+            tail = b""
+            if item.marks:
+                tail += b',"marks":' + dumps([mark.to_json() for mark in item.marks])
+            if item.is_text:
+                tail += b',"text":' + dumps(item.text)  # type: ignore[attr-defined]
+            children = item.content.content
+            if item.content.size:
+                out += b',"content":['
+                stack.append(tail + b"]}")
+                for i in range(len(children) - 1, 0, -1):
+                    stack.append(children[i])
+                    stack.append(b",")
+                stack.append(children[0])
+            else:
+                out += tail
+                out += b"}"
+        if len(out) >= chunk_size:
+            yield bytes(out)
+            out.clear()
+    if out:
+        yield bytes(out)
+
+
+def dump_json(node: Node, file: IO[bytes], chunk_size: int = CHUNK_SIZE) -> None:
+    """
+    Write a node as JSON to a binary file.
+    """
+    for chunk in iter_json(node, chunk_size):
+        file.write(chunk)
+
+
+def _read_chunks(source: Source, chunk_size: int) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    if hasattr(source, "read"):
+        read = cast(Readable, source).read
+        while chunk := read(chunk_size):
+            yield chunk if isinstance(chunk, str) else decoder.decode(chunk)
+    else:
+        for chunk in cast(Iterable[bytes | str], source):
+            yield chunk if isinstance(chunk, str) else decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+class _Reader:
+    """
+    A pull tokenizer over a stream of text chunks, keeping only the text
+    that has not been consumed yet.
+    """
+
+    __slots__ = ("buffer", "chunks", "pos")
+
+    def __init__(self, chunks: Iterator[str]) -> None:
+        self.chunks = chunks
+        self.buffer = ""
+        self.pos = 0
+
+    def fill(self) -> bool:
+        for chunk in self.chunks:
+            if chunk:
+                self.buffer = self.buffer[self.pos :] + chunk
+                self.pos = 0
+                return True
+        return False
+
+    def peek(self) -> str:
+        """
+        Skip whitespace and return the next character, or an empty string
+        at the end of the input.
+        """
+        buffer, pos = self.buffer, self.pos
+        # Compact JSON has no whitespace between tokens.
+        if pos < len(buffer) and buffer[pos] not in " \t\n\r":
+            return buffer[pos]
+        while True:
+            self.pos = _whitespace.match(self.buffer, self.pos).end()  # type: ignore[union-attr]
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def next(self) -> str:
+        char = self.peek()
+        if not char:
+            msg = "Unexpected end of JSON input"
+            raise ValueError(msg)
+        self.pos += 1
+        return char
+
+    def value(self) -> JSON:
+        """
+        Read a complete JSON value.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number that runs to the end of the buffer (possibly up to a
+            # trailing `.`, `e` or sign) may continue in the next chunk.
+            if (
+                isinstance(value, int | float)
+                and _number_rest.match(self.buffer, end)
+                and self.fill()
+            ):
+                continue
+            self.pos = end
+            return cast(JSON, value)
+
+
+class _Frame:
+    """
+    A node object being read: its fields other than content, the nodes
+    built from its content so far, and whether the reader is inside its
+    content list.
+    """
+
+    __slots__ = ("built", "fields", "in_content")
+
+    def __init__(self, built: list[Node], in_content: bool = False) -> None:
+        self.fields: dict[str, JSON] = {}
+        self.built = built
+        self.in_content = in_content
+
+
+def load_json(
+    schema: "Schema[Any, Any]",
+    source: Source,
+    chunk_size: int = CHUNK_SIZE,
+    trusted: bool = False,
+) -> Node:
+    """
+    Build a node from JSON read incrementally from `source`: a binary or
+    text file, or an iterable of `bytes` or `str` chunks. The result is the
+    same as `Node.from_json` on the whole input, with the same meaning for
+    `trusted`.
+    """
+    reader = _Reader(_read_chunks(source, chunk_size))
+    # The bottom frame collects the result.
+    result: list[Node] = []
+    frames = [_Frame(result, True)]
+    # Whether the next token starts a node.
+    at_node = True
+    while True:
+        if at_node:
+            if reader.next() != "{" or reader.peek() != '"':
+                msg = "Invalid input for Node.from_json"
+                raise ValueError(msg)
+            frames.append(_Frame([]))
+            at_node = _member(reader, frames[-1])
+            continue
+        frame = frames[-1]
+        char = reader.next()
+        if frame.in_content:
+            if char == ",":
+                at_node = True
+            elif char == "]":
+                frame.in_content = False
+            else:
+                msg = f"Unexpected character in JSON input: {char!r}"
+                raise ValueError(msg)
+        elif char == ",":
+            at_node = _member(reader, frame)
+        elif char == "}":
+            frames.pop()
+            frames[-1].built.append(_build(schema, frame.fields, frame.built, trusted))
+            if len(frames) == 1:
+                break
+        else:
+            msg = f"Unexpected character in JSON input: {char!r}"
+            raise ValueError(msg)
+    if reader.peek():
+        msg = "Unexpected data after JSON input"
+        raise ValueError(msg)
+    return result[0]
+
+
+def _member(reader: _Reader, frame: _Frame) -> bool:
+    """
+    Read an object member into `frame`, returning whether it starts a
+    non-empty content list.
+    """
+    key = reader.value()
+    if not isinstance(key, str) or reader.next() != ":":
+        msg = "Expected ':' in JSON object"
+        raise ValueError(msg)
+    if key != "content":
+        frame.fields[key] = reader.value()
+        return False
+    if reader.peek() != "[":
+        if reader.value():
+            msg = "Invalid input for Fragment.from_json"
+            raise ValueError(msg)
+        return False
+    reader.next()
+    if reader.peek() == "]":
+        reader.next()
+        return False
+    frame.in_content = True
+    return True
+
+
+def _build(
+    schema: "Schema[Any, Any]",
+    fields: dict[str, JSON],
+    content: list[Node],
+    trusted: bool,
+) -> Node:
+    marks = None
+    if fields.get("marks"):
+        if not isinstance(fields["marks"], list):
+            msg = "Invalid mark data for Node.fromJSON"
+            raise ValueError(msg)
+        marks = [
+            Mark.from_json(schema, cast(JSONDict, item), trusted)
+            for item in fields["marks"]
+        ]
+    fragment = Fragment(content) if content else Fragment.empty
+    attrs = cast(Attrs, fields.get("attrs"))
+    if trusted:
+        if fields["type"] == "text":
+            return schema.text_trusted(str(fields["text"]), marks)
+        return schema.node_type(str(fields["type"])).create_trusted(
+            attrs, fragment, marks
+        )
+    if fields["type"] == "text":
+        return schema.text(str(fields["text"]), marks)
+    return schema.node_type(str(fields["type"])).create(attrs, fragment, marks)
+
+
+def iter_text(
+    schema: "Schema[Any, Any]",
+    json_data: JSONDict | RawJSON,
+    block_separator: str = "",
+    leaf_text: Callable[[Node], str] | str = "",
+) -> Iterator[str]:
+    """
+    Yield the pieces of text that `node.text_between(0, node.content.size,
+    block_separator, leaf_text)` joins, for the node serialized in
+    `json_data`, without building the node. Only leaf nodes passed to a
+    `leaf_text` function or a `leafText` spec are built.
+    """
+    if isinstance(json_data, RawJSON):
+        json_data = cast(JSONDict, loads(json_data))
+    if json_data.get("type") == "text":
+        yield str(json_data["text"])
+        return
+    separated = True
+    # The nodes still to visit, in reverse document order.
+    stack = list(reversed(cast(list[JSONDict], json_data.get("content") or [])))
+    while stack:
+        data = stack.pop()
+        name = data["type"]
+        if name == "text":
+            yield cast(str, data["text"])
+            separated = not block_separator
+            continue
+        type = schema.node_type(cast(str, name))
+        if type.is_leaf:
+            if leaf_text:
+                yield (
+                    leaf_text(Node.from_json(schema, data))
+                    if callable(leaf_text)
+                    else leaf_text
+                )
+            elif (node_leaf_text := type.spec.get("leafText")) is not None:
+                yield node_leaf_text(Node.from_json(schema, data))
+            separated = not block_separator
+            continue
+        if not separated and type.is_block:
+            yield block_separator
+            separated = True
+        children = data.get("content")
+        if children:
+            stack.extend(reversed(cast(list[JSONDict], children)))
+
+
+def text_from_json(
+    schema: "Schema[Any, Any]",
+    json_data: JSONDict | RawJSON,
+    block_separator: str = "",
+    leaf_text: Callable[[Node], str] | str = "",
+) -> str:
+    """
+    The text of the node serialized in `json_data`, as returned by
+    `text_between` over its whole content, without building the node.
+    """
+    return "".join(iter_text(schema, json_data, block_separator, leaf_text))
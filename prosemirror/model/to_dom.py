@@ -6,6 +6,7 @@ from typing import (
     cast,
 )
 
+from .blob import Blob
 from .fragment import Fragment
 from .mark import Mark
 from .node import Node
@@ -170,6 +171,8 @@ class DOMSerializer:
                 if " " in name[1:]:
                     msg = "XML namespaces are not supported"
                     raise NotImplementedError(msg)
+                if isinstance(value, Blob):
+                    value = cast(str, value.value)
                 dom.attrs[name] = value
         for i in range(start, len(structure)):
             child = structure[i]
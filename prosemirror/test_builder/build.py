@@ -4,11 +4,20 @@ import contextlib
 import re
 from collections.abc import Callable
 from typing import Any
+from weakref import WeakKeyDictionary
 
 from prosemirror.model import Node, NodeType, Schema
 from prosemirror.utils import Attrs, JSONDict
 
-NO_TAG = Node.tag = {}
+NO_TAG = {}
+
+# Nodes don't have a `__dict__`, so the tags the builders attach to them
+# are kept in a side table.
+tags = WeakKeyDictionary()
+Node.tag = property(
+    lambda node: tags.get(node, NO_TAG),
+    lambda node, tag: tags.__setitem__(node, tag),
+)
 
 
 def flatten(
@@ -24,7 +33,7 @@ def flatten(
                 tag = {}
             for id in child.tag:
                 tag[id] = child.tag[id] + (0 if child.is_text else 1) + pos
-        if isinstance(child, dict) and "tag" in child and child["tag"] != Node.tag:
+        if isinstance(child, dict) and "tag" in child and child["tag"] != NO_TAG:
             if tag == NO_TAG:
                 tag = {}
             for id in child["tag"]:
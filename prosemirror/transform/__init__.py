@@ -8,7 +8,14 @@ from .replace import (
     replace_step,
 )
 from .replace_step import ReplaceAroundStep, ReplaceStep
-from .step import Step, StepResult
+from .step import (
+    Step,
+    StepResult,
+    steps_from_binary,
+    steps_from_json,
+    steps_to_binary,
+    steps_to_json_bytes,
+)
 from .structure import (
     can_join,
     can_split,
@@ -46,4 +53,8 @@ __all__ = [
     "join_point",
     "lift_target",
     "replace_step",
+    "steps_from_binary",
+    "steps_from_json",
+    "steps_to_binary",
+    "steps_to_json_bytes",
 ]
@@ -1,6 +1,8 @@
 from typing import Any, cast
 
+from prosemirror.codec import RawJSON, loads
 from prosemirror.model import Fragment, Node, Schema, Slice
+from prosemirror.model.blob import blob_json
 from prosemirror.transform.map import Mappable, StepMap
 from prosemirror.transform.step import Step, StepResult, step_json_id
 from prosemirror.utils import JSON, JSONDict
@@ -46,15 +48,15 @@ class AttrStep(Step):
             "stepType": "attr",
             "pos": self.pos,
             "attr": self.attr,
-            "value": self.value,
+            "value": blob_json(self.value),
         }
 
     @staticmethod
-    def from_json(schema: Schema[Any, Any], json_data: JSONDict | str) -> "AttrStep":
-        if isinstance(json_data, str):
-            import json
-
-            json_data = cast(JSONDict, json.loads(json_data))
+    def from_json(
+        schema: Schema[Any, Any], json_data: JSONDict | RawJSON
+    ) -> "AttrStep":
+        if isinstance(json_data, RawJSON):
+            json_data = cast(JSONDict, loads(json_data))
 
         if not isinstance(json_data["pos"], int) or not isinstance(
             json_data["attr"],
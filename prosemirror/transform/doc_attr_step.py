@@ -1,6 +1,8 @@
 from typing import Any, cast
 
+from prosemirror.codec import RawJSON, loads
 from prosemirror.model import Node, Schema
+from prosemirror.model.blob import blob_json
 from prosemirror.transform.map import Mappable, StepMap
 from prosemirror.transform.step import Step, StepResult, step_json_id
 from prosemirror.utils import JSON, JSONDict
@@ -33,17 +35,17 @@ class DocAttrStep(Step):
         json_data = {
             "stepType": "docAttr",
             "attr": self.attr,
-            "value": self.value,
+            "value": blob_json(self.value),
         }
 
         return json_data
 
     @staticmethod
-    def from_json(schema: Schema[Any, Any], json_data: JSONDict | str) -> "DocAttrStep":
-        if isinstance(json_data, str):
-            import json
-
-            json_data = cast(JSONDict, json.loads(json_data))
+    def from_json(
+        schema: Schema[Any, Any], json_data: JSONDict | RawJSON
+    ) -> "DocAttrStep":
+        if isinstance(json_data, RawJSON):
+            json_data = cast(JSONDict, loads(json_data))
 
         if not isinstance(json_data["attr"], str):
             msg = "Invalid input for DocAttrStep.from_json"
@@ -1,6 +1,7 @@
 from collections.abc import Callable
 from typing import Any, cast
 
+from prosemirror.codec import RawJSON, loads
 from prosemirror.model import Fragment, Mark, Node, Schema, Slice
 from prosemirror.transform.map import Mappable
 from prosemirror.transform.step import Step, StepResult, step_json_id
@@ -12,15 +13,29 @@ def map_fragment(
     f: Callable[[Node, Node, int], Node],
     parent: Node,
 ) -> Fragment:
-    mapped = []
-    for i in range(fragment.child_count):
-        child = fragment.child(i)
-        if getattr(child.content, "size", None):
-            child = child.copy(map_fragment(child.content, f, child))
+    # Each frame holds a fragment, its parent node and the children mapped
+    # so far. Children with content are mapped before they are passed to
+    # `f` themselves.
+    frames: list[tuple[Fragment, Node, list[Node]]] = [(fragment, parent, [])]
+    while True:
+        fragment, parent, mapped = frames[-1]
+        i = len(mapped)
+        if i < fragment.child_count:
+            child = fragment.child(i)
+            if child.content.size:
+                frames.append((child.content, child, []))
+                continue
+        else:
+            frames.pop()
+            result = fragment.from_array(mapped)
+            if not frames:
+                return result
+            child = parent.copy(result)
+            fragment, parent, mapped = frames[-1]
+            i = len(mapped)
         if child.is_inline:
             child = f(child, parent, i)
         mapped.append(child)
-    return fragment.from_array(mapped)
 
 
 class AddMarkStep(Step):
@@ -82,11 +97,11 @@ class AddMarkStep(Step):
         }
 
     @staticmethod
-    def from_json(schema: Schema[Any, Any], json_data: JSONDict | str) -> "AddMarkStep":
-        if isinstance(json_data, str):
-            import json
-
-            json_data = cast(JSONDict, json.loads(json_data))
+    def from_json(
+        schema: Schema[Any, Any], json_data: JSONDict | RawJSON
+    ) -> "AddMarkStep":
+        if isinstance(json_data, RawJSON):
+            json_data = cast(JSONDict, loads(json_data))
 
         if not isinstance(json_data["from"], int) or not isinstance(
             json_data["to"],
@@ -157,11 +172,9 @@ class RemoveMarkStep(Step):
         }
 
     @staticmethod
-    def from_json(schema: Schema[Any, Any], json_data: JSONDict | str) -> Step:
-        if isinstance(json_data, str):
-            import json
-
-            json_data = cast(JSONDict, json.loads(json_data))
+    def from_json(schema: Schema[Any, Any], json_data: JSONDict | RawJSON) -> Step:
+        if isinstance(json_data, RawJSON):
+            json_data = cast(JSONDict, loads(json_data))
 
         if not isinstance(json_data["from"], int) or not isinstance(
             json_data["to"],
@@ -220,11 +233,9 @@ class AddNodeMarkStep(Step):
         }
 
     @staticmethod
-    def from_json(schema: Schema[Any, Any], json_data: JSONDict | str) -> Step:
-        if isinstance(json_data, str):
-            import json
-
-            json_data = cast(JSONDict, json.loads(json_data))
+    def from_json(schema: Schema[Any, Any], json_data: JSONDict | RawJSON) -> Step:
+        if isinstance(json_data, RawJSON):
+            json_data = cast(JSONDict, loads(json_data))
 
         if not isinstance(json_data["pos"], int):
             msg = "Invalid input for AddNodeMarkStep.from_json"
@@ -278,11 +289,9 @@ class RemoveNodeMarkStep(Step):
         }
 
     @staticmethod
-    def from_json(schema: Schema[Any, Any], json_data: JSONDict | str) -> Step:
-        if isinstance(json_data, str):
-            import json
-
-            json_data = cast(JSONDict, json.loads(json_data))
+    def from_json(schema: Schema[Any, Any], json_data: JSONDict | RawJSON) -> Step:
+        if isinstance(json_data, RawJSON):
+            json_data = cast(JSONDict, loads(json_data))
 
         if not isinstance(json_data["pos"], int):
             msg = "Invalid input for RemoveNodeMarkStep.from_json"
@@ -1,5 +1,6 @@
 from typing import Any, Optional, cast
 
+from prosemirror.codec import RawJSON, loads
 from prosemirror.model import Node, Schema, Slice
 from prosemirror.transform.map import Mappable, StepMap
 from prosemirror.transform.step import Step, StepResult, step_json_id
@@ -95,11 +96,11 @@ class ReplaceStep(Step):
         return json_data
 
     @staticmethod
-    def from_json(schema: Schema[Any, Any], json_data: JSONDict | str) -> "ReplaceStep":
-        if isinstance(json_data, str):
-            import json
-
-            json_data = cast(JSONDict, json.loads(json_data))
+    def from_json(
+        schema: Schema[Any, Any], json_data: JSONDict | RawJSON
+    ) -> "ReplaceStep":
+        if isinstance(json_data, RawJSON):
+            json_data = cast(JSONDict, loads(json_data))
 
         if not isinstance(json_data["from"], int) or not isinstance(
             json_data["to"],
@@ -218,12 +219,10 @@ class ReplaceAroundStep(Step):
     @staticmethod
     def from_json(
         schema: Schema[Any, Any],
-        json_data: JSONDict | str,
+        json_data: JSONDict | RawJSON,
     ) -> "ReplaceAroundStep":
-        if isinstance(json_data, str):
-            import json
-
-            json_data = cast(JSONDict, json.loads(json_data))
+        if isinstance(json_data, RawJSON):
+            json_data = cast(JSONDict, loads(json_data))
 
         if (
             not isinstance(json_data["from"], int)
@@ -1,9 +1,12 @@
 import abc
+from collections.abc import Iterable
 from typing import Any, Literal, Optional, TypeVar, cast, overload
 
+from prosemirror.codec import RawJSON, dumps, loads
 from prosemirror.model import Node, ReplaceError, Schema, Slice
+from prosemirror.model.binary import decode_value, encode_value
 from prosemirror.transform.map import Mappable, StepMap
-from prosemirror.utils import JSONDict
+from prosemirror.utils import JSONDict, JSONList
 
 # like a registry
 STEPS_BY_ID: dict[str, type["Step"]] = {}
@@ -31,12 +34,23 @@ class Step(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def to_json(self) -> JSONDict: ...
 
+    def to_json_bytes(self) -> bytes:
+        return dumps(self.to_json())
+
+    def to_binary(self) -> bytes:
+        return encode_value(self.to_json())
+
     @staticmethod
-    def from_json(schema: Schema[Any, Any], json_data: JSONDict | str) -> "Step":
-        if isinstance(json_data, str):
-            import json
+    def from_binary(
+        schema: Schema[Any, Any],
+        data: bytes | bytearray | memoryview,
+    ) -> "Step":
+        return Step.from_json(schema, cast(JSONDict, decode_value(schema, data)))
 
-            json_data = cast(JSONDict, json.loads(json_data))
+    @staticmethod
+    def from_json(schema: Schema[Any, Any], json_data: JSONDict | RawJSON) -> "Step":
+        if isinstance(json_data, RawJSON):
+            json_data = cast(JSONDict, loads(json_data))
 
         if not json_data or not json_data.get("stepType"):
             msg = "Invalid inpit for Step.from_json"
@@ -59,6 +73,43 @@ def step_json_id(id: str, step_class: type[StepSubclass]) -> type[StepSubclass]:
     return step_class
 
 
+def steps_to_json_bytes(steps: Iterable[Step]) -> bytes:
+    """
+    Serialize a list of steps to a UTF-8 encoded JSON array.
+    """
+    return dumps([step.to_json() for step in steps])
+
+
+def steps_from_json(
+    schema: Schema[Any, Any],
+    json_data: JSONList | RawJSON,
+) -> list[Step]:
+    """
+    Deserialize a JSON array of steps, as produced by
+    `steps_to_json_bytes`.
+    """
+    if isinstance(json_data, RawJSON):
+        json_data = cast(JSONList, loads(json_data))
+    if not isinstance(json_data, list):
+        msg = "Invalid input for steps_from_json"
+        raise ValueError(msg)
+    return [Step.from_json(schema, cast(JSONDict, item)) for item in json_data]
+
+
+def steps_to_binary(steps: Iterable[Step]) -> bytes:
+    """
+    Encode a list of steps in the compact [binary format](#model.binary).
+    """
+    return encode_value([step.to_json() for step in steps])
+
+
+def steps_from_binary(
+    schema: Schema[Any, Any],
+    data: bytes | bytearray | memoryview,
+) -> list[Step]:
+    return steps_from_json(schema, cast(JSONList, decode_value(schema, data)))
+
+
 class StepResult:
     @overload
     def __init__(self, doc: Node, failed: Literal[None]) -> None: ...
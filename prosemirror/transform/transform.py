@@ -93,11 +93,9 @@ class Transform:
         removing: RemoveMarkStep | None = None
         adding: AddMarkStep | None = None
 
-        def iteratee(node: Node, pos: int, parent: Node | None, i: int) -> None:
-            nonlocal removing
-            nonlocal adding
+        for node, pos, parent, _ in self.doc.iter_between(from_, to):
             if not node.is_inline:
-                return
+                continue
             marks = node.marks
             if (
                 not mark.is_in_set(marks)
@@ -124,7 +122,6 @@ class Transform:
                     adding = AddMarkStep(start, end, mark)
                     added.append(adding)
 
-        self.doc.nodes_between(from_, to, iteratee)
         item: Step
         for item in removed:
             self.step(item)
@@ -147,10 +144,9 @@ class Transform:
         matched: list[MatchedTypedDict] = []
         step = 0
 
-        def iteratee(node: Node, pos: int, parent: Node | None, i: int) -> bool | None:
-            nonlocal step
+        for node, pos, _, _ in self.doc.iter_between(from_, to):
             if not node.is_inline:
-                return None
+                continue
             step += 1
             to_remove = None
             if isinstance(mark, MarkType):
@@ -185,9 +181,7 @@ class Transform:
                             "to": end,
                             "step": step,
                         })
-            return None
 
-        self.doc.nodes_between(from_, to, iteratee)
         for item in matched:
             self.step(RemoveMarkStep(item["from_"], item["to"], item["style"]))
         return self
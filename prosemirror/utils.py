@@ -1,5 +1,6 @@
+from bisect import bisect_left
 from collections.abc import Mapping, Sequence
-from typing import TypeAlias
+from typing import Any, NoReturn, TypeAlias
 
 JSONDict: TypeAlias = Mapping[str, "JSON"]
 JSONList: TypeAlias = Sequence["JSON"]
@@ -9,5 +10,106 @@ JSON: TypeAlias = JSONDict | JSONList | str | int | float | bool | None
 Attrs: TypeAlias = JSONDict
 
 
+def _immutable(self: object, *args: object, **kwargs: object) -> NoReturn:
+    msg = f"{self.__class__.__name__} objects are immutable"
+    raise TypeError(msg)
+
+
+class FrozenDict(dict[str, JSON]):
+    """
+    An immutable, hashable `dict`, used for the attributes of nodes and
+    marks so that they can be shared instead of copied. It compares equal
+    to a plain `dict` with the same items and serializes like one.
+    """
+
+    __slots__ = ("__weakref__", "_hash")
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __hash__(self) -> int:  # type: ignore[override]
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash: int = hash(frozenset(self.items()))
+            return self._hash
+
+    def __copy__(self) -> "FrozenDict":
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "FrozenDict":
+        return self
+
+    def __reduce__(self) -> tuple[type["FrozenDict"], tuple[dict[str, JSON]]]:
+        return (self.__class__, (dict(self),))
+
+
+class FrozenList(list[JSON]):
+    """
+    The immutable, hashable `list` used for lists nested in frozen
+    attributes (see `freeze`).
+    """
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+    append = clear = extend = insert = pop = remove = reverse = sort = _immutable
+
+    def __hash__(self) -> int:  # type: ignore[override]
+        return hash(tuple(self))
+
+    def __copy__(self) -> "FrozenList":
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "FrozenList":
+        return self
+
+    def __reduce__(self) -> tuple[type["FrozenList"], tuple[list[JSON]]]:
+        return (self.__class__, (list(self),))
+
+
+def freeze(value: JSON) -> JSON:
+    """
+    Return an immutable version of a JSON value, converting dicts and
+    lists (recursively) into `FrozenDict` and `FrozenList`.
+    """
+    if isinstance(value, FrozenDict | FrozenList):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return FrozenList([freeze(item) for item in value])
+    return value
+
+
 def text_length(text: str) -> int:
+    """
+    The length of `text` in UTF-16 code units, which is how ProseMirror
+    measures positions inside text.
+    """
+    if text.isascii():
+        return len(text)
     return len(text.encode("utf-16-le")) // 2
+
+
+def surrogate_offsets(text: str) -> tuple[int, ...]:
+    """
+    The UTF-16 offsets of all characters of `text` outside the Basic
+    Multilingual Plane, i.e. those that take up two UTF-16 code units.
+    """
+    offsets = []
+    extra = 0
+    for index, char in enumerate(text):
+        if char > "\uffff":
+            offsets.append(index + extra)
+            extra += 1
+    return tuple(offsets)
+
+
+def utf16_to_index(surrogates: tuple[int, ...], offset: int) -> int:
+    """
+    Convert a UTF-16 `offset` into an index into the string described by
+    `surrogates` (see `surrogate_offsets`). Offsets pointing into the
+    middle of a surrogate pair are rounded down.
+    """
+    return offset - bisect_left(surrogates, offset)
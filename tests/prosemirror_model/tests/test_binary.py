@@ -0,0 +1,176 @@
+import gc
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from prosemirror.model import Node, Slice
+from prosemirror.model.binary import (
+    decode_value,
+    encode_value,
+    map_node,
+    open_shared_node,
+    share_node,
+)
+from prosemirror.test_builder import out
+from prosemirror.test_builder import test_schema as schema
+
+doc = out["doc"]
+blockquote = out["blockquote"]
+h1 = out["h1"]
+p = out["p"]
+li = out["li"]
+ul = out["ul"]
+em = out["em"]
+strong = out["strong"]
+code = out["code"]
+a = out["a"]
+br = out["br"]
+hr = out["hr"]
+img = out["img"]
+
+
+@pytest.mark.parametrize(
+    "node",
+    [
+        doc(p()),
+        doc(p("foo")),
+        doc(p("foo", em("bar", strong("baz")), " ", a("x"), code("y"))),
+        doc(h1("title"), p("a", br, img, "b"), hr, p("c")),
+        doc(blockquote(ul(li(p("a"), p("b")), li(p(img))), p("c")), p("d")),
+        doc(p("café \U0001f600 中文")),
+    ],
+)
+def test_round_trip(node):
+    data = node.to_binary()
+    decoded = Node.from_binary(schema, data)
+    assert decoded.eq(node)
+    assert decoded.to_json() == node.to_json()
+    assert Node.from_binary(schema, memoryview(data)).eq(node)
+
+
+def test_is_smaller_than_json():
+    node = doc(*[p("foo ", em("bar"), a("baz")) for _ in range(50)])
+    assert len(node.to_binary()) * 3 < len(node.to_json_bytes())
+
+
+def test_round_trips_slices():
+    node = doc(blockquote(p("foo", em("bar"))), p("baz"))
+    for from_, to in [(2, 8), (0, node.content.size), (3, 3)]:
+        slice = node.slice(from_, to)
+        assert Slice.from_binary(schema, slice.to_binary()).eq(slice)
+
+
+def test_round_trips_deep_documents():
+    node = doc(p("x"))
+    for _ in range(sys.getrecursionlimit() + 100):
+        node = doc(blockquote(*node.content.content))
+    decoded = Node.from_binary(schema, node.to_binary())
+    assert decoded.content.find_diff_start(node.content) is None
+
+
+def test_decodes_lazily():
+    node = doc(h1("title"), blockquote(p("a", em("b"))), p("c"), hr)
+    lazy = Node.from_binary(schema, node.to_binary(), lazy=True)
+    assert lazy.content.size == node.content.size
+    assert lazy.child_count == 4
+    assert not lazy.content.materialized
+    quote = lazy.child(1)
+    assert lazy.content.materialized
+    assert not quote.content.materialized
+    assert lazy.child(2).text_content == "c"
+    assert not quote.content.materialized
+    assert lazy.text_between(0, lazy.content.size, " ") == "title ab c"
+    assert quote.content.materialized
+    assert lazy.eq(node)
+    assert lazy.to_json() == node.to_json()
+
+
+def test_maps_files(tmp_path):
+    node = doc(h1("title"), *[p("foo ", em("bar")) for _ in range(20)])
+    path = tmp_path / "doc.pmb"
+    path.write_bytes(node.to_binary())
+    mapped = map_node(schema, path)
+    assert mapped.content.size == node.content.size
+    assert mapped.child(0).text_content == "title"
+    assert mapped.eq(node)
+    edited = mapped.replace(1, 2, node.slice(3, 5))
+    assert edited.child(0).text_content == "tlitle"
+
+
+def shared_text(name):
+    return open_shared_node(schema, name).text_between(0, 20, "|")
+
+
+def test_shares_documents_between_processes():
+    node = doc(h1("title"), blockquote(p("a", em("b"))), *[p("c") for _ in range(9)])
+    shared = share_node(node)
+    try:
+        opened = open_shared_node(schema, shared.name)
+        assert opened.content.size == node.content.size
+        assert not opened.content.materialized
+        assert opened.eq(node)
+        del opened
+        gc.collect()
+        with ProcessPoolExecutor(2) as executor:
+            texts = list(executor.map(shared_text, [shared.name] * 2))
+        assert texts == [node.text_between(0, 20, "|")] * 2
+    finally:
+        shared.close()
+        shared.unlink()
+
+
+def test_independent_process_leaves_shared_block():
+    node = doc(p("a"), p("b", em("c")))
+    shared = share_node(node)
+    code = (
+        "import sys\n"
+        "from prosemirror.model.binary import open_shared_node\n"
+        "from prosemirror.test_builder import test_schema\n"
+        "print(open_shared_node(test_schema, sys.argv[1]).text_content)\n"
+    )
+    try:
+        result = subprocess.run(
+            [sys.executable, "-c", code, shared.name],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        assert result.stdout == "abc\n"
+        assert not result.stderr
+        assert open_shared_node(schema, shared.name).eq(node)
+    finally:
+        shared.close()
+        shared.unlink()
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        None,
+        True,
+        False,
+        0,
+        -1,
+        2**70,
+        -(2**70),
+        1.5,
+        1.0,
+        "",
+        "\U0001f600",
+        [1, "a", [None]],
+        {"a": {"b": [1.0, 2]}, "c": "a"},
+    ],
+)
+def test_round_trips_values(value):
+    decoded = decode_value(schema, encode_value(value))
+    assert decoded == value
+    assert type(decoded) is type(value)
+
+
+def test_rejects_invalid_input():
+    with pytest.raises(ValueError, match="Invalid input"):
+        Node.from_binary(schema, b"{}")
+    with pytest.raises(ValueError, match="kind"):
+        Node.from_binary(schema, doc(p()).slice(0, 2).to_binary())
@@ -0,0 +1,144 @@
+import io
+import pickle
+
+import pytest
+
+from prosemirror.model import DOMSerializer, Node, Schema, from_html
+from prosemirror.model.blob import Blob, externalize_blobs, inline_blobs
+from prosemirror.model.stream import iter_json, load_json
+from prosemirror.schema.basic import schema as basic_schema
+from prosemirror.transform import AttrStep, Step
+
+schema = Schema({
+    "nodes": {
+        "doc": {"content": "paragraph+"},
+        "paragraph": {"content": "(text|image)*"},
+        "text": {},
+        "image": {
+            "inline": True,
+            "attrs": {"src": {"blob": True}, "alt": {"default": None}},
+        },
+    },
+    "marks": {"comment": {"attrs": {"body": {"blob": True}}}},
+})
+
+src = "data:image/png;base64," + "A" * 10000
+body = {"author": "x", "text": "y" * 1000}
+
+
+def image(src, alt=None):
+    return schema.node("image", {"src": src, "alt": alt})
+
+
+def make_doc():
+    comment = schema.mark("comment", {"body": body})
+    return schema.node(
+        "doc",
+        None,
+        [
+            schema.node(
+                "paragraph", None, [image(src, "a"), schema.text("hi", [comment])]
+            ),
+            schema.node("paragraph", None, [image(src, "b")]),
+        ],
+    )
+
+
+class TestBlob:
+    def test_shares_values(self):
+        doc = make_doc()
+        first, second = doc.child(0).child(0), doc.child(1).child(0)
+        assert isinstance(first.attrs["src"], Blob)
+        assert first.attrs["src"] is second.attrs["src"]
+        assert first.attrs["src"] is image(src).attrs["src"]
+
+    def test_compares_by_digest(self):
+        blob = schema.blob(src)
+        assert blob == Blob(src)
+        assert blob != Blob(src + "A")
+        assert blob != src
+        assert blob.value == src
+        assert hash(blob) == hash(Blob(src))
+        assert image(src).eq(image(src))
+        assert not image(src).eq(image(src + "A"))
+
+    def test_has_markup_with_plain_values(self):
+        node = image(src, "a")
+        type = schema.nodes["image"]
+        assert node.has_markup(type, {"src": src, "alt": "a"})
+        assert node.has_markup(type, {"src": schema.blob(src), "alt": "a"})
+        assert not node.has_markup(type, {"src": src + "A", "alt": "a"})
+        assert node.same_markup(image(src, "a"))
+
+    def test_round_trips_dom(self):
+        nodes = dict(basic_schema.spec["nodes"])
+        attrs = {**nodes["image"]["attrs"], "src": {"blob": True}}
+        nodes["image"] = {**nodes["image"], "attrs": attrs}
+        blob_schema = Schema({"nodes": nodes, "marks": basic_schema.spec["marks"]})
+        paragraph = blob_schema.node(
+            "paragraph", None, [blob_schema.node("image", {"src": src})]
+        )
+        doc = blob_schema.node("doc", None, [paragraph])
+        dom = DOMSerializer.from_schema(blob_schema).serialize_fragment(doc.content)
+        assert str(dom) == f'<p><img src="{src}"></p>'
+        parsed = Node.from_json(blob_schema, from_html(blob_schema, str(dom)))
+        assert isinstance(parsed.child(0).child(0).attrs["src"], Blob)
+        assert parsed.eq(doc)
+
+    def test_inlines_values_by_default(self):
+        doc = make_doc()
+        json = doc.to_json()
+        assert json["content"][0]["content"][0]["attrs"] == {"src": src, "alt": "a"}
+        assert json["content"][0]["content"][1]["marks"] == [
+            {"type": "comment", "attrs": {"body": body}}
+        ]
+        assert b"".join(iter_json(doc)) == doc.to_json_bytes()
+        assert Node.from_json(schema, json).eq(doc)
+
+    def test_externalizes_values(self):
+        doc = make_doc()
+        with externalize_blobs() as store:
+            json = doc.to_json()
+            raw = b"".join(iter_json(doc))
+        digest = schema.blob(src).digest
+        assert json["content"][1]["content"][0]["attrs"] == {
+            "src": {"$blob": digest},
+            "alt": "b",
+        }
+        assert len(store) == 2
+        assert store[digest] == src
+        assert Node.from_json(schema, json).eq(doc)
+        assert load_json(schema, io.BytesIO(raw)).eq(doc)
+
+    def test_resolves_references_from_a_store(self):
+        doc = make_doc()
+        with externalize_blobs() as store:
+            json = doc.to_json()
+        other = Schema(schema.spec)
+        with pytest.raises(ValueError, match="Unknown blob"):
+            Node.from_json(other, json)
+        with inline_blobs(store):
+            copy = Node.from_json(other, json)
+        assert copy.to_json() == doc.to_json()
+
+    def test_round_trips_binary_and_pickle(self):
+        doc = make_doc()
+        copy = Node.from_binary(schema, doc.to_binary())
+        assert copy.eq(doc)
+        assert copy.child(0).child(0).attrs["src"] is doc.child(0).child(0).attrs["src"]
+        schema.register("blob test")
+        try:
+            assert pickle.loads(pickle.dumps(doc)).eq(doc)
+        finally:
+            del Schema.registry["blob test"]
+
+    def test_steps_serialize_values(self):
+        doc = make_doc()
+        step = AttrStep(1, "src", "other")
+        inverted = step.invert(doc)
+        assert inverted.to_json()["value"] == src
+        with externalize_blobs() as store:
+            json = inverted.to_json()
+        assert store == {schema.blob(src).digest: src}
+        applied = step.apply(doc).doc
+        assert Step.from_json(schema, json).apply(applied).doc.eq(doc)
@@ -1,6 +1,8 @@
 import pytest
 
-from prosemirror.model import ContentMatch, Node
+from prosemirror.codec import dumps, loads
+from prosemirror.model import ContentMatch, Fragment, Node, Schema, content
+from prosemirror.model.rope import Rope
 from prosemirror.test_builder import out
 from prosemirror.test_builder import test_schema as schema
 
@@ -296,3 +298,123 @@ def test_fill3_before(expr, before, mid, after, left, right):
         assert b.eq(right.content)
     else:
         assert not b
+
+
+def test_match_type_by_name_across_schemas():
+    other = Schema(schema.spec)
+    m = get("paragraph+ horizontal_rule")
+    assert (
+        m.match_type(schema.nodes["paragraph"])
+        is m.transitions[schema.nodes["paragraph"]]
+    )
+    after = m.match_type(other.nodes["paragraph"])
+    assert after is m.match_type(schema.nodes["paragraph"])
+    assert after.match_type(other.nodes["horizontal_rule"]).valid_end
+    assert not m.match_type(other.nodes["image"])
+
+
+def test_match_fragment_remembers_rope_matches():
+    old = Fragment.rope_threshold
+    Fragment.rope_threshold = 8
+    try:
+        d = doc(*[p(str(i)) if i % 5 else hr() for i in range(1000)])
+        rope = d.content.content
+        assert isinstance(rope, Rope)
+        m = d.type.content_match
+        assert m.match_fragment(d.content).valid_end
+        assert rope.matches == {m: m.match_fragment(d.content)}
+        for start, end in [(0, 1), (3, 900), (64, 128), (500, 1000)]:
+            expected = m
+            for i in range(start, end):
+                expected = expected.match_type(d.child(i).type)
+            assert m.match_fragment(d.content, start, end) is expected
+        edited = d.copy(d.content.replace_child(500, p("x")))
+        shared = edited.content.content.items[-1]
+        assert shared is rope.items[-1]
+        assert shared.matches
+        assert edited.check() is None
+        broken = d.content.replace_child(10, schema.text("x"))
+        assert not m.match_fragment(broken)
+    finally:
+        Fragment.rope_threshold = old
+
+
+def test_precompute_fills_tables():
+    def names(types):
+        return None if types is None else [t.name for t in types]
+
+    eager = Schema(schema.spec).precompute()
+    lazy = Schema(schema.spec)
+    for name, type in eager.nodes.items():
+        states = type.content_match.states()
+        lazy_states = lazy.nodes[name].content_match.states()
+        assert len(states) == len(lazy_states)
+        for state, lazy_state in zip(states, lazy_states, strict=True):
+            if state.next:
+                assert set(state.wrap_cache) == set(eager.nodes.values())
+                assert None in state.fill_cache
+            for target in eager.nodes:
+                assert names(state.find_wrapping(eager.nodes[target])) == names(
+                    lazy_state.find_wrapping(lazy.nodes[target])
+                )
+                assert [
+                    names(path.types) for path in state.fill_paths(eager.nodes[target])
+                ] == [
+                    names(path.types)
+                    for path in lazy_state.fill_paths(lazy.nodes[target])
+                ]
+
+
+def test_minimizes_states():
+    m = get("paragraph horizontal_rule | heading horizontal_rule")
+    assert len(m.states()) == 3
+    assert m.match_type(schema.nodes["paragraph"]) is m.match_type(
+        schema.nodes["heading"]
+    )
+    assert match(
+        "paragraph horizontal_rule | heading horizontal_rule", "heading horizontal_rule"
+    )
+    assert not match("paragraph horizontal_rule | heading horizontal_rule", "heading")
+
+
+def test_shares_compiled_content_between_schemas(tmp_path):
+    saved = dict(content.compiled_content)
+    try:
+        content.compiled_content.clear()
+        first = Schema(schema.spec)
+        assert content.compiled_content
+        second = Schema(schema.spec)
+        for name, type in first.nodes.items():
+            other = second.nodes[name]
+            assert str(type.content_match) == str(other.content_match)
+            assert type.is_leaf == other.is_leaf
+            if not type.is_leaf:
+                assert type.content_match is not other.content_match
+                assert (
+                    other.content_match.next[0].type
+                    is second.nodes[other.content_match.next[0].type.name]
+                )
+        path = tmp_path / "content.json"
+        content.dump_compiled_content(path)
+        tables = dict(content.compiled_content)
+        content.compiled_content.clear()
+        content.load_compiled_content(path)
+        assert content.compiled_content == loads(dumps(tables))
+        content.compiled_content.clear()
+        for data in [tables, {"version": 0, "tables": tables}]:
+            path.write_bytes(dumps(data))
+            content.load_compiled_content(path)
+            assert not content.compiled_content
+        third = Schema(schema.spec)
+        assert str(third.nodes["doc"].content_match) == str(
+            first.nodes["doc"].content_match
+        )
+        nodes = dict(schema.spec["nodes"])
+        nodes["horizontal_rule"] = {}
+        regrouped = Schema({**schema.spec, "nodes": nodes})
+        doc_types = [e.type.name for e in regrouped.nodes["doc"].content_match.next]
+        assert "horizontal_rule" not in doc_types
+        assert "paragraph" in doc_types
+    finally:
+        content.compiled_content.clear()
+        content.compiled_content.update(saved)
@@ -1,5 +1,9 @@
+import subprocess
+import sys
+
 import pytest
 
+import prosemirror.model
 from prosemirror.model import DOMSerializer
 from prosemirror.model.from_dom import from_html
 from prosemirror.schema.basic import schema
@@ -390,3 +394,17 @@ def test_parser(doc, expect, desc):
     behavior of existing files with the addition of this
     """
     assert from_html(schema, doc) == expect, desc
+
+
+def test_loads_html_support_on_demand():
+    code = (
+        "import sys, prosemirror, prosemirror.transform\n"
+        "assert not {m.split('.')[0] for m in sys.modules} & {'lxml', 'cssselect'}\n"
+        "from prosemirror.model import DOMParser, from_html\n"
+        "from prosemirror.model import from_dom\n"
+        "assert DOMParser is from_dom.DOMParser and from_html is from_dom.from_html\n"
+        "assert 'lxml' in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+    with pytest.raises(AttributeError):
+        prosemirror.model.DOMParsr  # noqa: B018
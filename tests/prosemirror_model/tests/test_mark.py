@@ -1,6 +1,6 @@
 import pytest
 
-from prosemirror.model import Mark, Node, Schema
+from prosemirror.model import Fragment, Mark, Node, Schema
 from prosemirror.test_builder import out
 from prosemirror.test_builder import test_schema as schema
 
@@ -196,3 +196,55 @@ class TestResolvedPosMarks:
     )
     def test_with_custom_doc(self, a, b):
         assert Mark.same_set(a, b)
+
+
+def test_marks_and_attrs_are_interned():
+    json = {"type": "link", "attrs": {"href": "https://example.com", "title": None}}
+    first = Mark.from_json(schema, json)
+    assert Mark.from_json(schema, json) is first
+    assert link("https://example.com") is first
+    assert link("https://example.com", "title") is not first
+    heading = {"type": "heading", "attrs": {"level": 2}, "content": []}
+    one, two = Node.from_json(schema, heading), Node.from_json(schema, heading)
+    assert one.attrs is two.attrs
+    remark = custom["remark"]
+    assert remark.create({"id": 1}) is not remark.create({"id": True})
+
+
+def test_mark_masks():
+    assert Mark.set_mask([]) == 0
+    assert Mark.set_mask([em_, strong]) == em_.type.bit | strong.type.bit
+    assert custom["strong"].excludes(custom["em"])
+    assert not custom["em"].excludes(custom["strong"])
+    assert custom["user"].excludes(custom["remark"])
+    assert not custom["remark"].excludes(custom["remark"])
+    code_block = schema.nodes["code_block"]
+    assert not code_block.allows_mark_type(em_.type)
+    assert not code_block.allows_mark_mask(Mark.set_mask([em_]))
+    assert code_block.allows_mark_mask(0)
+    assert schema.nodes["paragraph"].allows_mark_mask(Mark.set_mask([em_, code]))
+    node = doc(p("foo", em("bar"))).child(0)
+    assert node.child(0).mark_mask == 0
+    assert node.child(1).mark_mask == em_.type.bit
+    assert not node.child(0).same_markup(node.child(1))
+
+
+def test_mark_masks_across_schemas():
+    def make(marks):
+        return Schema({
+            "nodes": {
+                "doc": {"content": "para+"},
+                "para": {"content": "text*", "marks": "em"},
+                "text": {},
+            },
+            "marks": {name: {} for name in marks},
+        })
+
+    a, b = make(["em", "strong"]), make(["strong", "em"])
+    para = a.nodes["para"]
+    strong_text = b.text("x", [b.mark("strong")])
+    assert not para.valid_content(Fragment.from_(strong_text))
+    assert para.valid_content(Fragment.from_(b.text("x")))
+    assert not para.allows_node_marks(strong_text)
+    node = a.node("para", None, [a.text("y")])
+    assert not node.can_replace(0, 0, Fragment.from_(strong_text))
@@ -1,6 +1,11 @@
+import copy
+import pickle
+import sys
 from typing import Literal
 
-from prosemirror.model import Fragment, Schema
+import pytest
+
+from prosemirror.model import Fragment, Node, Schema, Slice
 from prosemirror.test_builder import eq, out
 from prosemirror.test_builder import test_schema as schema
 
@@ -121,6 +126,16 @@ class TestCut:
             doc(p(em("r", img, strong("baz"), br), "qu")),
         )
 
+    def test_cuts_text_by_utf16_offsets(self):
+        text = schema.text("a\U0001f600b\U0001f600c")
+        assert text.node_size == 7
+        assert text.cut(1, 3).text == "\U0001f600"
+        assert text.cut(3, 4).text == "b"
+        assert text.cut(4).text == "\U0001f600c"
+        assert text.cut(4).node_size == 3
+        d = doc(p("x\U0001f600", text))
+        assert d.cut(2, 8).eq(doc(p("\U0001f600a\U0001f600b")))
+
 
 class TestBetween:
     @staticmethod
@@ -180,6 +195,25 @@ class TestBetween:
             "xyz",
         )
 
+    def test_iter_between_matches_nodes_between(self):
+        d = doc(blockquote(ul(li(p("foo")), p("b"))), p("x", em("y", img)))
+        visited = []
+        d.nodes_between(3, d.content.size, lambda *args: visited.append(args))
+        assert list(d.iter_between(3, d.content.size)) == visited
+
+    def test_iter_between_can_skip_and_stop(self):
+        d = doc(blockquote(p("foo")), p("bar"), p("baz"))
+        walker = d.iter_descendants()
+        names = []
+        for node, _, _, _ in walker:
+            names.append(node.text if node.is_text else node.type.name)
+            if node.type.name == "blockquote":
+                walker.skip_children()
+            if node.is_text and node.text == "bar":
+                break
+        assert names == ["blockquote", "paragraph", "bar"]
+        assert next(walker)[0].type.name == "paragraph"
+
 
 class TestTextBetween:
     def test_passing_custom_function_as_leaf_text(self):
@@ -270,6 +304,7 @@ class TestToJSON:
     @staticmethod
     def round_trip(doc):
         assert schema.node_from_json(doc.to_json()).eq(doc)
+        assert Node.from_json(schema, doc.to_json_bytes(), trusted=True).eq(doc)
 
     def test_serialize_simple_node(self):
         self.round_trip(doc(p("foo")))
@@ -283,7 +318,195 @@ class TestToJSON:
     def test_serialize_block_leaf_nodes(self):
         self.round_trip(doc(p("a"), hr, p("b"), p()))
 
+    def test_round_trip_through_bytes(self):
+        node = doc(p("foo", em("bär", strong("baz")), " ", a("x")), p(img))
+        data = node.to_json_bytes()
+        assert isinstance(data, bytes)
+        for raw in [data, memoryview(data), data.decode()]:
+            assert Node.from_json(schema, raw).eq(node)
+        assert Slice.from_json(schema, node.slice(2, 6).to_json_bytes()).eq(
+            node.slice(2, 6),
+        )
+
+    def test_shares_frozen_attrs(self):
+        node = schema.node_from_json({
+            "type": "image",
+            "attrs": {"src": "x.png", "alt": None, "title": None},
+            "marks": [{"type": "link", "attrs": {"href": "y", "title": None}}],
+        })
+        with pytest.raises(TypeError):
+            node.attrs["src"] = "z.png"
+        assert hash(node.attrs) == hash(node.type.compute_attrs(dict(node.attrs)))
+        json = node.to_json()
+        assert json["attrs"] is node.attrs
+        assert json["marks"][0]["attrs"] is node.marks[0].attrs
+
+    def test_trusted_loading(self):
+        node = doc(p("foo", em("bar", strong("baz")), " ", a("x")), p(img), hr)
+        loaded = Node.from_json(schema, node.to_json_bytes(), trusted=True)
+        loaded.check()
+        assert loaded.child(1).child(0).attrs is node.child(1).child(0).attrs
+        assert loaded.child(0).last_child.marks[0] is node.child(0).last_child.marks[0]
+        assert loaded.content.size == node.content.size
+        slice = node.slice(2, 6)
+        assert Slice.from_json(schema, slice.to_json(), trusted=True).eq(slice)
+        with pytest.raises(ValueError, match="No value supplied for attribute src"):
+            Node.from_json(schema, {"type": "image"}, trusted=True)
+
+    def test_trusted_loading_partial_attrs(self):
+        with pytest.raises(ValueError, match="No value supplied for attribute src"):
+            Node.from_json(
+                schema, {"type": "image", "attrs": {"alt": "x"}}, trusted=True
+            )
+        image = Node.from_json(
+            schema, {"type": "image", "attrs": {"src": "y"}}, trusted=True
+        )
+        assert image.attrs == {"src": "y", "alt": None, "title": None}
+        link = {"type": "link", "attrs": {"href": "z"}}
+        text = {"type": "text", "text": "a", "marks": [link]}
+        loaded = Node.from_json(schema, text, trusted=True)
+        assert loaded.marks[0].attrs == {"href": "z", "title": None}
+
     def test_serialize_nested_nodes(self):
         self.round_trip(
             doc(blockquote(ul(li(p("a"), p("b")), li(p(img))), p("c")), p("d")),
         )
+
+
+def test_model_objects_have_no_instance_dict():
+    d = doc(p("foo", em("bar")))
+    for obj in [d, d.content, d.child(0).child(1), d.child(0).child(1).marks[0]]:
+        assert not hasattr(obj, "__dict__")
+    pos = d.resolve(3)
+    assert not hasattr(pos, "__dict__")
+    assert isinstance(pos.path, tuple)
+    assert isinstance(d.content.content, tuple)
+
+
+class TestPickle:
+    @pytest.fixture(autouse=True)
+    def _register(self):
+        schema.register("test")
+        yield
+        del Schema.registry["test"]
+        schema.name = None
+
+    def test_round_trips_model_objects(self):
+        node = doc(blockquote(p("foo", em("bar"))), p(img), hr)
+        for obj in [
+            node,
+            node.child(1),
+            node.child(0).child(0).child(1),
+            node.content,
+            node.slice(2, 6),
+            Slice(Fragment.empty, 1, 1),
+        ]:
+            assert pickle.loads(pickle.dumps(obj)).eq(obj)
+        for obj in [
+            Fragment.empty,
+            Slice.empty,
+            schema,
+            schema.nodes["paragraph"],
+            schema.marks["em"],
+            node.child(0).child(0).child(1).marks[0],
+        ]:
+            assert pickle.loads(pickle.dumps(obj)) is obj
+        loaded = pickle.loads(pickle.dumps(node))
+        assert loaded.child(1).child(0).attrs is node.child(1).child(0).attrs
+
+    def test_only_pickles_registered_schemas(self):
+        with pytest.raises(TypeError, match="registered"):
+            pickle.dumps(custom_schema.text("foo"))
+        with pytest.raises(ValueError, match="already registered"):
+            custom_schema.register("test")
+        with pytest.raises(ValueError, match="No schema"):
+            Schema.registered("unknown")
+
+    def test_copies_are_the_same_object(self):
+        node = doc(p("foo", em("bar")))
+        items = [node, node.content, node.slice(1, 3), node.child(0).child(1).marks[0]]
+        for obj in items:
+            assert copy.copy(obj) is obj
+        copied = copy.deepcopy(items)
+        assert copied is not items
+        assert all(a is b for a, b in zip(copied, items, strict=True))
+
+
+class TestDigest:
+    def test_equal_nodes_have_equal_digests(self):
+        one = doc(p("foo", em("bar")), blockquote(p("baz")))
+        two = doc(p("foo", em("bar")), blockquote(p("baz")))
+        assert one is not two
+        assert one.digest == two.digest
+        assert one.fingerprint == two.fingerprint
+        assert len(one.fingerprint) == 32
+        assert one.structural_hash == two.structural_hash
+        assert one.content.digest == two.content.digest
+
+    def test_differences_change_the_digest(self):
+        base = doc(p("foo", em("bar"))).digest
+        for other in [
+            doc(p("foo", em("baz"))),
+            doc(p("foo", strong("bar"))),
+            doc(p("foo", em("bar")), p()),
+            doc(blockquote(p("foo", em("bar")))),
+            doc(p("foo", a("bar"))),
+        ]:
+            assert other.digest != base
+
+    def test_attrs_are_compared_by_value(self):
+        heading = schema.nodes["heading"]
+        assert (
+            heading.create({"level": 1}).digest
+            == heading.create(
+                {"level": 1.0},
+            ).digest
+        )
+        assert (
+            heading.create({"level": 1}).digest
+            != heading.create(
+                {"level": 2},
+            ).digest
+        )
+
+    def test_fingerprint_is_stable(self):
+        assert doc(p("foo")).fingerprint == "d8034b21ab767300daf40fb1d5760c49"
+
+    def test_eq_rejects_by_digest(self):
+        one, two = doc(p("foo")), doc(p("fob"))
+        one.digest, two.digest  # noqa: B018
+        assert not one.eq(two)
+        assert one.eq(doc(p("foo")))
+
+    def test_diff_skips_nodes_with_equal_digests(self):
+        one = doc(p("a"), p("b"), p("c"))
+        two = doc(p("a"), p("b"), p("d"))
+        one.digest, two.digest  # noqa: B018
+        assert one.content.find_diff_start(two.content) == 7
+        assert one.content.find_diff_end(two.content) == {"a": 8, "b": 8}
+
+
+def test_deeply_nested_documents():
+    depth = sys.getrecursionlimit() + 100
+    json = {"type": "paragraph", "content": [{"type": "text", "text": "x"}]}
+    for _ in range(depth):
+        json = {"type": "blockquote", "content": [json]}
+    json = {"type": "doc", "content": [json]}
+    node = schema.node_from_json(json)
+    node.check()
+    other = schema.node_from_json(node.to_json())
+    assert node.content.find_diff_start(other.content) is None
+    assert node.content.find_diff_end(other.content) is None
+
+
+def test_node_type_flags_are_precomputed():
+    flags = {
+        name: (t.is_inline, t.is_textblock, t.is_leaf, t.is_atom, t.whitespace)
+        for name, t in schema.nodes.items()
+    }
+    assert flags["paragraph"] == (False, True, False, False, "normal")
+    assert flags["code_block"] == (False, True, False, False, "pre")
+    assert flags["image"] == (True, False, True, True, "normal")
+    assert flags["text"] == (True, False, True, True, "normal")
+    assert flags["blockquote"] == (False, False, False, False, "normal")
+    assert "is_leaf" in vars(schema.nodes["paragraph"])
@@ -1,5 +1,9 @@
+import gc
+import weakref
+
 import pytest
 
+from prosemirror.model import ResolvedPos
 from prosemirror.test_builder import out
 
 doc = out["doc"]
@@ -97,3 +101,66 @@ def test_pos_at_index(index, depth, pos, doc_for_pos_at_index):
 
     p_three = d.resolve(12)
     assert p_three.pos_at_index(index, depth) == pos
+
+
+def test_resolve_in_wide_doc():
+    wide = doc(*[
+        p("x" * (i % 4 + 1)) if i % 5 else blockquote(p()) for i in range(200)
+    ])
+    offsets = [0]
+    wide.for_each(lambda child, offset, index: offsets.append(offset + child.node_size))
+    assert wide.content.child_offsets() == offsets
+    for pos in range(wide.content.size + 1):
+        index = next(i for i, o in enumerate(offsets) if o >= pos)
+        if offsets[index] > pos:
+            index -= 1
+        assert wide.content.find_index(pos) == {
+            "index": index,
+            "offset": offsets[index],
+        }
+        if offsets[index] < pos:
+            assert wide.content.locate(pos, 1) == (index + 1, offsets[index + 1])
+        resolved = wide.resolve(pos)
+        assert resolved.index(0) == index
+        assert resolved.pos_at_index(resolved.index(0), 0) == offsets[index]
+
+
+def test_resolve_cached():
+    ResolvedPos.reset_cache_info()
+    d = doc(p("one two three"), p("four five six"))
+    first = d.resolve(2)
+    assert d.resolve(2) is first
+    assert d.resolve(3) is not first
+    assert d.resolve(2) is first
+    info = ResolvedPos.cache_info()
+    assert (info.hits, info.misses) == (2, 2)
+    for pos in range(ResolvedPos.cache_size):
+        d.resolve(pos + 4)
+    assert d.resolve(2) is not first
+    ref = weakref.ref(d)
+    del d, first
+    gc.collect()
+    assert ref() is None
+
+
+def test_resolve_cache_rebuilds_dropped_positions():
+    ResolvedPos.reset_cache_info()
+    d = doc(p("one two three"), p("four five six"))
+    path = d.resolve(5).path
+    again = d.resolve(5)
+    assert again.path == path
+    assert again.parent_offset == 4
+    assert ResolvedPos.cache_info().hits == 1
+
+
+def test_resolve_cache_keeps_no_cycle():
+    d = doc(p("one two three"), p("four five six"))
+    d.resolve(2)
+    d.resolve(16)
+    ref = weakref.ref(d)
+    gc.disable()
+    try:
+        del d
+        assert ref() is None
+    finally:
+        gc.enable()
@@ -0,0 +1,118 @@
+import random
+from itertools import accumulate
+
+import pytest
+
+from prosemirror.model import Fragment, Slice
+from prosemirror.model.rope import Rope
+from prosemirror.test_builder import out
+from prosemirror.transform import Transform
+
+doc = out["doc"]
+p = out["p"]
+blockquote = out["blockquote"]
+em = out["em"]
+
+
+@pytest.fixture
+def use_ropes():
+    old = Fragment.rope_threshold
+    Fragment.rope_threshold = 8
+    yield
+    Fragment.rope_threshold = old
+
+
+def check(rope, nodes):
+    assert len(rope) == len(nodes)
+    assert list(rope) == nodes
+    offsets = [0, *accumulate(n.node_size for n in nodes)]
+    assert rope.size == offsets[-1]
+    for i in range(0, len(nodes), 7):
+        assert rope[i] is nodes[i]
+        assert rope.offset_of(i) == offsets[i]
+
+
+def test_rope_operations():
+    rng = random.Random(42)
+    pool = [p("x" * (i % 5)) for i in range(10)]
+    nodes = [rng.choice(pool) for _ in range(3000)]
+    rope = Rope.from_nodes(nodes)
+    check(rope, nodes)
+    for _ in range(200):
+        op = rng.randrange(4)
+        i = rng.randrange(len(nodes))
+        node = rng.choice(pool)
+        if op == 0:
+            rope, nodes = rope.set(i, node), [*nodes[:i], node, *nodes[i + 1 :]]
+        elif op == 1:
+            rope, nodes = rope.insert(i, node), [*nodes[:i], node, *nodes[i:]]
+        elif op == 2:
+            j = rng.randrange(i, len(nodes) + 1)
+            check(rope.slice(i, j), nodes[i:j])
+        else:
+            j = rng.randrange(len(nodes))
+            joined = Rope.join(rope.slice(0, i), rope.slice(j, len(nodes)))
+            rope, nodes = joined, nodes[:i] + nodes[j:]
+    check(rope, nodes)
+    assert rope.height <= 4
+
+
+def test_rope_find():
+    nodes = [p("x" * (i % 3)) for i in range(500)]
+    rope = Rope.from_nodes(nodes)
+    pos = 0
+    for i, node in enumerate(nodes):
+        for offset in range(node.node_size):
+            assert rope.find(pos + offset) == (i, pos)
+        pos += node.node_size
+
+
+def test_fragment_uses_rope(use_ropes):
+    d = doc(*[p("a" * (i % 4 + 1)) for i in range(100)])
+    assert isinstance(d.content.content, Rope)
+    plain = Fragment(list(d.content.content))
+    assert isinstance(plain.content, Rope)
+    tr = Transform(d).insert(2, out["schema"].text("bc")).delete(20, 40).split(61)
+    assert isinstance(tr.doc.content.content, Rope)
+    assert tr.doc.content.size == tr.doc.content.content.size
+    Fragment.rope_threshold = None
+    expected = Transform(doc(*[p("a" * (i % 4 + 1)) for i in range(100)]))
+    expected.insert(2, out["schema"].text("bc")).delete(20, 40).split(61)
+    assert tr.doc.eq(expected.doc)
+    assert tr.doc.to_json() == expected.doc.to_json()
+
+
+def test_fragment_cut_rope(use_ropes):
+    d = doc(*[p("ab", em("cd")) for _ in range(40)], blockquote(p("ef")))
+    for from_, to in [(0, 7), (3, 200), (5, 6), (100, d.content.size)]:
+        cut = d.content.cut(from_, to)
+        Fragment.rope_threshold = None
+        expected = Fragment(list(d.content.content)).cut(from_, to)
+        Fragment.rope_threshold = 8
+        assert cut.eq(expected)
+        assert cut.size == expected.size
+
+
+def test_replace_keeps_ropes(use_ropes):
+    def blocks():
+        return doc(*[p("ab", em("cd")) for _ in range(40)])
+
+    def inline():
+        return doc(*[p(*["ab" if i % 2 else em("cd") for i in range(30)])] * 2)
+
+    cases = [
+        (blocks, 5, 200, doc(p("x"), p("y")).slice(2, 5)),
+        (blocks, 18, 18, doc(p("x")).slice(0, 3)),
+        (blocks, 0, 240, doc(p("x")).slice(0, 3)),
+        (inline, 3, 40, doc(p("ab")).slice(1, 3)),
+        (inline, 6, 10, doc(p(em("cd"))).slice(1, 3)),
+        (inline, 21, 73, Slice.empty),
+    ]
+    for make, from_, to, slice in cases:
+        replaced = make().replace(from_, to, slice)
+        Fragment.rope_threshold = None
+        expected = make().replace(from_, to, slice)
+        Fragment.rope_threshold = 8
+        assert replaced.eq(expected)
+        replaced.check()
+    assert isinstance(blocks().replace(5, 100, Slice.empty).content.content, Rope)
@@ -0,0 +1,169 @@
+import io
+import json
+
+import pytest
+
+from prosemirror.model import Node, Schema
+from prosemirror.model.stream import dump_json, iter_json, load_json, text_from_json
+from prosemirror.test_builder import out
+from prosemirror.test_builder import test_schema as schema
+
+doc = out["doc"]
+blockquote = out["blockquote"]
+h1 = out["h1"]
+p = out["p"]
+li = out["li"]
+ul = out["ul"]
+em = out["em"]
+strong = out["strong"]
+a = out["a"]
+br = out["br"]
+hr = out["hr"]
+img = out["img"]
+
+docs = [
+    doc(p()),
+    doc(p("foo")),
+    doc(p("foo", em("bar", strong("baz")), " ", a("x"))),
+    doc(h1("title"), p("a", br, img, "b"), hr, p("c")),
+    doc(blockquote(ul(li(p("a"), p("b")), li(p(img))), p("c")), p("d")),
+    doc(p('café \U0001f600 中文 "quoted" \\')),
+]
+
+
+@pytest.mark.parametrize("node", docs)
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_writes_the_same_bytes_as_to_json_bytes(node, chunk_size):
+    chunks = list(iter_json(node, chunk_size))
+    assert b"".join(chunks) == node.to_json_bytes()
+    file = io.BytesIO()
+    dump_json(node, file, chunk_size)
+    assert file.getvalue() == node.to_json_bytes()
+
+
+@pytest.mark.parametrize("node", docs)
+@pytest.mark.parametrize("chunk_size", [1, 3, 1 << 16])
+def test_reads_files_and_chunks(node, chunk_size):
+    data = node.to_json_bytes()
+    assert load_json(schema, io.BytesIO(data), chunk_size).eq(node)
+    text = data.decode()
+    assert load_json(schema, io.StringIO(text), chunk_size).eq(node)
+    chunks = [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+    assert load_json(schema, chunks).eq(node)
+
+
+def test_reads_numbers_split_between_chunks():
+    text = json.dumps({
+        "type": "doc",
+        "x": 1500.0,
+        "content": [
+            {
+                "type": "heading",
+                "attrs": {"level": 2, "id": -2.5e-7},
+                "content": [{"type": "text", "text": "a", "y": 12e30}],
+            },
+            {"type": "paragraph", "z": [10, -0.5, 1e5]},
+        ],
+    })
+    expected = Node.from_json(schema, text)
+    for i in range(len(text) + 1):
+        loaded = load_json(schema, [text[:i], text[i:]])
+        assert loaded.eq(expected)
+        assert loaded.child(0).attrs == expected.child(0).attrs
+
+
+def test_reads_formatted_json_with_any_key_order():
+    data = {
+        "content": [
+            {
+                "marks": [{"type": "em"}],
+                "text": "foo",
+                "type": "text",
+            },
+            {"type": "image", "attrs": {"src": "x.png", "alt": 12345}},
+        ],
+        "extra": [1, {"a": None}],
+        "type": "paragraph",
+    }
+    text = json.dumps({"type": "doc", "content": [data]}, indent=2)
+    node = load_json(schema, [text[i : i + 5] for i in range(0, len(text), 5)])
+    assert node.eq(Node.from_json(schema, text))
+    assert node.first_child.last_child.attrs["alt"] == 12345
+
+
+def test_reads_deeply_nested_documents():
+    depth = 5000
+    text = '{"type":"blockquote","content":[' * depth + '{"type":"paragraph"}'
+    text = '{"type":"doc","content":[' + text + "]}" * depth + "]}"
+    node = load_json(schema, io.StringIO(text))
+    assert node.content.size == depth * 2 + 2
+
+
+@pytest.mark.parametrize(
+    ("text", "message"),
+    [
+        ("", "Unexpected end"),
+        ("[]", "Invalid input"),
+        ("{}", "Invalid input"),
+        ('{"type":"doc","content":[{"type":"paragraph"}]', "Unexpected end"),
+        ('{"type":"doc","content":[{"type":"paragraph"}]} x', "after JSON"),
+        ('{"type":"doc","content":{"type":"paragraph"}}', "Fragment.from_json"),
+        ('{"type":"doc" "content":[]}', "Unexpected character"),
+    ],
+)
+def test_rejects_invalid_input(text, message):
+    with pytest.raises(ValueError, match=message):
+        load_json(schema, io.StringIO(text))
+
+
+@pytest.mark.parametrize("node", docs)
+def test_reads_trusted_input(node):
+    loaded = load_json(schema, io.BytesIO(node.to_json_bytes()), trusted=True)
+    assert loaded.eq(node)
+    loaded.check()
+
+
+contact_schema = Schema({
+    "nodes": {
+        "doc": {"content": "paragraph+"},
+        "paragraph": {"content": "(text|contact)*"},
+        "text": {},
+        "contact": {
+            "inline": True,
+            "attrs": {"name": {}, "email": {}},
+            "leafText": lambda node: f"{node.attrs['name']} <{node.attrs['email']}>",
+        },
+    },
+})
+
+
+def leaf_name(node):
+    return f"<{node.type.name}>"
+
+
+@pytest.mark.parametrize("leaf_text", ["", "*", leaf_name])
+@pytest.mark.parametrize("block_separator", ["", "\n"])
+def test_extracts_text_like_text_between(block_separator, leaf_text):
+    contacts = Node.from_json(
+        contact_schema,
+        {
+            "type": "doc",
+            "content": [
+                {"type": "paragraph"},
+                {
+                    "type": "paragraph",
+                    "content": [
+                        {"type": "text", "text": "Hello "},
+                        {"type": "contact", "attrs": {"name": "A", "email": "a@b"}},
+                    ],
+                },
+            ],
+        },
+    )
+    for node in [*docs, contacts, schema.text("foo")]:
+        expected = node.text_between(0, node.content.size, block_separator, leaf_text)
+        if node.is_text:
+            expected = node.text
+        for data in [node.to_json(), node.to_json_bytes()]:
+            text = text_from_json(node.type.schema, data, block_separator, leaf_text)
+            assert text == expected
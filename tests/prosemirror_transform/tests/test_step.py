@@ -1,5 +1,18 @@
+import pickle
+
 import pytest
 
+from prosemirror import codec
+from prosemirror.model import Schema
+from prosemirror.test_builder import test_schema as schema
+from prosemirror.transform import (
+    Step,
+    steps_from_binary,
+    steps_from_json,
+    steps_to_binary,
+    steps_to_json_bytes,
+)
+
 from .conftest import _make_step, _test_doc
 
 
@@ -52,3 +65,49 @@ def no(from1, to1, val1, from2, to2, val2):
 )
 def test_all_cases(pass_, from1, to1, val1, from2, to2, val2):
     pass_(from1, to1, val1, from2, to2, val2)()
+
+
+@pytest.fixture(params=["json", "orjson", "msgspec"])
+def json_backend(request):
+    previous = codec.backend
+    try:
+        codec.use_backend(request.param)
+    except ImportError:
+        pytest.skip(f"{request.param} is not installed")
+    yield request.param
+    codec.use_backend(previous)
+
+
+def test_steps_round_trip_through_bytes(json_backend):
+    steps = [_make_step(2, 2, "a"), _make_step(3, 4, None), _make_step(2, 4, "+em")]
+    data = steps_to_json_bytes(steps)
+    assert isinstance(data, bytes)
+    for raw in [data, bytearray(data), memoryview(data), data.decode()]:
+        parsed = steps_from_json(schema, raw)
+        assert [step.to_json() for step in parsed] == [s.to_json() for s in steps]
+    step = Step.from_json(schema, memoryview(steps[0].to_json_bytes()))
+    assert step.apply(_test_doc).doc.eq(steps[0].apply(_test_doc).doc)
+
+
+def test_steps_round_trip_through_binary():
+    steps = [_make_step(2, 2, "a"), _make_step(3, 4, None), _make_step(2, 4, "+em")]
+    parsed = steps_from_binary(schema, steps_to_binary(steps))
+    assert [step.to_json() for step in parsed] == [s.to_json() for s in steps]
+    step = Step.from_binary(schema, steps[2].to_binary())
+    assert step.apply(_test_doc).doc.eq(steps[2].apply(_test_doc).doc)
+
+
+@pytest.fixture
+def registered():
+    schema.register("test")
+    yield
+    del Schema.registry["test"]
+    schema.name = None
+
+
+def test_steps_pickle(registered):
+    steps = [_make_step(2, 2, "a"), _make_step(3, 4, None), _make_step(2, 4, "+em")]
+    for step, loaded in zip(steps, pickle.loads(pickle.dumps(steps)), strict=True):
+        assert type(loaded) is type(step)
+        assert loaded.to_json() == step.to_json()
+        assert loaded.apply(_test_doc).doc.eq(step.apply(_test_doc).doc)